@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""Benchmarks de WineProtonManager que no necesitan Wine instalado
+
+Se ejecutan con un HOME temporal y con los ejecutables falsos de stubs/
+(wine, wineserver, winetricks, konsole) delante en el PATH. El resultado es
+un JSON con la mediana, el mínimo y el máximo de cada medida; si se indica
+--baseline se compara con un resultado anterior y se marcan las regresiones.
+
+    python3 benchmarks/run_benchmarks.py --output resultados.json
+    python3 benchmarks/run_benchmarks.py --quick --baseline resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+STUB_DIR = BENCH_DIR / "stubs"
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+
+from wineproton_core import (  # noqa: E402
+    ConfigManager, InstallJob, InstallScheduler, InstalledIndex
+)
+
+PROGRAM_COUNTS = (10, 1000, 10000)
+LOG_LINES = (1000, 100000)
+QUICK_PROGRAM_COUNTS = (10, 1000)
+QUICK_LOG_LINES = (1000, 10000)
+VERBS = ("vcrun2022", "d3dx9", "corefonts", "dxvk", "dotnet48", "xact", "faudio", "mf")
+
+def measure(function, repeat, setup=None):
+    """Ejecuta function repeat veces (setup antes de cada una, sin medir) y resume los tiempos"""
+    samples = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        if setup:
+            function(argument)
+        else:
+            function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "repeat": repeat,
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3)
+    }
+
+class BenchmarkEnv:
+    """HOME aislado con configuraciones y prefixes de prueba"""
+    def __init__(self, root):
+        self.root = Path(root)
+        self.home = self.root / "home"
+        self.home.mkdir(parents=True)
+        os.environ["HOME"] = str(self.home)
+        os.environ["XDG_CACHE_HOME"] = str(self.home / ".cache")
+        os.environ["PATH"] = f"{STUB_DIR}:{os.environ.get('PATH', '')}"
+        self.config_dir = self.home / ".config" / "WineProtonManager"
+
+    def reset_config(self):
+        for name in ("config.json", "config.db", "config.db-wal", "config.db-shm", "installed_index.json",
+                     "version_cache.json"):
+            path = self.config_dir / name
+            if path.exists():
+                path.unlink()
+
+    def write_config(self, programs, configs=2):
+        """Escribe un config.json con el número indicado de programas guardados"""
+        self.reset_config()
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            "configs": {
+                f"Bench{i}": {"type": "wine", "arch": "win64", "prefix": str(self.prefix(f"Bench{i}"))}
+                for i in range(configs)
+            },
+            "last_used": "Bench0",
+            "custom_programs": [
+                {"id": f"p{i:06d}", "name": f"Programa {i}", "path": f"/opt/setup/programa-{i}.exe", "type": "exe"}
+                for i in range(programs)
+            ],
+            "settings": {
+                "winetricks_path": str(STUB_DIR / "winetricks"),
+                "config_path": str(self.config_dir / "config.json"),
+                "prefix_path": str(self.home / "prefixes"),
+                "theme": "light",
+                "window_size": [900, 650]
+            }
+        }
+        with open(self.config_dir / "config.json", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+
+    def prefix(self, name):
+        return self.home / "prefixes" / name
+
+def bench_config(env, repeat, counts):
+    results = []
+    for backend in ("json", "sqlite"):
+        for count in counts:
+            env.write_config(count)
+            if backend == "sqlite":
+                ConfigManager().set_storage_backend("sqlite")
+
+            load = measure(ConfigManager, repeat)
+            manager = ConfigManager()
+
+            def save():
+                # Cambia un programa para que el guardado tenga algo que escribir
+                manager.update_custom_programs({"Programa 0": {"path": f"/opt/setup/{time.perf_counter()}.exe"}})
+
+            results.append(dict(name="config_load", params={"backend": backend, "programs": count}, **load))
+            # Con SQLite los programas se leen al pedirlos: se mide también ese primer acceso
+            results.append(dict(name="config_load_programs", params={"backend": backend, "programs": count},
+                                **measure(lambda: ConfigManager().get_custom_programs(), repeat)))
+            results.append(dict(name="config_save", params={"backend": backend, "programs": count},
+                                **measure(save, repeat)))
+            manager.backend.close()
+    return results
+
+def bench_current_env(env, repeat):
+    env.write_config(10)
+    runner = env.home / "runners" / "wine-stub" / "bin"
+    runner.mkdir(parents=True)
+    for tool in ("wine", "wineserver"):
+        (runner / tool).symlink_to(STUB_DIR / tool)
+
+    manager = ConfigManager()
+    manager.configs["configs"]["Bench0"]["wine_dir"] = str(runner.parent)
+
+    def cold():
+        manager.version_cache.entries = {}
+        manager.get_current_env("Bench0")
+
+    return [
+        dict(name="get_current_env", params={"versions": "cold"}, **measure(cold, repeat)),
+        dict(name="get_current_env", params={"versions": "cached"},
+             **measure(lambda: manager.get_current_env("Bench0"), repeat)),
+        dict(name="get_current_env", params={"versions": "none"},
+             **measure(lambda: manager.get_current_env("Bench0", resolve_versions=False), repeat)),
+    ]
+
+def bench_queue_build(env, repeat, library=5000, queue_items=500):
+    """InstallerApp.build_install_jobs (lo que hace start_installation); se omite si PyQt5 no está instalado
+
+    Incluye añadir los items a la cola, resolver los programas por id,
+    agruparlos por configuración y planificar las dependencias.
+    """
+    params = {"library": library, "queue": queue_items}
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication
+        from WineProtonManager import ConfigManager as AppConfigManager, InstallerApp
+    except ImportError as e:
+        return [dict(name="queue_build", params=params, skipped=f"PyQt5 no disponible: {e}")]
+
+    app = QApplication.instance() or QApplication([])
+    if not isinstance(app, QApplication):
+        return [dict(name="queue_build", params=params, skipped="Ya hay una QCoreApplication sin widgets")]
+
+    env.write_config(library)
+    installer = InstallerApp(AppConfigManager())
+    programs = installer.config_manager.get_custom_programs()
+
+    def build():
+        installer.queue_model.clear()
+        for i in range(queue_items):
+            config_name = f"Bench{i % 2}"
+            if i % 2:
+                program = programs[(i * 7919) % len(programs)]
+                installer.add_to_queue(program["name"], program["type"], program["path"], config_name=config_name,
+                                       program_id=program["id"])
+            else:
+                installer.add_to_queue(VERBS[i % len(VERBS)], "winetricks", config_name=config_name)
+        installer.build_install_jobs(installer.queue_model.queue.by_config())
+
+    results = [dict(name="queue_build", params=params, **measure(build, repeat))]
+    installer.config_manager.backend.close()
+    return results
+
+def bench_installed_index(env, repeat, sizes):
+    results = []
+    for lines in sizes:
+        prefix = env.prefix(f"Log{lines}")
+        prefix.mkdir(parents=True, exist_ok=True)
+        with open(prefix / "winetricks.log", "w", encoding="utf-8") as f:
+            for i in range(lines):
+                f.write(f"{VERBS[i % len(VERBS)]}{i % 997}\n")
+
+        cache_file = env.root / f"installed_index_{lines}.json"
+
+        def cold_index():
+            if cache_file.exists():
+                cache_file.unlink()
+            return InstalledIndex(cache_file)
+
+        def append_lines():
+            with open(prefix / "winetricks.log", "a", encoding="utf-8") as f:
+                f.write("".join(f"nuevo{i}\n" for i in range(100)))
+
+        index = InstalledIndex(cache_file)
+        index.get(str(prefix))
+        results.extend([
+            dict(name="installed_winetricks", params={"log_lines": lines, "index": "cold"},
+                 **measure(lambda fresh: fresh.get(str(prefix)), repeat, setup=cold_index)),
+            dict(name="installed_winetricks", params={"log_lines": lines, "index": "cached"},
+                 **measure(lambda: index.get(str(prefix)), repeat)),
+            dict(name="installed_winetricks", params={"log_lines": lines, "index": "append_100"},
+                 **measure(lambda _: index.get(str(prefix)), repeat, setup=append_lines)),
+        ])
+    return results
+
+def make_jobs(env, configs, items):
+    manager = ConfigManager()
+    jobs = []
+    for i in range(configs):
+        name = f"Bench{i}"
+        manager.configs["configs"].setdefault(name, {"type": "wine", "arch": "win64", "prefix": str(env.prefix(name))})
+        prefix = env.prefix(name)
+        prefix.mkdir(parents=True, exist_ok=True)
+        (prefix / "winetricks.log").write_text("")
+        verbs = [f"verbo{i}_{n}" for n in range(items)]
+        jobs.append(InstallJob(name, manager.get_current_env(name, resolve_versions=False), verbs,
+                               ["winetricks"] * items))
+    return jobs
+
+def bench_install(env, repeat, configs=4, items=10, latency="0.01", lines=200):
+    os.environ["WPM_STUB_LATENCY"] = latency
+    os.environ["WPM_STUB_OUTPUT_LINES"] = str(lines)
+    env.write_config(10, configs=configs)
+    results = []
+    try:
+        for terminal in (None, str(STUB_DIR / "konsole")):
+            def run(jobs):
+                scheduler = InstallScheduler(str(STUB_DIR / "winetricks"), silent_mode=True, terminal=terminal,
+                                             log_dir=env.root / "logs")
+                if not scheduler.run(jobs, on_output=lambda job, idx, line: None):
+                    raise RuntimeError("La instalación de prueba falló")
+
+            timing = measure(run, repeat, setup=lambda: make_jobs(env, configs, items))
+            timing["items_per_s"] = round(configs * items / (timing["median_ms"] / 1000), 1)
+            results.append(dict(name="install_throughput",
+                                params={"runner": "InstallScheduler", "terminal": "konsole" if terminal else "none",
+                                        "configs": configs, "items": items, "latency_s": float(latency),
+                                        "output_lines": lines},
+                                **timing))
+        results.extend(bench_installer_thread(env, repeat, configs, items, latency, lines))
+    finally:
+        os.environ.pop("WPM_STUB_LATENCY", None)
+        os.environ.pop("WPM_STUB_OUTPUT_LINES", None)
+    return results
+
+def bench_installer_thread(env, repeat, configs, items, latency, lines):
+    """InstallerThread completo (señales Qt incluidas); se omite si PyQt5 no está instalado"""
+    params = {"runner": "InstallerThread", "terminal": "none", "configs": configs, "items": items,
+              "latency_s": float(latency), "output_lines": lines}
+    try:
+        from PyQt5.QtCore import QCoreApplication
+        from WineProtonManager import InstallerThread
+    except ImportError as e:
+        return [dict(name="install_throughput", params=params, skipped=f"PyQt5 no disponible: {e}")]
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+
+    def run(jobs):
+        thread = InstallerThread(jobs, silent_mode=True, winetricks_path=str(STUB_DIR / "winetricks"),
+                                 log_dir=env.root / "logs")
+        thread.start()
+        while not thread.wait(10):
+            app.processEvents()
+        app.processEvents()
+
+    timing = measure(run, repeat, setup=lambda: make_jobs(env, configs, items))
+    timing["items_per_s"] = round(configs * items / (timing["median_ms"] / 1000), 1)
+    return [dict(name="install_throughput", params=params, **timing)]
+
+BENCHMARKS = {
+    "config": lambda env, args: bench_config(env, args.repeat, QUICK_PROGRAM_COUNTS if args.quick else PROGRAM_COUNTS),
+    "current_env": lambda env, args: bench_current_env(env, args.repeat),
+    "queue_build": lambda env, args: bench_queue_build(env, args.repeat),
+    "installed_index": lambda env, args: bench_installed_index(env, args.repeat,
+                                                               QUICK_LOG_LINES if args.quick else LOG_LINES),
+    "install": lambda env, args: bench_install(env, max(1, args.repeat // 3)),
+}
+
+def result_key(result):
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+def compare(results, baseline_file, threshold):
+    """Añade a cada resultado la relación con el de referencia y devuelve las regresiones"""
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = {result_key(result): result for result in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        reference = baseline.get(result_key(result))
+        if not reference or "median_ms" not in result or "median_ms" not in reference:
+            continue
+        ratio = result["median_ms"] / reference["median_ms"] if reference["median_ms"] else 1.0
+        result["baseline_median_ms"] = reference["median_ms"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            result["regression"] = True
+            regressions.append(result)
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmarks de WineProtonManager con wine/winetricks/konsole falsos")
+    parser.add_argument("--repeat", type=int, default=9, metavar="N", help="Repeticiones de cada medida (9 por defecto)")
+    parser.add_argument("--quick", action="store_true", help="Tamaños reducidos para una comprobación rápida")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), default=[],
+                        help="Ejecuta solo este grupo (se puede repetir)")
+    parser.add_argument("--output", metavar="ARCHIVO", help="Guarda el JSON en un archivo en lugar de mostrarlo")
+    parser.add_argument("--baseline", metavar="ARCHIVO", help="Resultado anterior con el que comparar")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Aumento de la mediana que se considera regresión (0.2 = 20%%)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.repeat = max(1, args.repeat)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="wpm-bench-") as root:
+        env = BenchmarkEnv(root)
+        for name in args.only or BENCHMARKS:
+            started = time.perf_counter()
+            results.extend(BENCHMARKS[name](env, args))
+            print(f"{name}: {time.perf_counter() - started:.1f} s", file=sys.stderr, flush=True)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "quick": args.quick,
+        "results": results
+    }
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        report["regressions"] = len(regressions)
+        for result in regressions:
+            print(f"Regresión: {result['name']} {result['params']} {result['baseline_median_ms']} -> "
+                  f"{result['median_ms']} ms (x{result['ratio']})", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from setuptools import setup, find_packages
+from setuptools import setup
 
 setup(
     name="WineProtonManager",
@@ -10,13 +10,14 @@ setup(
     author_email="tu@email.com",
     url="https://github.com/EstebanKZL/WineProtonManager",
     license="GPL-3.0-only",
-    packages=find_packages(),
+    package_dir={'': 'src'},
+    py_modules=['WineProtonManager', 'wineproton_core', 'wineproton_cli'],
     install_requires=[
         'PyQt5>=5.15.0',
     ],
     entry_points={
         'console_scripts': [
-            'wineprotonmanager=src.wineprotonmanager:main',
+            'wineprotonmanager=wineproton_cli:main',
         ],
     },
     include_package_data=True,
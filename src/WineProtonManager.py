@@ -2,23 +2,44 @@
 import sys
 import os
 import subprocess
-import json
 import re
+import time
 from pathlib import Path
+
+# Inicio del arranque para --startup-profile (antes de cargar PyQt5)
+IMPORT_STARTED = time.perf_counter()
+
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QListWidget, QLabel, QCheckBox, QDialog, QDialogButtonBox,
+    QLabel, QCheckBox, QDialog, QDialogButtonBox,
     QMessageBox, QGroupBox, QComboBox, QLineEdit, QFileDialog,
     QTabWidget, QFormLayout, QScrollArea, QListWidgetItem, QAction,
-    QMenu, QMenuBar, QTableWidget, QTableWidgetItem, QHeaderView, QTreeWidget, QTreeWidgetItem
+    QMenu, QMenuBar, QTableWidget, QTableWidgetItem, QTableView, QHeaderView,
+    QPlainTextEdit, QInputDialog, QTreeView
+)
+from PyQt5.QtCore import (
+    Qt, QThread, pyqtSignal, QDir, QSize, QObject, QRunnable, QThreadPool, QTimer,
+    QAbstractItemModel, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QDir, QSize
 from PyQt5.QtGui import QIcon, QPalette, QColor, QFont
 
+from wineproton_core import (
+    ConfigManager as CoreConfigManager, DownloadPrefetcher, InstallEngine, InstallJob, InstallQueue, InstallScheduler,
+    StartupProfile, TRACER, VerbSearchIndex, run_process
+)
+
+class LazyStyle(dict):
+    """Diccionario de estilo cuyos valores costosos se crean en el primer acceso"""
+    def __init__(self, values, factories):
+        super().__init__(values)
+        self.factories = factories
+
+    def __missing__(self, key):
+        value = self[key] = self.factories[key]()
+        return value
+
 # Configuración de estilo mejorada para Plasma KDE moderno
-KDE_STYLE = {
-    "font": QFont("Noto Sans", 10),
-    "title_font": QFont("Noto Sans", 12, QFont.Bold),
+KDE_STYLE = LazyStyle({
     "button_style": """
         QPushButton {
             background-color: #3daee9;
@@ -80,16 +101,16 @@ KDE_STYLE = {
         "highlight_text": Qt.white
     },
     "table_style": """
-        QTableWidget {
+        QTableView {
             background-color: #ffffff;
             alternate-background-color: #f9f9fa;
             gridline-color: #d0d0d0;
             border: 1px solid #c4c9cc;
         }
-        QTableWidget::item {
+        QTableView::item {
             padding: 6px;
         }
-        QTableWidget::item:selected {
+        QTableView::item:selected {
             background-color: #3daee9;
             color: white;
         }
@@ -101,17 +122,17 @@ KDE_STYLE = {
         }
     """,
     "dark_table_style": """
-        QTableWidget {
+        QTableView {
             background-color: #31363b;
             alternate-background-color: #2b3035;
             gridline-color: #555b61;
             border: 1px solid #5c636a;
         }
-        QTableWidget::item {
+        QTableView::item {
             padding: 6px;
             color: white;
         }
-        QTableWidget::item:selected {
+        QTableView::item:selected {
             background-color: #3daee9;
             color: white;
         }
@@ -153,403 +174,366 @@ KDE_STYLE = {
             color: white;
         }
     """
-}
+}, {
+    # La fuente se crea al usarla por primera vez, no al importar el módulo
+    "font": lambda: QFont("Noto Sans", 10)
+})
 
-class ConfigManager:
-    """Gestor optimizado de configuraciones persistentes"""
-    def __init__(self):
-        config_dir = Path.home() / ".config" / "WineProtonManager"
-        self.config_file = config_dir / "config.json"
-        config_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.configs = self.load_configs()
-        self.ensure_default_config()
 
-    def ensure_default_config(self):
-        """Garantiza la existencia de configuraciones básicas"""
-        configs = self.configs.setdefault("configs", {})
-        self.configs.setdefault("last_used", "Wine-System")
-        
-        if "Wine-System" not in configs:
-            configs["Wine-System"] = {
-                "type": "wine",
-                "prefix": str(Path.home() / ".wine"),
-                "arch": "win64"
-            }
-        
-        settings = self.configs.setdefault("settings", {
-            "winetricks_path": str(Path(__file__).parent / "AppDir" / "usr" / "bin" / "winetricks"),
-            "config_path": str(self.config_file),
-            "prefix_path": str(Path.home() / "WineProtonManager"),
-            "theme": "light",
-            "window_size": [900, 650]
-        })
-        
-        Path(settings["prefix_path"]).mkdir(parents=True, exist_ok=True)
-        self.save_configs()
+class ThemeEngine:
+    """Tema de la aplicación: una hoja de estilo y una paleta por tema
 
-    def load_configs(self):
-        """Carga configuraciones optimizada"""
-        default = {
-            "configs": {},
-            "last_used": "Wine-System",
-            "custom_programs": [],
-            "settings": {
-                "winetricks_path": str(Path(__file__).parent / "AppDir" / "usr" / "bin" / "winetricks"),
-                "config_path": str(self.config_file),
-                "prefix_path": str(Path.home() / "WineProtonManager"),
-                "theme": "light",
-                "window_size": [900, 650]
-            }
+    Cada tema se compila una sola vez a partir de KDE_STYLE y se aplica a
+    QApplication, de modo que los widgets y diálogos nuevos lo heredan sin
+    recorrerlos uno a uno y cambiar de tema es un único repintado.
+    """
+    PALETTE_ROLES = {
+        "window": QPalette.Window,
+        "window_text": QPalette.WindowText,
+        "base": QPalette.Base,
+        "text": QPalette.Text,
+        "button": QPalette.Button,
+        "button_text": QPalette.ButtonText,
+        "highlight": QPalette.Highlight,
+        "highlight_text": QPalette.HighlightedText
+    }
+
+    FONT_STYLE = """
+        QGroupBox {
+            font-family: "Noto Sans";
+            font-size: 12pt;
+            font-weight: bold;
         }
-        
-        if not self.config_file.exists():
-            return default
-        
-        try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                loaded = json.load(f)
-                loaded.setdefault("custom_programs", [])
-                loaded.setdefault("settings", default["settings"])
-                return loaded
-        except Exception as e:
-            print(f"Error loading config: {e}")
-            return default
-
-    def save_configs(self):
-        """Guarda configuraciones con manejo de errores"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.configs, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving config: {e}")
-
-    def get_config(self, config_name):
-        """Obtiene una configuración específica por nombre"""
-        return self.configs["configs"].get(config_name)
-
-    def get_current_env(self, config_name):
-        """Obtiene el entorno para la configuración actual"""
-        config = self.get_config(config_name)
-        if not config:
-            return None
-
-        env = os.environ.copy()
-        env["WINEPREFIX"] = config["prefix"]
-        env["WINEARCH"] = config.get("arch", "win64")
+        QGroupBox QWidget {
+            font-size: 10pt;
+            font-weight: normal;
+        }
+        QGroupBox QGroupBox {
+            font-size: 12pt;
+            font-weight: bold;
+        }
+    """
 
-        if config.get("type") == "proton":
-            proton_dir = Path(config["proton_dir"])
-            env.update({
-                "PROTON_DIR": str(proton_dir),
-                "WINE": str(proton_dir / "files/bin/wine"),
-                "WINESERVER": str(proton_dir / "files/bin/wineserver"),
-                "PATH": f"{proton_dir / 'files/bin'}:{os.environ.get('PATH', '')}"
-            })
-            version_file = proton_dir / "version"
-            if version_file.exists():
-                with open(version_file, 'r', encoding='utf-8') as f:
-                    env["PROTON_VERSION"] = f.read().strip()
+    DARK_TREE_STYLE = """
+        QTreeView {
+            background-color: #31363b;
+            color: white;
+        }
+        QTreeView::item {
+            padding: 6px;
+        }
+        QTreeView::item:selected {
+            background-color: #3daee9;
+            color: white;
+        }
+        QTreeView::indicator {
+            width: 16px;
+            height: 16px;
+            border: 1px solid #76797C;
+            background: #ffffff;
+        }
+        QTreeView::indicator:unchecked {
+            background: #ffffff;
+            image: none;
+        }
+        QTreeView::indicator:checked {
+            background: #ffffff;
+            image: url("icons/check-black.svg");
+        }
+    """
 
-            try:
-                result = subprocess.run(
-                    [str(proton_dir / "files/bin/wine"), "--version"],
-                    env=env,
-                    capture_output=True, text=True
-                )
-                if result.returncode == 0:
-                    env["WINE_VERSION_IN_PROTON"] = result.stdout.strip()
-            except Exception:
-                pass
-        else:
-            wine_dir = config.get("wine_dir")
-            if wine_dir:
-                wine_dir = Path(wine_dir)
-                env.update({
-                    "WINE": str(wine_dir / "bin/wine"),
-                    "WINESERVER": str(wine_dir / "bin/wineserver"),
-                    "PATH": f"{wine_dir / 'bin'}:{os.environ.get('PATH', '')}"
-                })
-                try:
-                    result = subprocess.run(
-                        [str(wine_dir / "bin/wine"), "--version"],
-                        capture_output=True, text=True
-                    )
-                    if result.returncode == 0:
-                        env["WINE_VERSION"] = result.stdout.strip()
-                except Exception:
-                    pass
+    def __init__(self):
+        self._compiled = {}
+        self.current = None
+
+    def compile(self, theme):
+        """Obtiene (hoja de estilo, paleta) del tema, compilándolos la primera vez"""
+        if theme not in self._compiled:
+            parts = [KDE_STYLE["button_style"], self.FONT_STYLE]
+            if theme == "dark":
+                palette = QPalette(QApplication.palette())
+                for key, role in self.PALETTE_ROLES.items():
+                    palette.setColor(role, QColor(KDE_STYLE["dark_palette"][key]))
+                parts.append(self.DARK_TREE_STYLE)
             else:
-                env.update({
-                    "WINE": "wine",
-                    "WINESERVER": "wineserver"
-                })
-                try:
-                    result = subprocess.run(
-                        ["wine", "--version"],
-                        capture_output=True, text=True
-                    )
-                    if result.returncode == 0:
-                        env["WINE_VERSION"] = result.stdout.strip()
-                except Exception:
-                    pass
-
-        return env
-
-    def remove_custom_program(self, program_name):
-        """Elimina un programa personalizado por nombre"""
-        if "custom_programs" not in self.configs:
-            return False
+                palette = QApplication.style().standardPalette()
+            self._compiled[theme] = ("\n".join(parts), palette)
+        return self._compiled[theme]
 
-        removed = False
-        for i in range(len(self.configs["custom_programs"])-1, -1, -1):
-            if self.configs["custom_programs"][i]["name"] == program_name:
-                del self.configs["custom_programs"][i]
-                removed = True
-
-        if removed:
-            self.save_configs()
-
-        return removed
-
-    def add_custom_program(self):
-        dialog = CustomProgramDialog(self)
-        if dialog.exec_() == QDialog.Accepted:
-            try:
-                program_info = dialog.get_program_info()
-                program_path = program_info["path"]
-                program_name = program_info["name"]
-                program_type = program_info["type"]
-
-                display_type = "EXE" if program_type == "exe" else "Winetricks"
-                
-                # Añadimos a las listas internas
-                self.custom_programs.append(program_path)
-                self.custom_program_types.append(program_type)
-                
-                # Mostramos solo el nombre en la tabla
-                self.add_item_to_table(program_name, display_type)
-                self.update_install_button()
-                
-                # Guardamos en la configuración
-                self.config_manager.add_custom_program(program_name, program_path)
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error al añadir programa:\n{str(e)}")
-
-    def get_custom_programs(self):
-        """Obtiene la lista de programas personalizados con tipo por defecto si falta"""
-        programs = self.configs.get("custom_programs", [])
+    def apply(self, theme):
+        """Aplica el tema a toda la aplicación (no hace nada si ya está aplicado)"""
+        if theme == self.current:
+            return
+        stylesheet, palette = self.compile(theme)
+        app = QApplication.instance()
+        if self.current is None:
+            app.setFont(KDE_STYLE["font"])
+        app.setPalette(palette)
+        app.setStyleSheet(stylesheet)
+        self.current = theme
+
+
+# Lista básica de componentes, usada hasta tener el catálogo de winetricks list-all
+DEFAULT_COMPONENT_GROUPS = {
+    "Bibliotecas Visual Basic": ["vb2run", "vb3run", "vb4run", "vb5run", "vb6run"],
+    "Visual C++ Runtime": [
+        "vcrun6", "vcrun6sp6", "vcrun2003", "vcrun2005", "vcrun2008",
+        "vcrun2010", "vcrun2012", "vcrun2013", "vcrun2015", "vcrun2017",
+        "vcrun2019", "vcrun2022"
+    ],
+    ".NET Framework": [
+        "dotnet11", "dotnet11sp1", "dotnet20", "dotnet20sp1", "dotnet20sp2",
+        "dotnet30", "dotnet30sp1", "dotnet35", "dotnet35sp1", "dotnet40",
+        "dotnet40_kb2468871", "dotnet45", "dotnet452", "dotnet46", "dotnet461",
+        "dotnet462", "dotnet471", "dotnet472", "dotnet48", "dotnet6", "dotnet7",
+        "dotnet8", "dotnet9", "dotnetcore2", "dotnetcore3", "dotnetcoredesktop3",
+        "dotnetdesktop6", "dotnetdesktop7", "dotnetdesktop8", "dotnetdesktop9"
+    ],
+    "DirectX y Multimedia": [
+        "d3dcompiler_42", "d3dcompiler_43", "d3dcompiler_46", "d3dcompiler_47",
+        "d3dx9", "d3dx9_24", "d3dx9_25", "d3dx9_26", "d3dx9_27", "d3dx9_28",
+        "d3dx9_29", "d3dx9_30", "d3dx9_31", "d3dx9_32", "d3dx9_33", "d3dx9_34",
+        "d3dx9_35", "d3dx9_36", "d3dx9_37", "d3dx9_38", "d3dx9_39", "d3dx9_40",
+        "d3dx9_41", "d3dx9_42", "d3dx9_43", "d3dx10", "d3dx10_43", "d3dx11_42",
+        "d3dx11_43", "d3dxof", "devenum", "dinput", "dinput8", "directmusic",
+        "directplay", "directshow", "directx9", "dmband", "dmcompos", "dmime",
+        "dmloader", "dmscript", "dmstyle", "dmsynth", "dmusic", "dmusic32",
+        "dx8vb", "dxdiag", "dxdiagn", "dxdiagn_feb2010", "dxtrans", "xact",
+        "xact_x64", "xaudio29", "xinput", "xna31", "xna40"
+    ],
+    "DXVK y VKD3D": [
+        "dxvk", "dxvk1000", "dxvk1001", "dxvk1002", "dxvk1003", "dxvk1011",
+        "dxvk1020", "dxvk1021", "dxvk1022", "dxvk1023", "dxvk1030", "dxvk1031",
+        "dxvk1032", "dxvk1033", "dxvk1034", "dxvk1040", "dxvk1041", "dxvk1042",
+        "dxvk1043", "dxvk1044", "dxvk1045", "dxvk1046", "dxvk1050", "dxvk1051",
+        "dxvk1052", "dxvk1053", "dxvk1054", "dxvk1055", "dxvk1060", "dxvk1061",
+        "dxvk1070", "dxvk1071", "dxvk1072", "dxvk1073", "dxvk1080", "dxvk1081",
+        "dxvk1090", "dxvk1091", "dxvk1092", "dxvk1093", "dxvk1094", "dxvk1100",
+        "dxvk1101", "dxvk1102", "dxvk1103", "dxvk2000", "dxvk2010", "dxvk2020",
+        "dxvk2030", "dxvk2040", "dxvk2041", "dxvk2050", "dxvk2051", "dxvk2052",
+        "dxvk2053", "dxvk2060", "dxvk2061", "dxvk2062", "vkd3d"
+    ],
+    "Codecs Multimedia": [
+        "allcodecs", "avifil32", "binkw32", "cinepak", "dirac", "ffdshow",
+        "icodecs", "l3codecx", "lavfilters", "lavfilters702", "ogg", "qasf",
+        "qcap", "qdvd", "qedit", "quartz", "quartz_feb2010", "quicktime72",
+        "quicktime76", "wmp9", "wmp10", "wmp11", "wmv9vcm", "xvid"
+    ],
+    "Componentes de Sistema": [
+        "amstream", "atmlib", "cabinet", "cmd", "comctl32", "comctl32ocx",
+        "comdlg32ocx", "crypt32", "crypt32_winxp", "dbghelp", "esent", "filever",
+        "gdiplus", "gdiplus_winxp", "glidewrapper", "glut", "gmdls", "hid",
+        "jet40", "mdac27", "mdac28", "msaa", "msacm32", "msasn1", "msctf",
+        "msdelta", "msdxmocx", "msflxgrd", "msftedit", "mshflxgd", "msls31",
+        "msmask", "mspatcha", "msscript", "msvcirt", "msvcrt40", "msxml3",
+        "msxml4", "msxml6", "ole32", "oleaut32", "pdh", "pdh_nt4", "peverify",
+        "pngfilt", "prntvpt", "python26", "python27", "riched20", "riched30",
+        "richtx32", "sapi", "sdl", "secur32", "setupapi", "shockwave",
+        "speechsdk", "tabctl32", "ucrtbase2019", "uiribbon", "updspapi",
+        "urlmon", "usp10", "webio", "windowscodes", "winhttp", "wininet",
+        "wininet_win2k", "wmi", "wsh57", "xmllite"
+    ],
+    "Controladores y Utilidades": [
+        "art2k7min", "art2kmin", "cnc_ddraw", "d2gl", "d3drm", "dpvoice",
+        "dsdmo", "dsound", "dswave", "faudio", "faudio1901", "faudio1902",
+        "faudio1903", "faudio1904", "faudio1905", "faudio1906", "faudio190607",
+        "galliumnine", "galliumnine02", "galliumnine03", "galliumnine04",
+        "galliumnine05", "galliumnine06", "galliumnine07", "galliumnine08",
+        "galliumnine09", "gfw", "ie6", "ie7", "ie8", "ie8_kb2936068",
+        "ie8_tls12", "iertutil", "itircl", "itss", "mdx", "mf", "mfc40",
+        "mfc42", "mfc70", "mfc71", "mfc80", "mfc90", "mfc100", "mfc110",
+        "mfc120", "mfc140", "nuget", "openal", "otvdm", "otvdm090",
+        "physx", "powershell", "powershell_core"
+    ]
+}
 
-        for program in programs:
-            if "type" not in program:
-                program["type"] = "winetricks"
+DEFAULT_COMPONENT_DESCRIPTIONS = {
+    "vb2run": "Visual Basic 2.0 Runtime",
+    "vb3run": "Visual Basic 3.0 Runtime",
+    "vb4run": "Visual Basic 4.0 Runtime",
+    "vb5run": "Visual Basic 5.0 Runtime",
+    "vb6run": "Visual Basic 6.0 Runtime",
+    "vcrun6": "Visual C++ 6.0 Runtime (SP6 recomendado)",
+    "vcrun2005": "Visual C++ 2005 Runtime",
+    "vcrun2008": "Visual C++ 2008 Runtime",
+    "dotnet40": "Microsoft .NET Framework 4.0",
+    "dotnet48": "Microsoft .NET Framework 4.8",
+}
 
-        return programs
-        
-    def set_theme(self, theme):
-        """Establece el tema (light/dark)"""
-        if "settings" not in self.configs:
-            self.configs["settings"] = {}
-        self.configs["settings"]["theme"] = theme
-        self.save_configs()
-
-    def get_theme(self):
-        """Obtiene el tema actual"""
-        return self.configs["settings"].get("theme", "light")
-        
-    def get_winetricks_path(self):
-        """Obtiene la ruta de winetricks (sistema -> configurada -> interna)"""
-        # Primero intentamos con el winetricks del sistema
-        try:
-            result = subprocess.run(["which", "winetricks"], 
-                                  capture_output=True, 
-                                  text=True,
-                                  check=True)
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip()
-        except Exception:
-            pass
-        
-        # Luego probamos con la ruta configurada
-        configured_path = self.configs["settings"].get("winetricks_path", "")
-        if configured_path:
-            path_obj = Path(configured_path)
-            if path_obj.exists() and path_obj.is_file():
-                return configured_path
-        
-        # Finalmente probamos con la ruta interna
-        internal_path = Path(__file__).parent / "AppDir" / "usr" / "bin" / "winetricks"
-        if internal_path.exists():
-            return str(internal_path)
-        
-        # Si todo falla, devolvemos solo el comando
-        return "winetricks"
+CATALOG_CATEGORY_NAMES = {
+    "dlls": "Bibliotecas (DLLs)",
+    "fonts": "Fuentes",
+    "settings": "Ajustes",
+    "apps": "Aplicaciones",
+    "benchmarks": "Benchmarks",
+    "games": "Juegos",
+}
 
+class ConfigManager(CoreConfigManager):
+    """Gestor de configuraciones con los ajustes propios de la interfaz Qt"""
     def set_winetricks_path(self, path):
         """Establece y valida la ruta de winetricks"""
-        if not path:
-            return
-        
-        path = path.strip()
-        
-        if path == "winetricks":
-            valid = True
-        else:
-            path_obj = Path(path)
-            valid = path_obj.exists() and path_obj.is_file()
-        
-        if not valid:
+        if not super().set_winetricks_path(path):
             QMessageBox.warning(
                 None, 
                 "Ruta inválida",
                 "La ruta de winetricks no es válida o no existe.\n"
                 "Se usará la ruta por defecto."
             )
-            return
-        
-        self.configs["settings"]["winetricks_path"] = path
-        self.save_configs()
-    
-    def set_config_path(self, path):
-        """Establece la ruta del archivo de configuración"""
-        self.configs["settings"]["config_path"] = path
-        self.save_configs()
-    
-    def get_config_path(self):
-        """Obtiene la ruta del archivo de configuración"""
-        return self.configs["settings"].get("config_path", str(Path.home() / ".config/wineprotonmanager_config.json"))
-    
-    def set_prefix_path(self, path):
-        """Establece la ruta para los prefixes"""
-        self.configs["settings"]["prefix_path"] = path
-        self.save_configs()
-    
-    def get_prefix_path(self):
-        """Obtiene la ruta para los prefixes"""
-        return self.configs["settings"].get("prefix_path", str(Path.home() / "WineProtonManager"))
-
-    def remove_config(self, config_name):
-        """Elimina una configuración guardada"""
-        if config_name in self.configs["configs"]:
-            del self.configs["configs"][config_name]
-            if self.configs["last_used"] == config_name:
-                self.configs["last_used"] = "Wine-System" if "Wine-System" in self.configs["configs"] else ""
-            self.save_configs()
-            return True
-        return False
-
-    def get_installed_winetricks(self, prefix_path):
-        """Obtiene la lista de componentes winetricks instalados en un prefix"""
-        winetricks_log = Path(prefix_path) / "winetricks.log"
-        if not winetricks_log.exists():
-            return []
-        
-        try:
-            with open(winetricks_log, 'r', encoding='utf-8') as f:
-                return [line.strip() for line in f.readlines() if line.strip()]
-        except Exception:
-            return []
+            return False
+        return True
 
     def save_window_size(self, size):
         """Guarda el tamaño de la ventana"""
-        if "settings" not in self.configs:
-            self.configs["settings"] = {}
-        self.configs["settings"]["window_size"] = [size.width(), size.height()]
-        self.save_configs()
-    
+        super().save_window_size([size.width(), size.height()])
+
     def get_window_size(self):
         """Obtiene el tamaño guardado de la ventana"""
-        size = self.configs["settings"].get("window_size", [900, 650])
-        return QSize(size[0], size[1])
+        width, height = super().get_window_size()
+        return QSize(width, height)
 
 class InstallerThread(QThread):
-    """Hilo optimizado para instalaciones"""
+    """Hilo optimizado para instalaciones
+
+    Ejecuta los trabajos con InstallScheduler: los prefixes distintos se
+    instalan en paralelo y las señales indican la fila de la cola afectada.
+    Sin konsole_path la salida de cada proceso se emite línea a línea en output.
+    Con prefetch_jobs > 0 las descargas de winetricks se adelantan a la instalación.
+    La creación de los prefixes se notifica por configuración en prefix_progress.
+    """
     progress = pyqtSignal(int, str)
+    prefix_progress = pyqtSignal(str, str)
+    output = pyqtSignal(int, str)
+    item_finished = pyqtSignal(int, bool, str)
     finished = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, items, env, item_types=None, silent_mode=False, winetricks_path="winetricks"):
+    def __init__(self, jobs, silent_mode=False, winetricks_path="winetricks", konsole_path=None, log_dir=None,
+                 prefetch_jobs=0, force=True):
         super().__init__()
-        self.items = items  # Lista de paths (componentes winetricks o rutas de instaladores)
-        self.env = env
-        self._is_running = True
-        self.silent_mode = silent_mode
-        self.item_types = item_types or []  # Lista de tipos ("winetricks" o "exe")
-        self.winetricks_path = winetricks_path
+        self.jobs = jobs  # Lista de InstallJob (uno por configuración)
+        self.konsole_path = konsole_path
+        self.scheduler = InstallScheduler(
+            winetricks_path=winetricks_path,
+            silent_mode=silent_mode,
+            terminal=konsole_path,
+            log_dir=log_dir,
+            prefetcher=DownloadPrefetcher(winetricks_path, max_workers=prefetch_jobs) if prefetch_jobs else None,
+            force=force
+        )
+
+    @TRACER.traced(category="install")
+    def run(self):
+        self.scheduler.run(
+            self.jobs,
+            on_progress=self.emit_progress,
+            on_item_finished=lambda job, idx, ok, message: self.item_finished.emit(job.item_ids[idx], ok, message),
+            on_error=lambda job, message: self.error.emit(f"[{job.config_name}] {message}"),
+            on_output=self.emit_output
+        )
+        self.finished.emit()
+
+    def emit_progress(self, job, idx, message):
+        # idx es None mientras se crea el prefix del trabajo
+        if idx is None:
+            self.prefix_progress.emit(job.config_name, message)
+        else:
+            self.progress.emit(job.item_ids[idx], message)
+
+    def emit_output(self, job, idx, line):
+        if idx is None:
+            self.output.emit(-1, f"{job.config_name}: {line}")
+        else:
+            self.output.emit(job.item_ids[idx], line)
+
+    def stop(self, wait=False):
+        self.scheduler.stop(wait)
+
+class EnvResolverSignals(QObject):
+    """Señales del resolvedor de entornos en segundo plano"""
+    resolved = pyqtSignal(int, str, object)
+
+class EnvResolver(QRunnable):
+    """Resuelve el entorno y las versiones de una configuración fuera del hilo de la GUI"""
+    def __init__(self, config_manager, config_name, request_id):
+        super().__init__()
+        self.config_manager = config_manager
+        self.config_name = config_name
+        self.request_id = request_id
+        self.signals = EnvResolverSignals()
+
+    @classmethod
+    def start(cls, config_manager, config_name, request_id, callback):
+        """Lanza la resolución en el pool global y conecta el resultado a callback"""
+        resolver = cls(config_manager, config_name, request_id)
+        resolver.signals.resolved.connect(callback)
+        QThreadPool.globalInstance().start(resolver)
+        return resolver
 
     def run(self):
-        # Verificar si Konsole está instalado
         try:
-            subprocess.run(["which", "konsole"], check=True,
-                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except Exception:
-            self.error.emit(
-                "Konsole no está instalado. Es necesario para mostrar la consola.\n"
-                "Puede instalarlo con: sudo apt install konsole"
-            )
-            return
+            env = self.config_manager.get_current_env(self.config_name) or {}
+        except Exception as e:
+            print(f"Error resolving environment: {e}")
+            env = {}
+        self.signals.resolved.emit(self.request_id, self.config_name, env)
 
-        for idx, (item_path, item_type) in enumerate(zip(self.items, self.item_types)):
-            if not self._is_running:
-                break
+class VerbCatalogSignals(QObject):
+    """Señales de la carga del catálogo de verbos"""
+    loaded = pyqtSignal(object)
 
-            display_name = Path(item_path).name if item_type == "exe" else item_path
-            self.progress.emit(idx, f"{display_name}: Instalando...")
-            
-            try:
-                if item_type == "exe":
-                    exe_path = Path(item_path)
-                    if not exe_path.exists():
-                        raise FileNotFoundError(f"El archivo no existe:\n{exe_path}")
-                    
-                    wine_binary = self.env.get("WINE", "wine")
-                    if "PROTON_DIR" in self.env:
-                        proton_dir = Path(self.env["PROTON_DIR"])
-                        wine_binary = str(proton_dir / "files" / "bin" / "wine")
-                    
-                    cmd = [
-                        "konsole",
-                        "--noclose",
-                        "-e",
-                        wine_binary,
-                        str(exe_path.absolute())
-                    ]
-                else:
-                    cmd = [
-                        "konsole",
-                        "--hold",
-                        "-e",
-                        self.winetricks_path,
-                        "--force",
-                        item_path
-                    ]
-                    if self.silent_mode:
-                        cmd.insert(-1, "-q")
-                
-                result = subprocess.run(
-                    cmd,
-                    env=self.env,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
+class VerbCatalogLoader(QRunnable):
+    """Carga el catálogo de verbos (winetricks list-all) fuera del hilo de la GUI"""
+    def __init__(self, config_manager):
+        super().__init__()
+        self.config_manager = config_manager
+        self.signals = VerbCatalogSignals()
 
-                if result.returncode != 0:
-                    error_msg = result.stderr if result.stderr else result.stdout
-                    raise subprocess.CalledProcessError(
-                        result.returncode, cmd, error_msg
-                    )
+    def run(self):
+        try:
+            catalog = self.config_manager.get_verb_catalog()
+        except Exception as e:
+            print(f"Error loading verb catalog: {e}")
+            catalog = None
+        self.signals.loaded.emit(catalog)
 
-                self.progress.emit(idx, f"{display_name}: Finalizado ✅")
-            except Exception as e:
-                self.error.emit(f"Error instalando {display_name}:\n{str(e)}")
-                break
+class ConfigProbeSignals(QObject):
+    """Señales de la comprobación de configuraciones"""
+    finished = pyqtSignal(int, str, object)
 
-        self.finished.emit()
+class ConfigProbe(QRunnable):
+    """Comprueba una configuración en un hilo del pool"""
+    def __init__(self, config_manager, config_name, generation):
+        super().__init__()
+        self.config_manager = config_manager
+        self.config_name = config_name
+        self.generation = generation
+        self.signals = ConfigProbeSignals()
 
-    def stop(self):
-        self._is_running = False
+    def run(self):
+        result = self.config_manager.probe_config(self.config_name)
+        self.signals.finished.emit(self.generation, self.config_name, result)
+
+class TemplateTaskSignals(QObject):
+    """Señales de las operaciones con plantillas de prefix"""
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+class TemplateTask(QRunnable):
+    """Copia o clona un prefix plantilla fuera del hilo de la GUI"""
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.signals = TemplateTaskSignals()
+
+    def run(self):
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
 
 class ConfigDialog(QDialog):
     config_saved = pyqtSignal()
@@ -557,21 +541,18 @@ class ConfigDialog(QDialog):
     def __init__(self, config_manager, parent=None):
         super().__init__(parent)
         self.config_manager = config_manager
+        self._env_request_id = 0
+        self._probe_generation = 0
+        self._config_rows = {}
+        self._template_task = None
+        self._init_threads = []
+        self.probe_pool = QThreadPool(self)
+        self.probe_pool.setMaxThreadCount(max(2, os.cpu_count() or 1))
         self.setWindowTitle("Configuración de Entornos")
         self.setMinimumSize(800, 600)
         self.setup_ui()
         self.load_configs()
-        self.apply_kde_style()
-
-    def apply_kde_style(self):
-        self.setFont(KDE_STYLE["font"])
-        for widget in self.findChildren(QWidget):
-            if isinstance(widget, (QPushButton, QLabel, QComboBox, QLineEdit)):
-                widget.setFont(KDE_STYLE["font"])
-            if isinstance(widget, QGroupBox):
-                widget.setFont(KDE_STYLE["title_font"])
-            if isinstance(widget, QPushButton):
-                widget.setStyleSheet(KDE_STYLE["button_style"])
+        self.load_templates()
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -598,7 +579,17 @@ class ConfigDialog(QDialog):
 
     def setup_current_config_tab(self):
         layout = QVBoxLayout()
-        self.config_list = QListWidget()
+        self.config_list = QTableWidget()
+        self.config_list.setColumnCount(4)
+        self.config_list.setHorizontalHeaderLabels(["Nombre", "Versión", "Latencia", "Estado"])
+        self.config_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.config_list.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.config_list.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        self.config_list.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        self.config_list.verticalHeader().setVisible(False)
+        self.config_list.setSelectionBehavior(QTableWidget.SelectRows)
+        self.config_list.setSelectionMode(QTableWidget.SingleSelection)
+        self.config_list.setEditTriggers(QTableWidget.NoEditTriggers)
         self.config_list.itemDoubleClicked.connect(self.edit_config)
         self.config_list.itemSelectionChanged.connect(self.update_config_info)
         layout.addWidget(self.config_list)
@@ -614,6 +605,21 @@ class ConfigDialog(QDialog):
         self.set_default_btn.clicked.connect(self.set_default_config)
         btn_layout.addWidget(self.set_default_btn)
 
+        self.probe_all_btn = QPushButton("Comprobar Todas")
+        self.probe_all_btn.setAutoDefault(False)
+        self.probe_all_btn.clicked.connect(self.probe_all_configs)
+        btn_layout.addWidget(self.probe_all_btn)
+
+        self.init_prefixes_btn = QPushButton("Inicializar Prefixes")
+        self.init_prefixes_btn.setAutoDefault(False)
+        self.init_prefixes_btn.clicked.connect(self.initialize_missing_prefixes)
+        btn_layout.addWidget(self.init_prefixes_btn)
+
+        self.template_btn = QPushButton("Guardar como Plantilla")
+        self.template_btn.setAutoDefault(False)
+        self.template_btn.clicked.connect(self.save_as_template)
+        btn_layout.addWidget(self.template_btn)
+
         layout.addLayout(btn_layout)
 
         self.config_info = QLabel("Selecciona una configuración para ver detalles")
@@ -624,6 +630,10 @@ class ConfigDialog(QDialog):
     def setup_new_config_tab(self):
         layout = QFormLayout()
 
+        self.template_combo = QComboBox()
+        self.template_combo.currentIndexChanged.connect(self.update_config_fields)
+        layout.addRow("Plantilla:", self.template_combo)
+
         self.config_type = QComboBox()
         self.config_type.addItems(["Wine", "Proton"])
         self.config_type.currentTextChanged.connect(self.update_config_fields)
@@ -687,6 +697,7 @@ class ConfigDialog(QDialog):
         self.update_config_fields()
         self.new_tab.setLayout(layout)
 
+    @TRACER.traced()
     def save_new_config(self):
         try:
             config_name = self.config_name.text().strip()
@@ -694,6 +705,11 @@ class ConfigDialog(QDialog):
                 QMessageBox.warning(self, "Error", "Debes especificar un nombre para la configuración")
                 return
 
+            template_name = self.template_combo.currentData()
+            if template_name:
+                self.create_from_template(template_name, config_name)
+                return
+
             config_type = "wine" if self.config_type.currentText() == "Wine" else "proton"
             arch = self.arch_combo.currentText()
             prefix = self.prefix_path.text().strip()
@@ -725,6 +741,15 @@ class ConfigDialog(QDialog):
             
             self.load_configs()
             self.config_saved.emit()
+
+            if not InstallEngine.prefix_initialized(prefix):
+                reply = QMessageBox.question(
+                    self, "Inicializar prefix",
+                    f"El prefix {prefix} no está inicializado. ¿Deseas inicializarlo ahora en segundo plano?",
+                    QMessageBox.Yes | QMessageBox.No
+                )
+                if reply == QMessageBox.Yes:
+                    self.initialize_prefixes([config_name])
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al guardar: {str(e)}")
@@ -747,12 +772,18 @@ class ConfigDialog(QDialog):
         self.theme_combo.setCurrentText("Oscuro" if current_theme == "dark" else "Claro")
         layout.addRow("Tema de la interfaz:", self.theme_combo)
 
+        self.storage_combo = QComboBox()
+        self.storage_combo.addItems(["JSON", "SQLite"])
+        self.storage_combo.setCurrentText("SQLite" if self.config_manager.get_storage_backend() == "sqlite" else "JSON")
+        layout.addRow("Almacenamiento:", self.storage_combo)
+
         self.save_settings_btn = QPushButton("Guardar Ajustes")
         self.save_settings_btn.setAutoDefault(False)
         self.save_settings_btn.clicked.connect(self.save_settings)
         layout.addWidget(self.save_settings_btn)
         self.settings_tab.setLayout(layout)
         
+    @TRACER.traced()
     def save_settings(self):
         try:
             winetricks_path = self.winetricks_path.text().strip()
@@ -760,11 +791,19 @@ class ConfigDialog(QDialog):
                 self.config_manager.set_winetricks_path(winetricks_path)
             
             theme = "dark" if self.theme_combo.currentText() == "Oscuro" else "light"
-            self.config_manager.set_theme(theme)
+            # La ventana principal aplica el tema al momento, sin reiniciar
+            if hasattr(self.parent(), "set_theme"):
+                self.parent().set_theme(theme)
+            else:
+                self.config_manager.set_theme(theme)
+
+            storage = "sqlite" if self.storage_combo.currentText() == "SQLite" else "json"
+            self.config_manager.set_storage_backend(storage)
             QMessageBox.information(self, "Guardado", "Ajustes guardados correctamente")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al guardar ajustes: {str(e)}")
 
+    @TRACER.traced()
     def browse_winetricks(self):
         dialog = QFileDialog(self)
         dialog.setOption(QFileDialog.DontUseNativeDialog) 
@@ -772,8 +811,6 @@ class ConfigDialog(QDialog):
         dialog.setNameFilter("Todos los archivos (*)")
         dialog.setFilter(QDir.AllEntries | QDir.Hidden | QDir.NoDotAndDotDot)
         
-        self.apply_theme_to_dialog(dialog)
-        
         if dialog.exec_():
             selected = dialog.selectedFiles()
             if selected:
@@ -781,12 +818,73 @@ class ConfigDialog(QDialog):
                 self.config_manager.set_winetricks_path(selected[0])
 
     def load_configs(self):
-        self.config_list.clear()
-        for name in self.config_manager.configs["configs"].keys():
-            self.config_list.addItem(name)
+        # Las comprobaciones en curso pertenecen a la lista anterior
+        self._probe_generation += 1
+        self.probe_pool.clear()
+
+        names = list(self.config_manager.configs["configs"].keys())
+        self._config_rows = {}
+        self.config_list.setRowCount(0)
+        self.config_list.setRowCount(len(names))
+        for row, name in enumerate(names):
+            self._config_rows[name] = row
+            self.config_list.setItem(row, 0, QTableWidgetItem(name))
+            for col in range(1, 4):
+                self.config_list.setItem(row, col, QTableWidgetItem(""))
+
+    def selected_config_name(self):
+        row = self.config_list.currentRow()
+        if row < 0:
+            return None
+        item = self.config_list.item(row, 0)
+        return item.text() if item else None
+
+    @TRACER.traced()
+    def probe_all_configs(self):
+        """Comprueba en paralelo todas las configuraciones guardadas"""
+        self._probe_generation += 1
+        self.probe_pool.clear()
+
+        for name, row in self._config_rows.items():
+            self.config_list.item(row, 1).setText("")
+            self.config_list.item(row, 2).setText("")
+            self.config_list.item(row, 3).setText("Comprobando...")
+            self.config_list.item(row, 3).setToolTip("")
+
+            probe = ConfigProbe(self.config_manager, name, self._probe_generation)
+            probe.signals.finished.connect(self.on_probe_finished)
+            self.probe_pool.start(probe)
+
+    @TRACER.traced()
+    def on_probe_finished(self, generation, config_name, result):
+        if generation != self._probe_generation or config_name not in self._config_rows:
+            return
+
+        row = self._config_rows[config_name]
+        self.config_list.item(row, 1).setText(result["version"])
+        self.config_list.item(row, 2).setText(f"{result['latency'] * 1000:.0f} ms")
+        status_item = self.config_list.item(row, 3)
+        if result["ok"]:
+            status_item.setText("✅ Correcta")
+            status_item.setToolTip("")
+        else:
+            status_item.setText("❌ Error")
+            status_item.setToolTip(result["error"])
 
+    def done(self, result):
+        if self._template_task is not None:
+            QMessageBox.warning(self, "Plantilla", "Espera a que termine la copia del prefix")
+            return
+        if any(thread.isRunning() for thread in self._init_threads):
+            QMessageBox.warning(self, "Prefixes", "Espera a que termine la inicialización de los prefixes")
+            return
+        self._probe_generation += 1
+        self.probe_pool.clear()
+        super().done(result)
+
+    @TRACER.traced()
     def edit_config(self, item):
-        config_name = item.text()
+        config_name = self.config_list.item(item.row(), 0).text()
         config = self.config_manager.get_config(config_name)
         if not config:
             return
@@ -806,12 +904,11 @@ class ConfigDialog(QDialog):
         self.prefix_path.setText(config.get("prefix", ""))
         self.arch_combo.setCurrentText(config.get("arch", "win64"))
 
+    @TRACER.traced()
     def delete_config(self):
-        selected = self.config_list.currentItem()
-        if not selected:
+        config_name = self.selected_config_name()
+        if not config_name:
             return
-
-        config_name = selected.text()
         if config_name in ["Wine-System"]:
             QMessageBox.warning(self, "Error", "No se puede eliminar la configuración por defecto")
             return
@@ -829,32 +926,48 @@ class ConfigDialog(QDialog):
             else:
                 QMessageBox.warning(self, "Error", "No se pudo eliminar la configuración")
 
+    @TRACER.traced()
     def set_default_config(self):
-        selected = self.config_list.currentItem()
-        if not selected:
+        config_name = self.selected_config_name()
+        if not config_name:
             return
-
-        config_name = selected.text()
         self.config_manager.configs["last_used"] = config_name
         self.config_manager.save_configs()
         QMessageBox.information(self, "Éxito", f"Configuración '{config_name}' establecida como predeterminada")
         self.update_config_info()
 
+    @TRACER.traced()
     def update_config_info(self):
-        selected = self.config_list.currentItem()
-        if not selected:
+        # Invalida cualquier resolución pendiente de una selección anterior
+        self._env_request_id += 1
+
+        config_name = self.selected_config_name()
+        if not config_name:
             self.config_info.setText("Selecciona una configuración para ver detalles")
             return
 
-        config_name = selected.text()
         config = self.config_manager.get_config(config_name)
         if not config:
             self.config_info.setText("Configuración no encontrada")
             return
 
-        env = self.config_manager.get_current_env(config_name)
-        version = env.get("PROTON_VERSION") if config["type"] == "proton" else env.get("WINE_VERSION", "Desconocida")
-        wine_version_in_proton = env.get("WINE_VERSION_IN_PROTON", "Desconocida")
+        self.render_config_info(config_name, config, None)
+        EnvResolver.start(self.config_manager, config_name, self._env_request_id, self.on_env_resolved)
+
+    def on_env_resolved(self, request_id, config_name, env):
+        if request_id != self._env_request_id:
+            return
+
+        config = self.config_manager.get_config(config_name)
+        if config:
+            self.render_config_info(config_name, config, env)
+
+    def render_config_info(self, config_name, config, env):
+        if env is None:
+            version = wine_version_in_proton = "Detectando..."
+        else:
+            version = env.get("PROTON_VERSION") if config["type"] == "proton" else env.get("WINE_VERSION", "Desconocida")
+            wine_version_in_proton = env.get("WINE_VERSION_IN_PROTON", "Desconocida")
 
         info = [
             f"<b>Nombre:</b> {config_name}",
@@ -877,21 +990,145 @@ class ConfigDialog(QDialog):
 
         self.config_info.setText("<br>".join(info))
 
+    @TRACER.traced()
     def update_config_fields(self):
+        # Con plantilla, el runner y la arquitectura son los de la plantilla
+        has_template = bool(self.template_combo.currentData())
+        for widget in (self.config_type, self.arch_combo, self.wine_group, self.proton_group, self.test_btn):
+            widget.setEnabled(not has_template)
         is_proton = self.config_type.currentText() == "Proton"
         self.proton_group.setVisible(is_proton)
         self.wine_group.setVisible(not is_proton)
 
+    @TRACER.traced()
+    def initialize_missing_prefixes(self):
+        """Inicializa en paralelo todos los prefixes que aún no se han creado"""
+        busy = {job.config_name for thread in self._init_threads if thread.isRunning() for job in thread.jobs}
+        names = [
+            name for name, config in self.config_manager.configs["configs"].items()
+            if name not in busy and not InstallEngine.prefix_initialized(config["prefix"])
+        ]
+        if not names:
+            QMessageBox.information(self, "Prefixes", "Todos los prefixes están inicializados")
+            return
+        self.initialize_prefixes(names)
+
+    def initialize_prefixes(self, config_names):
+        """Lanza wineboot en segundo plano para los prefixes indicados (en paralelo)"""
+        jobs = [
+            InstallJob(name, self.config_manager.get_current_env(name, resolve_versions=False), [], [],
+                       create_prefix=True)
+            for name in config_names
+        ]
+        thread = InstallerThread(jobs, log_dir=self.config_manager.get_log_dir())
+        thread.prefix_progress.connect(self.on_prefix_progress)
+        thread.error.connect(lambda message: QMessageBox.critical(self, "Error", message))
+        # Conservamos la referencia hasta que el hilo termine de verdad
+        self._init_threads = [t for t in self._init_threads if t.isRunning()]
+        self._init_threads.append(thread)
+        for name in config_names:
+            self.on_prefix_progress(name, "En cola...")
+        thread.start()
+
+    @TRACER.traced()
+    def on_prefix_progress(self, config_name, message):
+        row = self._config_rows.get(config_name)
+        if row is not None:
+            self.config_list.item(row, 3).setText(message)
+
+    def load_templates(self):
+        self.template_combo.blockSignals(True)
+        self.template_combo.clear()
+        self.template_combo.addItem("Ninguna (prefix nuevo)", None)
+        for name, template in self.config_manager.get_templates().items():
+            components = ", ".join(template.get("components", [])) or "sin componentes"
+            self.template_combo.addItem(f"{name} ({components})", name)
+        self.template_combo.blockSignals(False)
+        self.update_config_fields()
+
+    def start_template_task(self, message, on_finished, function, *args):
+        self._template_task = TemplateTask(function, *args)
+        self._template_task.signals.finished.connect(on_finished)
+        self._template_task.signals.failed.connect(self.on_template_failed)
+        self.template_btn.setEnabled(False)
+        self.save_config_btn.setEnabled(False)
+        self.config_info.setText(message)
+        QThreadPool.globalInstance().start(self._template_task)
+
+    def finish_template_task(self):
+        self._template_task = None
+        self.template_btn.setEnabled(True)
+        self.save_config_btn.setEnabled(True)
+
+    @TRACER.traced()
+    def on_template_failed(self, message):
+        self.finish_template_task()
+        self.update_config_info()
+        QMessageBox.critical(self, "Error", message)
+
+    @TRACER.traced()
+    def save_as_template(self):
+        config_name = self.selected_config_name()
+        if not config_name:
+            QMessageBox.warning(self, "Error", "Selecciona una configuración")
+            return
+
+        template_name, ok = QInputDialog.getText(
+            self, "Guardar como Plantilla", "Nombre de la plantilla:", text=config_name)
+        template_name = template_name.strip()
+        if not ok or not template_name:
+            return
+
+        self.start_template_task(
+            f"Copiando el prefix de '{config_name}' como plantilla...",
+            lambda template: self.on_template_saved(template_name, template),
+            self.config_manager.prepare_template, config_name, template_name
+        )
+
+    def on_template_saved(self, template_name, template):
+        self.finish_template_task()
+        self.config_manager.add_template(template_name, template)
+        self.load_templates()
+        self.update_config_info()
+        QMessageBox.information(self, "Plantilla", f"Plantilla '{template_name}' guardada correctamente")
+
+    def create_from_template(self, template_name, config_name):
+        if config_name in self.config_manager.configs["configs"]:
+            QMessageBox.warning(self, "Error", f"Ya existe la configuración '{config_name}'")
+            return
+
+        prefix = self.prefix_path.text().strip() or str(
+            Path(self.config_manager.get_prefix_path()).expanduser() / config_name)
+        self.start_template_task(
+            f"Clonando la plantilla '{template_name}'...",
+            lambda stats: self.on_template_cloned(template_name, config_name, prefix, stats),
+            self.config_manager.clone_template, template_name, prefix
+        )
+
+    def on_template_cloned(self, template_name, config_name, prefix, stats):
+        self.finish_template_task()
+        self.config_manager.add_config_from_template(template_name, config_name, prefix)
+        method = "reflinks" if stats["reflinked"] else "copia"
+        QMessageBox.information(
+            self, "Guardado",
+            f"Configuración '{config_name}' creada desde la plantilla '{template_name}' ({method})")
+        self.load_configs()
+        self.update_config_info()
+        self.config_saved.emit()
+
+    @TRACER.traced()
     def browse_prefix(self):
         path = self.get_directory_path()
         if path:
             self.prefix_path.setText(path)
 
+    @TRACER.traced()
     def browse_wine(self):
         path = self.get_directory_path()
         if path:
             self.wine_dir.setText(path)
 
+    @TRACER.traced()
     def browse_proton(self):
         path = self.get_directory_path()
         if path:
@@ -903,26 +1140,11 @@ class ConfigDialog(QDialog):
         dialog.setOption(QFileDialog.ShowDirsOnly, True)
         dialog.setFilter(QDir.AllEntries | QDir.Hidden | QDir.NoDotAndDotDot)
         
-        self.apply_theme_to_dialog(dialog)
-        
         if dialog.exec_() == QDialog.Accepted:
             return dialog.selectedFiles()[0]
         return None
 
-    def apply_theme_to_dialog(self, dialog):
-        theme = self.config_manager.get_theme()
-        if theme == "dark":
-            dark_palette = QPalette()
-            dark_palette.setColor(QPalette.Window, KDE_STYLE["dark_palette"]["window"])
-            dark_palette.setColor(QPalette.WindowText, KDE_STYLE["dark_palette"]["window_text"])
-            dark_palette.setColor(QPalette.Base, KDE_STYLE["dark_palette"]["base"])
-            dark_palette.setColor(QPalette.Text, KDE_STYLE["dark_palette"]["text"])
-            dark_palette.setColor(QPalette.Button, KDE_STYLE["dark_palette"]["button"])
-            dark_palette.setColor(QPalette.ButtonText, KDE_STYLE["dark_palette"]["button_text"])
-            dark_palette.setColor(QPalette.Highlight, KDE_STYLE["dark_palette"]["highlight"])
-            dark_palette.setColor(QPalette.HighlightedText, KDE_STYLE["dark_palette"]["highlight_text"])
-            dialog.setPalette(dark_palette)
-
+    @TRACER.traced()
     def test_configuration(self):
         try:
             env = self.prepare_test_env()
@@ -939,7 +1161,7 @@ class ConfigDialog(QDialog):
                     wine_bin = "wine"
                 cmd = [wine_bin, "--version"]
 
-            result = subprocess.run(
+            result = run_process(
                 cmd,
                 env=env,
                 capture_output=True,
@@ -998,97 +1220,211 @@ class ConfigDialog(QDialog):
 
         return env
 
+class ComponentModel(QAbstractItemModel):
+    """Árbol de dos niveles (grupo -> componente) sin un objeto por fila
+
+    La vista solo pide los datos de las filas visibles y el estado de las
+    casillas se guarda en un conjunto de verbos seleccionados.
+    """
+    GROUP_ID = 0
+    HEADERS = ("Componente", "Descripción")
+    DEFAULT_DESCRIPTION = "Componente Winetricks estándar"
+
+    def __init__(self, component_groups, descriptions, parent=None):
+        super().__init__(parent)
+        self.groups = [(name, list(components)) for name, components in component_groups.items()]
+        self.descriptions = descriptions
+        self.selected = set()
+        # Posición de cada verbo en el catálogo, para devolver la selección en orden
+        self.order = {}
+        for _, components in self.groups:
+            for comp in components:
+                self.order.setdefault(comp, len(self.order))
+
+    def entries(self):
+        return [(comp, self.description(comp)) for comp in self.order]
+
+    def description(self, comp):
+        return self.descriptions.get(comp, self.DEFAULT_DESCRIPTION)
+
+    def verb(self, index):
+        """Verbo de un índice de componente (None para los grupos)"""
+        if not index.isValid() or index.internalId() == self.GROUP_ID:
+            return None
+        return self.groups[index.internalId() - 1][1][index.row()]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, self.GROUP_ID)
+        # El id interno de un componente es el número de su grupo + 1
+        return self.createIndex(row, column, parent.row() + 1)
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == self.GROUP_ID:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, self.GROUP_ID)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.groups)
+        if parent.internalId() == self.GROUP_ID and parent.column() == 0:
+            return len(self.groups[parent.row()][1])
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def group_state(self, row):
+        components = self.groups[row][1]
+        checked = sum(1 for comp in components if comp in self.selected)
+        if checked == 0:
+            return Qt.Unchecked
+        if checked == len(components):
+            return Qt.Checked
+        return Qt.PartiallyChecked
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        comp = self.verb(index)
+        if role == Qt.DisplayRole:
+            if comp is None:
+                name, components = self.groups[index.row()]
+                return name if index.column() == 0 else f"{len(components)} componentes"
+            return comp if index.column() == 0 else self.description(comp)
+        if role == Qt.CheckStateRole and index.column() == 0:
+            if comp is None:
+                return self.group_state(index.row())
+            return Qt.Checked if comp in self.selected else Qt.Unchecked
+        if role == Qt.ToolTipRole and comp is not None:
+            return self.description(comp)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid() or index.column() != 0:
+            return False
+
+        comp = self.verb(index)
+        components = [comp] if comp is not None else self.groups[index.row()][1]
+        self.set_checked(components, value == Qt.Checked)
+        return True
+
+    def set_checked(self, components, checked):
+        if checked:
+            self.selected.update(components)
+        else:
+            self.selected.difference_update(components)
+
+        # Un verbo puede estar en varios grupos: refrescamos las casillas de todos
+        last = self.index(len(self.groups) - 1, 0)
+        self.dataChanged.emit(self.index(0, 0), last, [Qt.CheckStateRole])
+        for row, (_, group_components) in enumerate(self.groups):
+            if group_components:
+                parent = self.index(row, 0)
+                self.dataChanged.emit(
+                    self.index(0, 0, parent),
+                    self.index(len(group_components) - 1, 0, parent),
+                    [Qt.CheckStateRole]
+                )
+
+    def selected_components(self):
+        return sorted(self.selected, key=self.order.get)
+
+class ComponentFilterProxy(QSortFilterProxyModel):
+    """Filtra el árbol de componentes con el resultado de un VerbSearchIndex
+
+    Los grupos se muestran si contienen alguna coincidencia, y dentro de cada
+    grupo las coincidencias por prefijo aparecen antes que las de subcadena.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.matches = None
+        self.groups = set()
+
+    def set_matches(self, matches):
+        """Aplica el resultado de una búsqueda (None muestra todo el catálogo)"""
+        self.matches = matches
+        source = self.sourceModel()
+        self.groups = set()
+        if matches is not None:
+            for row, (_, components) in enumerate(source.groups):
+                if any(comp in matches for comp in components):
+                    self.groups.add(row)
+        self.invalidate()
+
+    def setData(self, index, value, role=Qt.EditRole):
+        # Con un filtro activo, la casilla de un grupo solo afecta a lo que se ve
+        if role == Qt.CheckStateRole and self.matches is not None and not index.parent().isValid():
+            source = self.sourceModel()
+            components = source.groups[self.mapToSource(index).row()][1]
+            source.set_checked([comp for comp in components if comp in self.matches], value == Qt.Checked)
+            return True
+        return super().setData(index, value, role)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.matches is None:
+            return True
+        if not source_parent.isValid():
+            return source_row in self.groups
+        comp = self.sourceModel().groups[source_parent.row()][1][source_row]
+        return comp in self.matches
+
+    def lessThan(self, left, right):
+        if self.matches is None or not left.parent().isValid():
+            return left.row() < right.row()
+        source = self.sourceModel()
+        left_rank = self.matches.get(source.verb(left), VerbSearchIndex.SUBSTRING)
+        right_rank = self.matches.get(source.verb(right), VerbSearchIndex.SUBSTRING)
+        return (left_rank, left.row()) < (right_rank, right.row())
+
 class SelectGroupsDialog(QDialog):
-    def __init__(self, component_groups, parent=None):
+    def __init__(self, component_groups, descriptions=None, parent=None):
         super().__init__(parent)
         self.component_groups = component_groups
+        self.descriptions = descriptions or {}
         self.setWindowTitle("Seleccionar Componentes")
         self.setMinimumSize(450, 350)
         self.setup_ui()
-        self.apply_kde_style()
-
-    def apply_kde_style(self):
-        self.setFont(KDE_STYLE["font"])
-        
-        theme = self.parent().config_manager.get_theme() if hasattr(self.parent(), 'config_manager') else 'light'
-        
-        if theme == 'dark':
-            self.tree.setStyleSheet("""
-                QTreeWidget {
-                    background-color: #31363b;
-                    color: white;
-                }
-                QTreeWidget::item {
-                    padding: 6px;
-                }
-                QTreeWidget::item:selected {
-                    background-color: #3daee9;
-                    color: white;
-                }
-                QTreeWidget::indicator {
-                    width: 16px;
-                    height: 16px;
-                    border: 1px solid #76797C;
-                    background: #ffffff;
-                }
-                QTreeWidget::indicator:unchecked {
-                    background: #ffffff;
-                    image: none;
-                }
-                QTreeWidget::indicator:checked {
-                    background: #ffffff;
-                    image: url("icons/check-black.svg");
-                }
-            """)
-        else:
-            self.tree.setStyleSheet("")
-        
-        for widget in self.findChildren(QWidget):
-            if isinstance(widget, (QPushButton, QLabel, QComboBox, QLineEdit)):
-                widget.setFont(KDE_STYLE["font"])
-            if isinstance(widget, QGroupBox):
-                widget.setFont(KDE_STYLE["title_font"])
-            if isinstance(widget, QPushButton):
-                widget.setStyleSheet(KDE_STYLE["button_style"])
 
     def setup_ui(self):
         layout = QVBoxLayout()
-        
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["Componente", "Descripción"])
-        self.tree.setColumnCount(2)
-        self.tree.setSelectionMode(QTreeWidget.MultiSelection)
-        
-        self.component_descriptions = {
-            "vb2run": "Visual Basic 2.0 Runtime",
-            "vb3run": "Visual Basic 3.0 Runtime",
-            "vb4run": "Visual Basic 4.0 Runtime",
-            "vb5run": "Visual Basic 5.0 Runtime",
-            "vb6run": "Visual Basic 6.0 Runtime",
-            "vcrun6": "Visual C++ 6.0 Runtime (SP6 recomendado)",
-            "vcrun2005": "Visual C++ 2005 Runtime",
-            "vcrun2008": "Visual C++ 2008 Runtime",
-            "dotnet40": "Microsoft .NET Framework 4.0",
-            "dotnet48": "Microsoft .NET Framework 4.8",
-        }
-        
-        for group_name, components in self.component_groups.items():
-            group_item = QTreeWidgetItem(self.tree)
-            group_item.setText(0, group_name)
-            group_item.setFlags(group_item.flags() | Qt.ItemIsTristate | Qt.ItemIsUserCheckable)
-            
-            for comp in components:
-                child_item = QTreeWidgetItem(group_item)
-                child_item.setText(0, comp)
-                child_item.setFlags(child_item.flags() | Qt.ItemIsUserCheckable)
-                child_item.setCheckState(0, Qt.Unchecked)
-                
-                description = self.component_descriptions.get(comp, "Componente Winetricks estándar")
-                child_item.setText(1, description)
-        
-        self.tree.expandAll()
-        self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Buscar componente...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.filter_components)
+        layout.addWidget(self.search_edit)
+
+        self.component_descriptions = dict(DEFAULT_COMPONENT_DESCRIPTIONS, **self.descriptions)
+        self.model = ComponentModel(self.component_groups, self.component_descriptions, self)
+        self.search_index = VerbSearchIndex(self.model.entries())
+        self.proxy = ComponentFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.sort(0)
+
+        self.tree = QTreeView()
+        self.tree.setModel(self.proxy)
+        self.tree.setSelectionMode(QTreeView.MultiSelection)
+        # Filas de altura fija: la vista no tiene que medir cada componente
+        self.tree.setUniformRowHeights(True)
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Interactive)
         self.tree.header().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.tree.setColumnWidth(0, 220)
         layout.addWidget(self.tree)
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -1099,33 +1435,24 @@ class SelectGroupsDialog(QDialog):
 
         self.setLayout(layout)
 
+    @TRACER.traced()
+    def filter_components(self, text):
+        matches = self.search_index.search(text)
+        self.proxy.set_matches(matches)
+        if matches is None:
+            self.tree.collapseAll()
+        else:
+            # Solo se despliegan los grupos con coincidencias
+            self.tree.expandAll()
+
     def get_selected_components(self):
-        selected = []
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            group_item = root.child(i)
-            for j in range(group_item.childCount()):
-                child_item = group_item.child(j)
-                if child_item.checkState(0) == Qt.Checked:
-                    selected.append(child_item.text(0))
-        return selected
+        return self.model.selected_components()
 
 class CustomProgramDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Añadir Programa Personalizado")
         self.setup_ui()
-        self.apply_kde_style()
-
-    def apply_kde_style(self):
-        self.setFont(KDE_STYLE["font"])
-        for widget in self.findChildren(QWidget):
-            if isinstance(widget, (QPushButton, QLabel, QComboBox, QLineEdit)):
-                widget.setFont(KDE_STYLE["font"])
-            if isinstance(widget, QGroupBox):
-                widget.setFont(KDE_STYLE["title_font"])
-            if isinstance(widget, QPushButton):
-                widget.setStyleSheet(KDE_STYLE["button_style"])
 
     def setup_ui(self):
         layout = QFormLayout()
@@ -1150,6 +1477,7 @@ class CustomProgramDialog(QDialog):
 
         self.setLayout(layout)
 
+    @TRACER.traced()
     def browse_program(self):
         dialog = QFileDialog(self)
         dialog.setOption(QFileDialog.DontUseNativeDialog)
@@ -1197,17 +1525,6 @@ class ManageProgramsDialog(QDialog):
         self.setWindowTitle("Programas Guardados")
         self.setMinimumSize(600, 400)
         self.setup_ui()
-        self.apply_kde_style()
-
-    def apply_kde_style(self):
-        self.setFont(KDE_STYLE["font"])
-        for widget in self.findChildren(QWidget):
-            if isinstance(widget, (QPushButton, QLabel, QComboBox, QLineEdit)):
-                widget.setFont(KDE_STYLE["font"])
-            if isinstance(widget, QGroupBox):
-                widget.setFont(KDE_STYLE["title_font"])
-            if isinstance(widget, QPushButton):
-                widget.setStyleSheet(KDE_STYLE["button_style"])
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -1238,11 +1555,12 @@ class ManageProgramsDialog(QDialog):
         self.setLayout(layout)
 
     def load_programs(self):
+        self.table.setUpdatesEnabled(False)
         self.table.setRowCount(0)
-        programs = self.config_manager.get_custom_programs()
-        self.table.setRowCount(len(programs))
+        self.programs = list(self.config_manager.get_custom_programs())
+        self.table.setRowCount(len(self.programs))
         
-        for row, program in enumerate(programs):
+        for row, program in enumerate(self.programs):
             name_item = QTableWidgetItem(program['name'])
             name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)
             self.table.setItem(row, 0, name_item)
@@ -1255,14 +1573,16 @@ class ManageProgramsDialog(QDialog):
             type_item.setFlags(type_item.flags() & ~Qt.ItemIsEditable)
             self.table.setItem(row, 2, type_item)
 
+        self.table.setUpdatesEnabled(True)
+
+    @TRACER.traced()
     def delete_programs(self):
         selected_rows = set(index.row() for index in self.table.selectedIndexes())
         if not selected_rows:
             return
 
         rows_to_delete = sorted(selected_rows, reverse=True)
-        programs = self.config_manager.get_custom_programs()
-        programs_to_delete = [programs[row]['name'] for row in rows_to_delete]
+        programs_to_delete = [self.programs[row]['name'] for row in rows_to_delete]
 
         reply = QMessageBox.question(
             self, "Confirmar",
@@ -1271,11 +1591,8 @@ class ManageProgramsDialog(QDialog):
         )
 
         if reply == QMessageBox.Yes:
-            success = True
-            for program_name in programs_to_delete:
-                if not self.config_manager.remove_custom_program(program_name):
-                    success = False
-            if success:
+            removed = self.config_manager.remove_custom_programs(programs_to_delete)
+            if removed >= len(set(programs_to_delete)):
                 self.load_programs()
                 QMessageBox.information(self, "Éxito", "Programas eliminados correctamente")
             else:
@@ -1288,17 +1605,6 @@ class LoadProgramsDialog(QDialog):
         self.setWindowTitle("Cargar Programas Guardados")
         self.setMinimumSize(600, 400)
         self.setup_ui()
-        self.apply_kde_style()
-
-    def apply_kde_style(self):
-        self.setFont(KDE_STYLE["font"])
-        for widget in self.findChildren(QWidget):
-            if isinstance(widget, (QPushButton, QLabel, QComboBox, QLineEdit)):
-                widget.setFont(KDE_STYLE["font"])
-            if isinstance(widget, QGroupBox):
-                widget.setFont(KDE_STYLE["title_font"])
-            if isinstance(widget, QPushButton):
-                widget.setStyleSheet(KDE_STYLE["button_style"])
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -1329,11 +1635,12 @@ class LoadProgramsDialog(QDialog):
         self.setLayout(layout)
 
     def load_programs(self):
+        self.table.setUpdatesEnabled(False)
         self.table.setRowCount(0)
-        programs = self.config_manager.get_custom_programs()
-        self.table.setRowCount(len(programs))
+        self.programs = list(self.config_manager.get_custom_programs())
+        self.table.setRowCount(len(self.programs))
         
-        for row, program in enumerate(programs):
+        for row, program in enumerate(self.programs):
             name_item = QTableWidgetItem(program['name'])
             name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)
             self.table.setItem(row, 0, name_item)
@@ -1353,6 +1660,9 @@ class LoadProgramsDialog(QDialog):
             checkbox.setTextAlignment(Qt.AlignCenter)
             self.table.setItem(row, 3, checkbox)
 
+        self.table.setUpdatesEnabled(True)
+
+    @TRACER.traced()
     def load_selected(self):
         selected_rows = []
         for row in range(self.table.rowCount()):
@@ -1363,36 +1673,157 @@ class LoadProgramsDialog(QDialog):
             QMessageBox.warning(self, "Advertencia", "No hay programas seleccionados")
             return
 
-        programs = self.config_manager.get_custom_programs()
-        self.selected_programs = [programs[row] for row in selected_rows]
+        self.selected_programs = [self.programs[row] for row in selected_rows]
         self.accept()
 
     def get_selected_programs(self):
         return getattr(self, 'selected_programs', [])
 
+class InstallQueueModel(QAbstractTableModel):
+    """Cola de instalación (InstallQueue) expuesta a la tabla de la ventana principal
+
+    Las señales del instalador identifican los items por su id, así que los
+    cambios de estado se aplican en O(1) aunque la cola se haya reordenado.
+    """
+    HEADERS = ("", "Nombre", "Tipo", "Estado", "Configuración")
+    TYPE_NAMES = {"exe": "EXE", "winetricks": "Winetricks"}
+    STATUS_COLUMN = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = InstallQueue()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.queue)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.queue[index.row()]
+        column = index.column()
+        if role == Qt.CheckStateRole and column == 0:
+            return Qt.Checked if item.checked else Qt.Unchecked
+        if role == Qt.DisplayRole:
+            if column == 1:
+                return item.name
+            if column == 2:
+                return self.TYPE_NAMES.get(item.item_type, item.item_type)
+            if column == 3:
+                return item.status
+            if column == 4:
+                return item.config_name
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid() or index.column() != 0:
+            return False
+        self.queue[index.row()].checked = value == Qt.Checked
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def add(self, name, item_type, target=None, config_name=None, status="Pendiente", reinstall=False,
+            program_id=None):
+        row = len(self.queue)
+        self.beginInsertRows(QModelIndex(), row, row)
+        item = self.queue.add(name, item_type, target, config_name, status, reinstall, program_id)
+        self.endInsertRows()
+        return item
+
+    def item(self, item_id):
+        return self.queue.get(item_id)
+
+    def set_status(self, item_id, status):
+        row = self.queue.row(item_id)
+        if row is None:
+            return  # El item se quitó de la cola mientras se instalaba
+        self.queue[row].status = status
+        index = self.index(row, self.STATUS_COLUMN)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def remove_rows(self, rows):
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        # Un aviso a la vista por cada bloque de filas contiguas, de abajo arriba
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self.queue.remove_rows(range(first, last + 1))
+            self.endRemoveRows()
+
+    def move_row(self, row, target):
+        """Intercambia una fila con la contigua (target = row ± 1)"""
+        if row == target or not (0 <= row < len(self.queue) and 0 <= target < len(self.queue)):
+            return False
+        destination = target + 1 if target > row else target
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+        self.queue.swap(row, target)
+        self.endMoveRows()
+        return True
+
+    def clear(self):
+        self.beginResetModel()
+        self.queue.clear()
+        self.endResetModel()
+
 class InstallerApp(QWidget):
     def __init__(self, config_manager):
         super().__init__()
         self.config_manager = config_manager
         self.installer_thread = None
-        self.selected_components = []
-        self.custom_programs = []
-        self.custom_program_types = []
+        self._install_failed = False
+        self._install_cancelled = False
+        self._job_items = {}
+        self._output_buffer = []
+
+        # Agrupa las líneas de salida para no repintar el panel por cada una
+        self.output_timer = QTimer(self)
+        self.output_timer.setInterval(100)
+        self.output_timer.timeout.connect(self.flush_output)
+        self._env_request_id = 0
+
+        # Agrupa las escrituras de config.json en una sola por ráfaga de cambios
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(ConfigManager.SAVE_DEBOUNCE_MS)
+        self.save_timer.timeout.connect(self.config_manager.flush)
+        self.config_manager.schedule_save = self.save_timer.start
+        self.queue_model = InstallQueueModel(self)
         self.silent_mode = False
+        self._catalog_loader = None
 
+        self.theme_engine = ThemeEngine()
         self.setup_ui()
         self.apply_theme()
-        self.apply_kde_style()
-
-    def apply_kde_style(self):
-        self.setFont(KDE_STYLE["font"])
-        for widget in self.findChildren(QWidget):
-            if isinstance(widget, (QPushButton, QLabel, QComboBox, QLineEdit)):
-                widget.setFont(KDE_STYLE["font"])
-            if isinstance(widget, QGroupBox):
-                widget.setFont(KDE_STYLE["title_font"])
-            if isinstance(widget, QPushButton):
-                widget.setStyleSheet(KDE_STYLE["button_style"])
+
+    @TRACER.traced()
+    def start_deferred_tasks(self):
+        """Tareas que esperan a que la ventana ya esté visible"""
+        # Detección de la versión del runner de la configuración actual
+        self.update_config_label()
+        # El catálogo se prepara en segundo plano para que el selector abra al instante
+        self.refresh_verb_catalog()
 
     def setup_ui(self):
         self.setWindowTitle("WineProton Manager")
@@ -1418,7 +1849,8 @@ class InstallerApp(QWidget):
         config_layout = QVBoxLayout()
         self.config_label = QLabel()
         self.config_label.setWordWrap(True)
-        self.update_config_label()
+        # La versión se detecta cuando la ventana ya se muestra (start_deferred_tasks)
+        self.update_config_label(probe=False)
         
         self.config_btn = QPushButton("Configurar Entornos...")
         self.config_btn.setAutoDefault(False)
@@ -1463,6 +1895,10 @@ class InstallerApp(QWidget):
         options_layout = QVBoxLayout()
         self.silent_checkbox = QCheckBox("Modo silencioso (solo para winetricks)")
         options_layout.addWidget(self.silent_checkbox)
+        self.terminal_checkbox = QCheckBox("Abrir cada instalación en Konsole")
+        self.terminal_checkbox.setChecked(self.config_manager.get_use_terminal())
+        self.terminal_checkbox.toggled.connect(self.config_manager.set_use_terminal)
+        options_layout.addWidget(self.terminal_checkbox)
         options_group.setLayout(options_layout)
         action_layout.addWidget(options_group)
         
@@ -1506,14 +1942,14 @@ class InstallerApp(QWidget):
         self.status_label = QLabel("Items a instalar:")
         layout.addWidget(self.status_label)
         
-        self.items_table = QTableWidget()
-        self.items_table.setColumnCount(4)
-        self.items_table.setHorizontalHeaderLabels(["", "Nombre", "Tipo", "Estado"])
+        self.items_table = QTableView()
+        self.items_table.setModel(self.queue_model)
         self.items_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.items_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
         self.items_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        self.items_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
         self.items_table.verticalHeader().setVisible(False)
-        self.items_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.items_table.setSelectionBehavior(QTableView.SelectRows)
         layout.addWidget(self.items_table)
         
         btn_layout = QHBoxLayout()
@@ -1531,43 +1967,45 @@ class InstallerApp(QWidget):
             btn_layout.addWidget(btn)
         
         layout.addLayout(btn_layout)
+
+        layout.addWidget(QLabel("Salida de la instalación:"))
+        self.output_view = QPlainTextEdit()
+        self.output_view.setReadOnly(True)
+        self.output_view.setMaximumBlockCount(5000)
+        self.output_view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        layout.addWidget(self.output_view)
         return panel
 
     def apply_theme(self):
-        theme = self.config_manager.get_theme()
-        palette = QApplication.palette()
-        
-        if theme == "dark":
-            palette.setColor(QPalette.Window, KDE_STYLE["dark_palette"]["window"])
-            palette.setColor(QPalette.WindowText, KDE_STYLE["dark_palette"]["window_text"])
-            palette.setColor(QPalette.Base, KDE_STYLE["dark_palette"]["base"])
-            palette.setColor(QPalette.Text, KDE_STYLE["dark_palette"]["text"])
-            palette.setColor(QPalette.Button, KDE_STYLE["dark_palette"]["button"])
-            palette.setColor(QPalette.ButtonText, KDE_STYLE["dark_palette"]["button_text"])
-            palette.setColor(QPalette.Highlight, KDE_STYLE["dark_palette"]["highlight"])
-            palette.setColor(QPalette.HighlightedText, KDE_STYLE["dark_palette"]["highlight_text"])
-        else:
-            palette = QApplication.style().standardPalette()
-        
-        QApplication.setPalette(palette)
-        for widget in QApplication.allWidgets():
-            widget.update()
+        self.theme_engine.apply(self.config_manager.get_theme())
 
     def set_theme(self, theme):
         self.config_manager.set_theme(theme)
         self.apply_theme()
 
     def closeEvent(self, event):
+        if self.installer_thread and self.installer_thread.isRunning():
+            self._install_cancelled = True
+            self.installer_thread.stop(wait=True)
+            self.installer_thread.wait()
         self.config_manager.save_window_size(self.size())
+        self.save_timer.stop()
+        self.config_manager.schedule_save = None
+        self.config_manager.flush()
         super().closeEvent(event)
 
+    @TRACER.traced()
     def configure_environments(self):
         dialog = ConfigDialog(self.config_manager, self)
         dialog.config_saved.connect(self.update_config_label)
         dialog.exec_()
         self.update_config_label()
 
-    def update_config_label(self):
+    @TRACER.traced()
+    def update_config_label(self, probe=True):
+        # Invalida cualquier resolución pendiente de una configuración anterior
+        self._env_request_id += 1
+
         current = self.config_manager.configs["last_used"]
         config = self.config_manager.get_config(current)
 
@@ -1575,9 +2013,24 @@ class InstallerApp(QWidget):
             self.config_label.setText("No hay configuración seleccionada")
             return
 
-        env = self.config_manager.get_current_env(current)
-        version = env.get("PROTON_VERSION") if config.get("type") == "proton" else env.get("WINE_VERSION", "Desconocida")
-        wine_version_in_proton = env.get("WINE_VERSION_IN_PROTON", "Desconocida")
+        self.render_config_label(current, config, None)
+        if probe:
+            EnvResolver.start(self.config_manager, current, self._env_request_id, self.on_env_resolved)
+
+    def on_env_resolved(self, request_id, config_name, env):
+        if request_id != self._env_request_id:
+            return
+
+        config = self.config_manager.get_config(config_name)
+        if config:
+            self.render_config_label(config_name, config, env)
+
+    def render_config_label(self, current, config, env):
+        if env is None:
+            version = wine_version_in_proton = "Detectando..."
+        else:
+            version = env.get("PROTON_VERSION") if config.get("type") == "proton" else env.get("WINE_VERSION", "Desconocida")
+            wine_version_in_proton = env.get("WINE_VERSION_IN_PROTON", "Desconocida")
 
         text = [
             f"<b>Configuración actual:</b> <span style='color: #2a82da;'>{current}</span>",
@@ -1603,6 +2056,7 @@ class InstallerApp(QWidget):
 
         self.config_label.setText("<br>".join(text))
 
+    @TRACER.traced()
     def add_custom_program(self):
         dialog = CustomProgramDialog(self)
         if dialog.exec_() == QDialog.Accepted:
@@ -1612,57 +2066,23 @@ class InstallerApp(QWidget):
                 program_name = program_info["name"]
                 program_type = program_info["type"]
 
-                display_type = "EXE" if program_type == "exe" else "Winetricks"
-                
-                # Añadimos a las listas internas
-                self.custom_programs.append(program_path)
-                self.custom_program_types.append(program_type)
-                
-                # Mostramos solo el nombre en la tabla
-                self.add_item_to_table(program_name, display_type)
+                # Guardamos en la configuración
+                program_id = self.config_manager.add_custom_program(program_name, program_path, program_type)
+
+                # En la tabla se muestra solo el nombre; el item guarda la ruta
+                self.add_to_queue(program_name, program_type, program_path, program_id=program_id)
                 self.update_install_button()
                 
-                # Guardamos en la configuración - CORRECCIÓN AQUÍ
-                # Crear un diccionario con la información del programa
-                program_data = {
-                    "name": program_name,
-                    "path": program_path,
-                    "type": program_type
-                }
-                # Añadir el programa a la configuración
-                if "custom_programs" not in self.config_manager.configs:
-                    self.config_manager.configs["custom_programs"] = []
-                self.config_manager.configs["custom_programs"].append(program_data)
-                self.config_manager.save_configs()
-                
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error al añadir programa:\n{str(e)}")
             
-    def add_item_to_table(self, name, item_type, status="Pendiente"):
-        row = self.items_table.rowCount()
-        self.items_table.insertRow(row)
-        
-        # Checkbox
-        checkbox = QTableWidgetItem()
-        checkbox.setFlags(checkbox.flags() | Qt.ItemIsUserCheckable)
-        checkbox.setCheckState(Qt.Checked)
-        self.items_table.setItem(row, 0, checkbox)
-        
-        # Nombre (usamos el nombre del programa para programas personalizados)
-        name_item = QTableWidgetItem(name)
-        name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)
-        self.items_table.setItem(row, 1, name_item)
-        
-        # Tipo
-        type_item = QTableWidgetItem(item_type)
-        type_item.setFlags(type_item.flags() & ~Qt.ItemIsEditable)
-        self.items_table.setItem(row, 2, type_item)
-        
-        # Estado
-        status_item = QTableWidgetItem(status)
-        status_item.setFlags(status_item.flags() & ~Qt.ItemIsEditable)
-        self.items_table.setItem(row, 3, status_item)
+    def add_to_queue(self, name, item_type, target=None, status="Pendiente", config_name=None, reinstall=False,
+                     program_id=None):
+        """Añade un item a la cola en la configuración indicada (por defecto la actual)"""
+        config_name = config_name or self.config_manager.configs["last_used"]
+        return self.queue_model.add(name, item_type, target, config_name, status, reinstall, program_id)
     
+    @TRACER.traced()
     def load_custom_programs(self):
         dialog = LoadProgramsDialog(self.config_manager, self)
         if dialog.exec_() == QDialog.Accepted:
@@ -1670,13 +2090,14 @@ class InstallerApp(QWidget):
             
             current_config = self.config_manager.configs["last_used"]
             config = self.config_manager.get_config(current_config)
-            installed_components = []
+            installed_components = set()
             
             if config and "prefix" in config:
                 installed_components = self.config_manager.get_installed_winetricks(config["prefix"])
             
             for program in selected_programs:
-                if program["type"] == "winetricks" and program["path"] in installed_components:
+                reinstall = program["type"] == "winetricks" and program["path"] in installed_components
+                if reinstall:
                     reply = QMessageBox.question(
                         self,
                         "Componente ya instalado",
@@ -1686,103 +2107,57 @@ class InstallerApp(QWidget):
                     if reply == QMessageBox.No:
                         continue
                 
-                self.custom_programs.append(program["path"])
-                self.custom_program_types.append(program["type"])
-                display_type = "EXE" if program["type"] == "exe" else "Winetricks"
-                self.add_item_to_table(program['name'], display_type)
+                self.add_to_queue(program["name"], program["type"], program["path"], reinstall=reinstall,
+                                  program_id=program["id"])
             self.update_install_button()
 
+    @TRACER.traced()
     def manage_custom_programs(self):
         dialog = ManageProgramsDialog(self.config_manager, self)
         dialog.exec_()
 
+    def refresh_verb_catalog(self):
+        """Carga en segundo plano el catálogo de verbos de la versión instalada de winetricks"""
+        if self._catalog_loader is not None:
+            return
+        self._catalog_loader = VerbCatalogLoader(self.config_manager)
+        self._catalog_loader.signals.loaded.connect(self.on_verb_catalog_loaded)
+        QThreadPool.globalInstance().start(self._catalog_loader)
+
+    @TRACER.traced()
+    def on_verb_catalog_loaded(self, catalog):
+        self._catalog_loader = None
+
+    @TRACER.traced()
     def select_components(self):
-        component_groups = {
-            "Bibliotecas Visual Basic": ["vb2run", "vb3run", "vb4run", "vb5run", "vb6run"],
-            "Visual C++ Runtime": [
-                "vcrun6", "vcrun6sp6", "vcrun2003", "vcrun2005", "vcrun2008",
-                "vcrun2010", "vcrun2012", "vcrun2013", "vcrun2015", "vcrun2017",
-                "vcrun2019", "vcrun2022"
-            ],
-            ".NET Framework": [
-                "dotnet11", "dotnet11sp1", "dotnet20", "dotnet20sp1", "dotnet20sp2",
-                "dotnet30", "dotnet30sp1", "dotnet35", "dotnet35sp1", "dotnet40",
-                "dotnet40_kb2468871", "dotnet45", "dotnet452", "dotnet46", "dotnet461",
-                "dotnet462", "dotnet471", "dotnet472", "dotnet48", "dotnet6", "dotnet7",
-                "dotnet8", "dotnet9", "dotnetcore2", "dotnetcore3", "dotnetcoredesktop3",
-                "dotnetdesktop6", "dotnetdesktop7", "dotnetdesktop8", "dotnetdesktop9"
-            ],
-            "DirectX y Multimedia": [
-                "d3dcompiler_42", "d3dcompiler_43", "d3dcompiler_46", "d3dcompiler_47",
-                "d3dx9", "d3dx9_24", "d3dx9_25", "d3dx9_26", "d3dx9_27", "d3dx9_28",
-                "d3dx9_29", "d3dx9_30", "d3dx9_31", "d3dx9_32", "d3dx9_33", "d3dx9_34",
-                "d3dx9_35", "d3dx9_36", "d3dx9_37", "d3dx9_38", "d3dx9_39", "d3dx9_40",
-                "d3dx9_41", "d3dx9_42", "d3dx9_43", "d3dx10", "d3dx10_43", "d3dx11_42",
-                "d3dx11_43", "d3dxof", "devenum", "dinput", "dinput8", "directmusic",
-                "directplay", "directshow", "directx9", "dmband", "dmcompos", "dmime",
-                "dmloader", "dmscript", "dmstyle", "dmsynth", "dmusic", "dmusic32",
-                "dx8vb", "dxdiag", "dxdiagn", "dxdiagn_feb2010", "dxtrans", "xact",
-                "xact_x64", "xaudio29", "xinput", "xna31", "xna40"
-            ],
-            "DXVK y VKD3D": [
-                "dxvk", "dxvk1000", "dxvk1001", "dxvk1002", "dxvk1003", "dxvk1011",
-                "dxvk1020", "dxvk1021", "dxvk1022", "dxvk1023", "dxvk1030", "dxvk1031",
-                "dxvk1032", "dxvk1033", "dxvk1034", "dxvk1040", "dxvk1041", "dxvk1042",
-                "dxvk1043", "dxvk1044", "dxvk1045", "dxvk1046", "dxvk1050", "dxvk1051",
-                "dxvk1052", "dxvk1053", "dxvk1054", "dxvk1055", "dxvk1060", "dxvk1061",
-                "dxvk1070", "dxvk1071", "dxvk1072", "dxvk1073", "dxvk1080", "dxvk1081",
-                "dxvk1090", "dxvk1091", "dxvk1092", "dxvk1093", "dxvk1094", "dxvk1100",
-                "dxvk1101", "dxvk1102", "dxvk1103", "dxvk2000", "dxvk2010", "dxvk2020",
-                "dxvk2030", "dxvk2040", "dxvk2041", "dxvk2050", "dxvk2051", "dxvk2052",
-                "dxvk2053", "dxvk2060", "dxvk2061", "dxvk2062", "vkd3d"
-            ],
-            "Codecs Multimedia": [
-                "allcodecs", "avifil32", "binkw32", "cinepak", "dirac", "ffdshow",
-                "icodecs", "l3codecx", "lavfilters", "lavfilters702", "ogg", "qasf",
-                "qcap", "qdvd", "qedit", "quartz", "quartz_feb2010", "quicktime72",
-                "quicktime76", "wmp9", "wmp10", "wmp11", "wmv9vcm", "xvid"
-            ],
-            "Componentes de Sistema": [
-                "amstream", "atmlib", "cabinet", "cmd", "comctl32", "comctl32ocx",
-                "comdlg32ocx", "crypt32", "crypt32_winxp", "dbghelp", "esent", "filever",
-                "gdiplus", "gdiplus_winxp", "glidewrapper", "glut", "gmdls", "hid",
-                "jet40", "mdac27", "mdac28", "msaa", "msacm32", "msasn1", "msctf",
-                "msdelta", "msdxmocx", "msflxgrd", "msftedit", "mshflxgd", "msls31",
-                "msmask", "mspatcha", "msscript", "msvcirt", "msvcrt40", "msxml3",
-                "msxml4", "msxml6", "ole32", "oleaut32", "pdh", "pdh_nt4", "peverify",
-                "pngfilt", "prntvpt", "python26", "python27", "riched20", "riched30",
-                "richtx32", "sapi", "sdl", "secur32", "setupapi", "shockwave",
-                "speechsdk", "tabctl32", "ucrtbase2019", "uiribbon", "updspapi",
-                "urlmon", "usp10", "webio", "windowscodes", "winhttp", "wininet",
-                "wininet_win2k", "wmi", "wsh57", "xmllite"
-            ],
-            "Controladores y Utilidades": [
-                "art2k7min", "art2kmin", "cnc_ddraw", "d2gl", "d3drm", "dpvoice",
-                "dsdmo", "dsound", "dswave", "faudio", "faudio1901", "faudio1902",
-                "faudio1903", "faudio1904", "faudio1905", "faudio1906", "faudio190607",
-                "galliumnine", "galliumnine02", "galliumnine03", "galliumnine04",
-                "galliumnine05", "galliumnine06", "galliumnine07", "galliumnine08",
-                "galliumnine09", "gfw", "ie6", "ie7", "ie8", "ie8_kb2936068",
-                "ie8_tls12", "iertutil", "itircl", "itss", "mdx", "mf", "mfc40",
-                "mfc42", "mfc70", "mfc71", "mfc80", "mfc90", "mfc100", "mfc110",
-                "mfc120", "mfc140", "nuget", "openal", "otvdm", "otvdm090",
-                "physx", "powershell", "powershell_core"
-            ]
-        }
+        # Solo la caché: comprobar que sigue siendo válida no ejecuta winetricks
+        catalog = self.config_manager.get_verb_catalog(refresh=False)
+        if catalog:
+            component_groups = {
+                CATALOG_CATEGORY_NAMES.get(category, category): [verb for verb, _ in verbs]
+                for category, verbs in catalog.items()
+            }
+            descriptions = {verb: description for verbs in catalog.values() for verb, description in verbs}
+        else:
+            # Sin catálogo (winetricks no disponible todavía) usamos la lista básica
+            component_groups = DEFAULT_COMPONENT_GROUPS
+            descriptions = {}
+            self.refresh_verb_catalog()
 
-        dialog = SelectGroupsDialog(component_groups)
+        dialog = SelectGroupsDialog(component_groups, descriptions, self)
         if dialog.exec_() == QDialog.Accepted:
             selected_components = dialog.get_selected_components()
             
             current_config = self.config_manager.configs["last_used"]
             config = self.config_manager.get_config(current_config)
-            installed_components = []
+            installed_components = set()
             
             if config and "prefix" in config:
                 installed_components = self.config_manager.get_installed_winetricks(config["prefix"])
             
             for comp in selected_components:
-                if comp in installed_components:
+                reinstall = comp in installed_components
+                if reinstall:
                     reply = QMessageBox.question(
                         self,
                         "Componente ya instalado",
@@ -1792,204 +2167,240 @@ class InstallerApp(QWidget):
                     if reply == QMessageBox.No:
                         continue
                 
-                self.selected_components.append(comp)
-                self.add_item_to_table(comp, "Winetricks")
+                self.add_to_queue(comp, "winetricks", reinstall=reinstall)
             self.update_install_button()
 
+    @TRACER.traced()
     def clear_list(self):
-        self.items_table.setRowCount(0)
-        self.selected_components = []
-        self.custom_programs = []
-        self.custom_program_types = []
+        self.queue_model.clear()
         self.update_install_button()
 
-    def remove_selected(self):
-        selected_rows = set()
-        for index in self.items_table.selectedIndexes():
-            selected_rows.add(index.row())
-        
-        if not selected_rows:
-            return
+    def selected_rows(self):
+        return sorted(index.row() for index in self.items_table.selectionModel().selectedRows())
 
-        for row in sorted(selected_rows, reverse=True):
-            item_name = self.items_table.item(row, 1).text()
-            
-            if item_name in self.selected_components:
-                self.selected_components.remove(item_name)
-            else:
-                for i, prog in enumerate(self.custom_programs[:]):
-                    if item_name in prog:
-                        del self.custom_programs[i]
-                        del self.custom_program_types[i]
-                        break
-            
-            self.items_table.removeRow(row)
-        
+    @TRACER.traced()
+    def remove_selected(self):
+        self.queue_model.remove_rows(self.selected_rows())
         self.update_install_button()
 
+    @TRACER.traced()
     def move_item_up(self):
-        selected_rows = set()
-        for index in self.items_table.selectedIndexes():
-            selected_rows.add(index.row())
-        
-        if not selected_rows or len(selected_rows) > 1:
-            return
-
-        current_row = list(selected_rows)[0]
-        if current_row > 0:
-            self.swap_table_rows(current_row, current_row - 1)
-            self.items_table.selectRow(current_row - 1)
-            self._reorder_internal_lists()
+        self.move_selected_item(-1)
 
+    @TRACER.traced()
     def move_item_down(self):
-        selected_rows = set()
-        for index in self.items_table.selectedIndexes():
-            selected_rows.add(index.row())
-        
-        if not selected_rows or len(selected_rows) > 1:
+        self.move_selected_item(1)
+
+    def move_selected_item(self, offset):
+        selected_rows = self.selected_rows()
+        if len(selected_rows) != 1:
             return
 
-        current_row = list(selected_rows)[0]
-        if current_row < self.items_table.rowCount() - 1:
-            self.swap_table_rows(current_row, current_row + 1)
-            self.items_table.selectRow(current_row + 1)
-            self._reorder_internal_lists()
-
-    def swap_table_rows(self, row1, row2):
-        for col in range(self.items_table.columnCount()):
-            item1 = self.items_table.takeItem(row1, col)
-            item2 = self.items_table.takeItem(row2, col)
-            self.items_table.setItem(row2, col, item1)
-            self.items_table.setItem(row1, col, item2)
-
-    def _reorder_internal_lists(self):
-        new_selected_components = []
-        new_custom_programs = []
-        new_custom_program_types = []
-        
-        for row in range(self.items_table.rowCount()):
-            item_name = self.items_table.item(row, 1).text()
-            item_type = self.items_table.item(row, 2).text()
-            
-            if item_type == "Winetricks":
-                new_selected_components.append(item_name)
-            else:
-                for i, prog in enumerate(self.custom_programs):
-                    if item_name in prog:
-                        new_custom_programs.append(prog)
-                        new_custom_program_types.append(self.custom_program_types[i])
-                        break
-        
-        self.selected_components = new_selected_components
-        self.custom_programs = new_custom_programs
-        self.custom_program_types = new_custom_program_types
+        current_row = selected_rows[0]
+        if self.queue_model.move_row(current_row, current_row + offset):
+            self.items_table.selectRow(current_row + offset)
 
     def update_install_button(self):
-        self.install_btn.setEnabled(self.items_table.rowCount() > 0)
+        self.install_btn.setEnabled(len(self.queue_model.queue) > 0)
+
+    def ensure_prefix(self, config_name):
+        """Comprueba que exista el prefix de una configuración y ofrece crearlo
+
+        El prefix se inicializa en segundo plano al empezar la instalación.
+        """
+        config = self.config_manager.get_config(config_name)
+        if Path(config["prefix"]).exists():
+            return True
+
+        reply = QMessageBox.question(
+            self,
+            "Prefix no encontrado",
+            f"El prefix {config['prefix']} no existe. ¿Deseas crearlo?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        return reply == QMessageBox.Yes
+
+    def build_install_jobs(self, items_by_config):
+        """Crea un InstallJob por configuración con los items de la cola ({configuración: [QueueItem]})
+
+        Resuelve los programas guardados por su identificador, planifica las
+        dependencias (que se añaden a la cola) y omite lo ya instalado.
+        """
+        jobs = []
+
+        for config_name, queue_items in items_by_config.items():
+            all_items = []
+            all_types = []
+            reinstall = set()
+
+            for queue_item in queue_items:
+                target = queue_item.target
+                item_type = queue_item.item_type
+
+                # Los programas guardados se instalan con su ruta actual, aunque se editaran
+                # después de añadirlos a la cola
+                if queue_item.program_id is not None:
+                    program_info = self.config_manager.get_custom_program(queue_item.program_id)
+                    if program_info:
+                        target = program_info['path']
+                        item_type = program_info['type']
+                if item_type != "exe" and queue_item.reinstall:
+                    reinstall.add(target)
+
+                all_items.append(target)
+                all_types.append(item_type)
+                self.queue_model.set_status(queue_item.id, "Pendiente")
+
+            # Las dependencias que faltan se añaden a la cola y se omite lo ya instalado
+            plan = self.config_manager.plan_install(config_name, all_items, all_types, reinstall, use_template=True)
+            for source, reason in plan.skipped.items():
+                self.queue_model.set_status(queue_items[source].id, reason)
+            item_ids = []
+            for item, source, required_by in zip(plan.items, plan.sources, plan.required_by):
+                if source is None:
+                    item_ids.append(self.add_to_queue(
+                        item, "winetricks", status=f"Pendiente (dependencia de {required_by})",
+                        config_name=config_name).id)
+                else:
+                    item_ids.append(queue_items[source].id)
 
+            if plan.items or plan.template:
+                env = self.config_manager.get_current_env(config_name, resolve_versions=False)
+                template = plan.template and self.config_manager.get_templates()[plan.template]["path"]
+                jobs.append(InstallJob(config_name, env, plan.items, plan.item_types, item_ids, reinstall,
+                                       create_prefix=True, template=template))
+        return jobs
+
+    @TRACER.traced()
     def start_installation(self):
-        current_config = self.config_manager.configs["last_used"]
-        config = self.config_manager.get_config(current_config)
+        # Agrupamos los items de la cola por configuración: cada grupo es un trabajo
+        items_by_config = self.queue_model.queue.by_config()
 
-        if not config:
-            QMessageBox.critical(self, "Error", "No hay configuración seleccionada")
-            return
+        for config_name in items_by_config:
+            if not self.config_manager.get_config(config_name):
+                QMessageBox.critical(self, "Error", f"No existe la configuración '{config_name}'")
+                return
+            if not self.ensure_prefix(config_name):
+                return
 
-        prefix_path = Path(config["prefix"])
-        if not prefix_path.exists():
-            reply = QMessageBox.question(
-                self,
-                "Prefix no encontrado",
-                f"El prefix {config['prefix']} no existe. ¿Deseas crearlo?",
-                QMessageBox.Yes | QMessageBox.No
-            )
-            if reply == QMessageBox.Yes:
-                try:
-                    prefix_path.mkdir(parents=True, exist_ok=True, mode=0o755)
-                    env = self.config_manager.get_current_env(current_config)
-
-                    if config["type"] == "proton":
-                        proton_dir = Path(config["proton_dir"])
-                        wine_bin = str(proton_dir / "files/bin/wine")
-                    else:
-                        wine_dir = config.get("wine_dir")
-                        if wine_dir:
-                            wine_bin = str(Path(wine_dir) / "bin/wine")
-                        else:
-                            wine_bin = "wine"
-
-                    subprocess.run(
-                        ["konsole", "--noclose", "-e", wine_bin, "wineboot"],
-                        env=env,
-                        check=True
-                    )
-                except Exception as e:
-                    QMessageBox.critical(
-                        self,
-                        "Error",
-                        f"No se pudo crear el prefix: {str(e)}"
-                    )
-                    return
-            else:
+        # Konsole solo es necesario si se pide una ventana por item
+        konsole_path = None
+        if self.terminal_checkbox.isChecked():
+            konsole_path = self.config_manager.tools.which("konsole")
+            if not konsole_path:
+                QMessageBox.critical(
+                    self,
+                    "Error",
+                    "Konsole no está instalado. Es necesario para mostrar la consola.\n"
+                    "Puede instalarlo con: sudo apt install konsole"
+                )
                 return
 
-        env = self.config_manager.get_current_env(current_config)
         self.silent_mode = self.silent_checkbox.isChecked()
-        
-        all_items = []
-        all_types = []
-        
-        for row in range(self.items_table.rowCount()):
-            item_name = self.items_table.item(row, 1).text()
-            item_type = self.items_table.item(row, 2).text().lower()
-            
-            if item_type == "exe":
-                custom_programs = self.config_manager.get_custom_programs()
-                program_info = next((p for p in custom_programs if p['name'] in item_name), None)
-                if program_info:
-                    all_items.append(program_info['path'])
-                    all_types.append(program_info['type'])
-                else:
-                    all_items.append(item_name)
-                    all_types.append(item_type)
-            else:
-                all_items.append(item_name)
-                all_types.append(item_type)
-            
-            self.items_table.item(row, 3).setText("Pendiente")
-
-        if all_items:
-            self.installer_thread = InstallerThread(
-                all_items,
-                env,
-                item_types=all_types,
-                silent_mode=self.silent_mode,
-                winetricks_path=self.config_manager.get_winetricks_path()
-            )
-            self.installer_thread.progress.connect(
-                lambda idx, msg: self.items_table.item(idx, 3).setText(msg)
-            )
-            self.installer_thread.finished.connect(self.installation_finished)
-            self.installer_thread.error.connect(self.show_error)
+        jobs = self.build_install_jobs(items_by_config)
+
+        if not jobs:
+            QMessageBox.information(self, "Información", "Todos los items seleccionados ya están instalados.")
+            return
+
+        self._install_failed = False
+        self._install_cancelled = False
+        self._job_items = {job.config_name: job.item_ids for job in jobs}
+        self.installer_thread = InstallerThread(
+            jobs,
+            silent_mode=self.silent_mode,
+            winetricks_path=self.config_manager.get_winetricks_path(),
+            konsole_path=konsole_path,
+            log_dir=self.config_manager.get_log_dir(),
+            prefetch_jobs=self.config_manager.get_prefetch_jobs(),
+            force=False
+        )
+        self.installer_thread.progress.connect(self.queue_model.set_status)
+        self.installer_thread.prefix_progress.connect(self.on_prefix_progress)
+        self.installer_thread.output.connect(self.append_output)
+        self.installer_thread.item_finished.connect(self.record_install_result)
+        self.installer_thread.finished.connect(self.installation_finished)
+        self.installer_thread.error.connect(self.show_error)
 
-            self.install_btn.setEnabled(False)
-            self.cancel_btn.setEnabled(True)
-            self.installer_thread.start()
+        self.install_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.output_view.clear()
+        self._output_buffer = []
+        self.output_timer.start()
+        self.installer_thread.start()
+
+    @TRACER.traced()
+    def on_prefix_progress(self, config_name, message):
+        for item_id in self._job_items.get(config_name, []):
+            self.queue_model.set_status(item_id, message)
+
+    def append_output(self, item_id, line):
+        item = self.queue_model.item(item_id) if item_id >= 0 else None
+        name = item.name if item else "prefix"
+        self._output_buffer.append(f"[{name}] {line}")
+
+    def flush_output(self):
+        # Se traza cada volcado (no cada línea) y solo si hay salida pendiente
+        if self._output_buffer:
+            with TRACER.span("InstallerApp.flush_output", "ui", lines=len(self._output_buffer)):
+                self.output_view.appendPlainText("\n".join(self._output_buffer))
+                self._output_buffer = []
+
+    @TRACER.traced()
+    def record_install_result(self, item_id, success, message):
+        item = self.queue_model.item(item_id)
+        if item is None:
+            return
+
+        status = "ok"
+        if not success:
+            self._install_failed = True
+            status = "cancelled" if self._install_cancelled else "error"
+            if self._install_cancelled:
+                self.queue_model.set_status(item_id, f"{item.name}: Cancelado")
+
+        self.config_manager.add_install_history(
+            item.config_name,
+            item.name,
+            item.item_type,
+            status,
+            message
+        )
 
+    @TRACER.traced()
     def installation_finished(self):
+        if self._install_cancelled:
+            self.status_label.setText("Items a instalar:")
+            QMessageBox.information(self, "Cancelado", "La instalación se canceló.")
+            self.reset_ui()
+            self.update_install_button()
+            return
+
+        if self._install_failed:
+            QMessageBox.warning(self, "Completado", "La instalación terminó con errores.")
+            self.reset_ui()
+            self.update_install_button()
+            return
+
         QMessageBox.information(self, "Completado", "Todos los items se instalaron correctamente.")
         self.clear_list()
         self.reset_ui()
 
     def reset_ui(self):
+        self.output_timer.stop()
+        self.flush_output()
         self.install_btn.setEnabled(False)
         self.cancel_btn.setEnabled(False)
         self.silent_checkbox.setChecked(False)
 
+    @TRACER.traced()
     def show_error(self, message):
         QMessageBox.critical(self, "Error", message)
-        self.reset_ui()
+        # Los trabajos de otros prefixes pueden seguir en curso
+        if not (self.installer_thread and self.installer_thread.isRunning()):
+            self.reset_ui()
 
+    @TRACER.traced()
     def cancel_installation(self):
         if self.installer_thread and self.installer_thread.isRunning():
             reply = QMessageBox.question(
@@ -1998,11 +2409,15 @@ class InstallerApp(QWidget):
                 QMessageBox.Yes | QMessageBox.No
             )
 
-            if reply == QMessageBox.Yes:
+            if reply == QMessageBox.Yes and self.installer_thread.isRunning():
+                # stop() no bloquea: los procesos se terminan en segundo plano y
+                # la señal finished restablece la interfaz
+                self._install_cancelled = True
+                self.cancel_btn.setEnabled(False)
+                self.status_label.setText("Cancelando instalación...")
                 self.installer_thread.stop()
-                self.installer_thread.wait()
-                self.reset_ui()
 
+    @TRACER.traced()
     def open_winetricks(self):
         try:
             current_config = self.config_manager.configs["last_used"]
@@ -2010,10 +2425,12 @@ class InstallerApp(QWidget):
             
             winetricks_path = self.config_manager.get_winetricks_path()
             
-            subprocess.Popen(
-                [winetricks_path, "--gui"],
-                env=env
-            )
+            # Proceso independiente: la traza solo registra el lanzamiento
+            with TRACER.process_span([winetricks_path, "--gui"], env) as span:
+                span["pid"] = subprocess.Popen(
+                    [winetricks_path, "--gui"],
+                    env=env
+                ).pid
         except Exception as e:
             QMessageBox.critical(
                 self,
@@ -2021,11 +2438,16 @@ class InstallerApp(QWidget):
                 f"No se pudo abrir Winetricks: {str(e)}"
             )
 
+    @TRACER.traced()
     def open_shell(self):
         try:
             current_config = self.config_manager.configs["last_used"]
             env = self.config_manager.get_current_env(current_config)
-            subprocess.Popen(["konsole"], env=env)
+            konsole_path = self.config_manager.tools.which("konsole")
+            if not konsole_path:
+                raise FileNotFoundError("Konsole no está instalado")
+            with TRACER.process_span([konsole_path], env) as span:
+                span["pid"] = subprocess.Popen([konsole_path], env=env).pid
         except Exception as e:
             QMessageBox.critical(
                 self,
@@ -2033,6 +2455,7 @@ class InstallerApp(QWidget):
                 f"No se pudo abrir la terminal: {str(e)}"
             )
             
+    @TRACER.traced()
     def open_prefix_folder(self):
         try:
             current_config = self.config_manager.configs["last_used"]
@@ -2041,7 +2464,9 @@ class InstallerApp(QWidget):
             if config and "prefix" in config:
                 prefix_path = Path(config["prefix"])
                 if prefix_path.exists():
-                    subprocess.Popen(["xdg-open", str(prefix_path)])
+                    xdg_open = self.config_manager.tools.which("xdg-open") or "xdg-open"
+                    with TRACER.process_span([xdg_open, str(prefix_path)]) as span:
+                        span["pid"] = subprocess.Popen([xdg_open, str(prefix_path)]).pid
                 else:
                     QMessageBox.warning(
                         self,
@@ -2061,7 +2486,21 @@ class InstallerApp(QWidget):
                 f"No se pudo abrir el directorio: {str(e)}"
             )
 
-if __name__ == "__main__":
+def main(startup_profile=None, trace=None):
+    if startup_profile is None:
+        startup_profile = "--startup-profile" in sys.argv[1:]
+    if trace is None:
+        args = sys.argv[1:]
+        if "--trace" in args and args.index("--trace") + 1 < len(args):
+            trace = args[args.index("--trace") + 1]
+        else:
+            trace = os.environ.get("WPM_TRACE")
+    if trace:
+        TRACER.enable(trace)
+    profile = StartupProfile(IMPORT_STARTED) if startup_profile else None
+    mark = profile.mark if profile else (lambda phase: None)
+    mark("importación")
+
     if hasattr(Qt, 'AA_EnableHighDpiScaling'):
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
@@ -2069,9 +2508,12 @@ if __name__ == "__main__":
 
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
+    mark("QApplication")
 
     config_manager = ConfigManager()
+    mark("configuración")
     installer = InstallerApp(config_manager)
+    mark("ventana")
     
     screen = app.primaryScreen().availableGeometry()
     window_size = config_manager.get_window_size()
@@ -2082,4 +2524,13 @@ if __name__ == "__main__":
         installer.resize(window_size)
     
     installer.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    mark("mostrar")
+
+    # Lo que no hace falta para pintar la ventana se ejecuta con el bucle de eventos en marcha
+    if profile:
+        QTimer.singleShot(0, lambda: (mark("interactiva"), profile.report()))
+    QTimer.singleShot(0, installer.start_deferred_tasks)
+    return app.exec_()
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
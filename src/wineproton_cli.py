@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Línea de comandos de WineProton Manager
+
+Permite aprovisionar prefixes sin la interfaz gráfica (por ejemplo por SSH).
+No importa PyQt5 salvo que se ejecute sin subcomando, en cuyo caso abre la GUI.
+
+Ejemplos:
+    wineprotonmanager install --config Wine-System vcrun2022 dotnet48 ~/setup.exe
+    wineprotonmanager install --config Build1 --config Build2 --jobs 4 vcrun2022
+    wineprotonmanager list-configs
+    wineprotonmanager history --config Juego1
+    wineprotonmanager template save --config Base "Base VC2022"
+    wineprotonmanager template clone "Base VC2022" Juego1
+    wineprotonmanager --trace /tmp/wpm-trace.json install vcrun2022
+"""
+import os
+import sys
+import argparse
+import threading
+import time
+from pathlib import Path
+
+from wineproton_core import TRACER, ConfigManager, DownloadPrefetcher, InstallEngine, InstallJob, InstallScheduler
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+def classify_item(item):
+    """Devuelve (ruta o verbo, tipo) igual que el diálogo de programas personalizados"""
+    if item.lower().endswith(('.exe', '.msi')):
+        return str(Path(item).expanduser().absolute()), "exe"
+    return item, "winetricks"
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="wineprotonmanager",
+        description="Gestiona entornos Wine/Proton e instala componentes sin interfaz gráfica."
+    )
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Sin subcomando: muestra los tiempos de cada fase del arranque de la interfaz")
+    parser.add_argument("--trace", metavar="ARCHIVO",
+                        help="Guarda una traza de procesos y operaciones en formato Chrome/Perfetto "
+                             "(también con la variable WPM_TRACE)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    install = subparsers.add_parser("install", help="Instala componentes winetricks y programas en un prefix")
+    install.add_argument("--config", action="append", default=[], metavar="NOMBRE",
+                         help="Configuración a usar (se puede repetir para instalar en varios prefixes "
+                              "en paralelo; por defecto, la última usada)")
+    install.add_argument("--jobs", type=int, default=None, metavar="N",
+                         help="Número máximo de prefixes en paralelo (por defecto, uno por CPU)")
+    install.add_argument("--prefetch", type=int, default=None, metavar="N",
+                         help="Descargas de winetricks a adelantar en paralelo mientras se instala "
+                              "(0 las desactiva; por defecto, el valor de la configuración)")
+    install.add_argument("--program", action="append", default=[], metavar="NOMBRE",
+                         help="Programa guardado a instalar (se puede repetir)")
+    install.add_argument("--silent", action="store_true", help="Modo silencioso de winetricks (-q)")
+    install.add_argument("--terminal", action="store_true", help="Abrir cada item en una ventana de Konsole")
+    install.add_argument("--force", action="store_true",
+                         help="Reinstalar los items tal cual se indican, aunque ya estén instalados "
+                              "(sin resolver dependencias)")
+    install.add_argument("--create-prefix", action="store_true", help="Crear el prefix si no existe")
+    install.add_argument("--quiet", action="store_true", help="No mostrar la salida de los procesos")
+    install.add_argument("items", nargs="*", metavar="ITEM",
+                         help="Verbos de winetricks o rutas a instaladores .exe/.msi")
+
+    init_prefix = subparsers.add_parser("init-prefix", help="Inicializa en paralelo los prefixes de varias configuraciones")
+    init_prefix.add_argument("--config", action="append", default=[], metavar="NOMBRE",
+                             help="Configuración a inicializar (se puede repetir; por defecto, la última usada)")
+    init_prefix.add_argument("--jobs", type=int, default=None, metavar="N",
+                             help="Número máximo de prefixes en paralelo (por defecto, uno por CPU)")
+    init_prefix.add_argument("--quiet", action="store_true", help="No mostrar la salida de los procesos")
+
+    subparsers.add_parser("list-configs", help="Lista las configuraciones guardadas")
+    subparsers.add_parser("list-programs", help="Lista los programas guardados")
+    history = subparsers.add_parser("history", help="Muestra el historial de instalaciones (más recientes primero)")
+    history.add_argument("--config", default=None, metavar="NOMBRE",
+                         help="Solo las instalaciones de esta configuración")
+    history.add_argument("--limit", type=int, default=20, metavar="N",
+                         help="Número de entradas a mostrar (0 para todas; por defecto 20)")
+
+    template = subparsers.add_parser("template", help="Gestiona prefixes plantilla")
+    template_commands = template.add_subparsers(dest="template_command")
+    template_commands.required = True
+    template_commands.add_parser("list", help="Lista las plantillas")
+    template_save = template_commands.add_parser("save", help="Guarda el prefix de una configuración como plantilla")
+    template_save.add_argument("--config", default=None, metavar="NOMBRE",
+                               help="Configuración de origen (por defecto, la última usada)")
+    template_save.add_argument("name", metavar="PLANTILLA")
+    template_clone = template_commands.add_parser("clone", help="Crea una configuración nueva desde una plantilla")
+    template_clone.add_argument("name", metavar="PLANTILLA")
+    template_clone.add_argument("config", metavar="CONFIGURACIÓN")
+    template_clone.add_argument("--prefix", default=None, help="Ruta del prefix nuevo")
+    template_remove = template_commands.add_parser("remove", help="Elimina una plantilla")
+    template_remove.add_argument("name", metavar="PLANTILLA")
+    return parser
+
+def print_error(message):
+    print(f"Error: {message}", file=sys.stderr, flush=True)
+
+def cmd_list_configs(config_manager, args):
+    last_used = config_manager.configs.get("last_used")
+    for name, config in config_manager.configs["configs"].items():
+        marker = "*" if name == last_used else " "
+        print(f"{marker} {name}\t{config.get('type', 'wine')}\t{config.get('arch', 'win64')}\t{config.get('prefix', '')}")
+    return EXIT_OK
+
+def cmd_list_programs(config_manager, args):
+    for program in config_manager.get_custom_programs():
+        print(f"{program['name']}\t{program.get('type', 'winetricks')}\t{program['path']}")
+    return EXIT_OK
+
+def cmd_history(config_manager, args):
+    for record in config_manager.get_install_history(args.config, args.limit or None):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["timestamp"]))
+        print(f"{timestamp}\t{record['config']}\t{record['item']}\t{record['type']}\t{record['status']}")
+    return EXIT_OK
+
+def cmd_install(config_manager, args):
+    config_names = args.config or [config_manager.configs.get("last_used")]
+    for config_name in config_names:
+        if not config_manager.get_config(config_name):
+            print_error(f"No existe la configuración '{config_name}'")
+            return EXIT_USAGE
+
+    items, item_types = [], []
+    index = config_manager.get_custom_program_index()
+    programs = config_manager.get_custom_programs()
+    for name in args.program:
+        position = index.get(name)
+        if position is None:
+            print_error(f"No existe el programa guardado '{name}'")
+            return EXIT_USAGE
+        items.append(programs[position]["path"])
+        item_types.append(programs[position].get("type", "winetricks"))
+
+    for item in args.items:
+        item_path, item_type = classify_item(item)
+        items.append(item_path)
+        item_types.append(item_type)
+
+    if not items:
+        print_error("No se indicó ningún item a instalar")
+        return EXIT_USAGE
+
+    terminal = None
+    if args.terminal:
+        terminal = config_manager.tools.which("konsole")
+        if not terminal:
+            print_error("Konsole no está instalado")
+            return EXIT_USAGE
+
+    multiple = len(config_names) > 1
+
+    def tag(config_name):
+        return f"[{config_name}] " if multiple else ""
+
+    def print_output(config_name, line):
+        if not args.quiet:
+            print(f"    {tag(config_name)}{line}", flush=True)
+
+    jobs = []
+    for config_name in config_names:
+        config = config_manager.get_config(config_name)
+        env = config_manager.get_current_env(config_name)
+
+        if not Path(config["prefix"]).exists() and not args.create_prefix:
+            print_error(f"El prefix {config['prefix']} no existe (use --create-prefix para crearlo)")
+            return EXIT_USAGE
+
+        if args.force:
+            jobs.append(InstallJob(config_name, env, list(items), list(item_types), create_prefix=args.create_prefix))
+            continue
+
+        plan = config_manager.plan_install(config_name, items, item_types, use_template=args.create_prefix)
+        if plan.template:
+            print(f"{tag(config_name)}El prefix se crea desde la plantilla '{plan.template}'", flush=True)
+        for idx, reason in sorted(plan.skipped.items()):
+            print(f"{tag(config_name)}{InstallEngine.display_name(items[idx], item_types[idx])}: "
+                  f"{reason}, se omite", flush=True)
+        for item, required_by in zip(plan.items, plan.required_by):
+            if required_by:
+                print(f"{tag(config_name)}{item}: dependencia de {required_by}", flush=True)
+        create_prefix = args.create_prefix and not InstallEngine.prefix_initialized(config["prefix"])
+        if plan.items or create_prefix:
+            template = plan.template and config_manager.get_templates()[plan.template]["path"]
+            jobs.append(InstallJob(config_name, env, plan.items, plan.item_types, create_prefix=create_prefix,
+                                   template=template))
+
+    if not jobs:
+        print("Nada que instalar", flush=True)
+        return EXIT_OK
+
+    winetricks_path = config_manager.get_winetricks_path()
+    prefetch_jobs = config_manager.get_prefetch_jobs() if args.prefetch is None else args.prefetch
+    scheduler = InstallScheduler(
+        winetricks_path=winetricks_path,
+        silent_mode=args.silent,
+        terminal=terminal,
+        max_workers=args.jobs,
+        log_dir=config_manager.get_log_dir(),
+        force=args.force,
+        prefetcher=DownloadPrefetcher(winetricks_path, max_workers=prefetch_jobs) if prefetch_jobs > 0 else None
+    )
+    return run_jobs(config_manager, scheduler, jobs, tag, print_output)
+
+def run_jobs(config_manager, scheduler, jobs, tag, print_output):
+    """Ejecuta los trabajos mostrando el progreso y registrando el historial"""
+    history_lock = threading.Lock()
+
+    def on_progress(job, idx, message):
+        # idx es None en los mensajes de creación del prefix
+        position = f"[{idx + 1}/{len(job.items)}] " if idx is not None else ""
+        print(f"{tag(job.config_name)}{position}{message}", flush=True)
+
+    def on_item_finished(job, idx, ok, message):
+        with history_lock:
+            config_manager.add_install_history(
+                job.config_name,
+                InstallEngine.display_name(job.items[idx], job.item_types[idx]),
+                job.item_types[idx],
+                "ok" if ok else "error",
+                message
+            )
+
+    try:
+        success = scheduler.run(
+            jobs,
+            on_progress=on_progress,
+            on_item_finished=on_item_finished,
+            on_error=lambda job, message: print_error(f"{tag(job.config_name)}{message}"),
+            on_output=lambda job, idx, line: print_output(job.config_name, line)
+        )
+    except KeyboardInterrupt:
+        # Los procesos van en su propio grupo y no reciben el Ctrl+C: hay que terminarlos
+        print_error("Cancelando instalación...")
+        scheduler.stop(wait=True)
+        raise
+    return EXIT_OK if success else EXIT_FAILURE
+
+def cmd_init_prefix(config_manager, args):
+    config_names = args.config or [config_manager.configs.get("last_used")]
+    jobs = []
+    for config_name in config_names:
+        config = config_manager.get_config(config_name)
+        if not config:
+            print_error(f"No existe la configuración '{config_name}'")
+            return EXIT_USAGE
+        if InstallEngine.prefix_initialized(config["prefix"]):
+            print(f"{config_name}: el prefix {config['prefix']} ya está inicializado", flush=True)
+            continue
+        jobs.append(InstallJob(config_name, config_manager.get_current_env(config_name), [], [], create_prefix=True))
+
+    if not jobs:
+        return EXIT_OK
+
+    def print_output(config_name, line):
+        if not args.quiet:
+            print(f"    [{config_name}] {line}", flush=True)
+
+    scheduler = InstallScheduler(max_workers=args.jobs, log_dir=config_manager.get_log_dir())
+    return run_jobs(config_manager, scheduler, jobs, lambda config_name: f"[{config_name}] ", print_output)
+
+def cmd_template(config_manager, args):
+    if args.template_command == "list":
+        for name, template in config_manager.get_templates().items():
+            components = ",".join(template.get("components", []))
+            print(f"{name}\t{template['config'].get('type', 'wine')}\t{template['config'].get('arch', 'win64')}\t"
+                  f"{components}\t{template['path']}")
+        return EXIT_OK
+
+    try:
+        if args.template_command == "save":
+            config_name = args.config or config_manager.configs.get("last_used")
+            print(f"Copiando el prefix de '{config_name}'...", flush=True)
+            template = config_manager.register_template(config_name, args.name)
+            print(f"Plantilla '{args.name}' guardada en {template['path']}")
+        elif args.template_command == "clone":
+            start = time.monotonic()
+            stats = config_manager.create_config_from_template(args.name, args.config, args.prefix)
+            print(f"Configuración '{args.config}' creada en {time.monotonic() - start:.1f}s "
+                  f"({stats['reflinked']} archivos con reflink, {stats['copied']} copiados)")
+        elif args.template_command == "remove":
+            if not config_manager.remove_template(args.name):
+                print_error(f"No existe la plantilla '{args.name}'")
+                return EXIT_USAGE
+    except (ValueError, OSError, RuntimeError) as e:
+        print_error(str(e))
+        return EXIT_FAILURE
+    return EXIT_OK
+
+COMMANDS = {
+    "install": cmd_install,
+    "list-configs": cmd_list_configs,
+    "list-programs": cmd_list_programs,
+    "history": cmd_history,
+    "template": cmd_template,
+    "init-prefix": cmd_init_prefix,
+}
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command is None:
+        # Sin subcomando abrimos la interfaz gráfica (único caso en que se carga PyQt5)
+        import WineProtonManager
+        return WineProtonManager.main(startup_profile=args.startup_profile, trace=args.trace)
+
+    trace = args.trace or os.environ.get("WPM_TRACE")
+    if trace:
+        TRACER.enable(trace)
+    config_manager = ConfigManager()
+    try:
+        return COMMANDS[args.command](config_manager, args)
+    except KeyboardInterrupt:
+        print_error("Instalación interrumpida")
+        return EXIT_INTERRUPTED
+    finally:
+        config_manager.flush()
+
+if __name__ == "__main__":
+    sys.exit(main())
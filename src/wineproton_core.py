@@ -0,0 +1,2531 @@
+#!/usr/bin/env python3
+"""Núcleo de WineProton Manager independiente de Qt
+
+Contiene la gestión de configuraciones, la localización de herramientas y el
+motor de instalación. Lo usan tanto la interfaz gráfica (WineProtonManager.py)
+como la línea de comandos (wineproton_cli.py), por lo que no debe importar PyQt5.
+"""
+import os
+import sys
+import atexit
+import bisect
+import errno
+import fcntl
+import tempfile
+import subprocess
+import json
+import re
+import collections
+import contextlib
+import functools
+import hashlib
+import inspect
+import shlex
+import uuid
+import shutil
+import signal
+import threading
+import time
+from pathlib import Path
+
+def write_json_atomic(path, data, indent=None):
+    """Escribe un JSON de forma atómica (archivo temporal + fsync + rename)"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class Tracer:
+    """Traza opcional en formato Chrome/Perfetto (trace event JSON)
+
+    Desactivada no hace nada. Con enable() registra intervalos ("X") con
+    hora de inicio y duración por hilo, y al salir los escribe en el archivo
+    indicado, que se abre con chrome://tracing o ui.perfetto.dev.
+    Solo se guardan los MAX_EVENTS intervalos más recientes, así que la
+    memoria no crece aunque la sesión sea larga.
+    """
+    MAX_EVENTS = 100000
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.enabled = False
+        self.path = None
+        self._events = collections.deque(maxlen=max_events)
+        self._threads = {}
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def enable(self, path):
+        """Activa la traza; se guarda en path al terminar el proceso"""
+        if not self.enabled:
+            atexit.register(self.save)
+        self.path = Path(path).expanduser()
+        self.enabled = True
+
+    def _timestamp(self, value):
+        return round((value - self._origin) * 1e6, 3)
+
+    def add(self, name, category, start, end, args=None):
+        """Registra un intervalo (start y end son valores de time.perf_counter)"""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        tid = threading.get_ident()
+        event = {
+            "name": name, "cat": category, "ph": "X", "pid": self._pid, "tid": tid,
+            "ts": self._timestamp(start), "dur": round((end - start) * 1e6, 3), "args": args or {}
+        }
+        with self._lock:
+            self._threads.setdefault(tid, thread.name)
+            if len(self._events) == self._events.maxlen:
+                self._dropped += 1
+            self._events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category="app", **args):
+        """Intervalo alrededor de un bloque; el diccionario devuelto se guarda como args"""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            if self.enabled:
+                self.add(name, category, start, time.perf_counter(), args)
+
+    def process_span(self, cmd, env=None):
+        """Intervalo de un proceso externo con su comando y el prefix/runner del entorno"""
+        env = env or {}
+        name = Path(str(cmd[0])).name + (f" {cmd[1]}" if len(cmd) > 1 and not str(cmd[1]).startswith("/") else "")
+        return self.span(name, "subprocess", cmd=" ".join(shlex.quote(str(part)) for part in cmd),
+                         prefix=env.get("WINEPREFIX"), arch=env.get("WINEARCH"), wine=env.get("WINE"))
+
+    def traced(self, name=None, category="ui", with_args=False):
+        """Decorador que traza cada llamada a la función
+
+        Como PyQt, descarta los argumentos posicionales que la función no
+        acepta (por ejemplo el "checked" de clicked), así que sirve para slots.
+        """
+        def decorator(function):
+            label = name or function.__qualname__
+            params = inspect.signature(function).parameters.values()
+            if any(param.kind == param.VAR_POSITIONAL for param in params):
+                limit = None
+            else:
+                limit = sum(1 for param in params
+                            if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD))
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if limit is not None:
+                    args = args[:limit]
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                extra = {"args": [repr(arg) for arg in args[1:]]} if with_args else {}
+                with self.span(label, category, **extra):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def save(self):
+        """Escribe la traza (se llama al salir si está activa)"""
+        if not self.enabled or not self.path:
+            return
+        with self._lock:
+            events = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                      for tid, name in self._threads.items()]
+            events.extend(self._events)
+            dropped = self._dropped
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.path, {"traceEvents": events, "displayTimeUnit": "ms",
+                                          "otherData": {"dropped_events": dropped}})
+        except Exception as e:
+            print(f"Error saving trace: {e}")
+
+TRACER = Tracer()
+
+def run_process(cmd, timeout=None, capture_output=False, **kwargs):
+    """Equivalente a subprocess.run que registra el proceso en la traza
+
+    El intervalo incluye el comando, el prefix del entorno, el pid y el
+    código de salida.
+    """
+    if capture_output:
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+    with TRACER.process_span(cmd, kwargs.get("env")) as span:
+        with subprocess.Popen(cmd, **kwargs) as process:
+            span["pid"] = process.pid
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                span["timeout"] = True
+                raise
+            span["exit_code"] = process.returncode
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+class JsonConfigBackend:
+    """Almacenamiento de la configuración en un único archivo JSON
+
+    El historial de instalaciones se guarda aparte, en un archivo JSON Lines
+    al que solo se añaden líneas.
+    """
+    name = "json"
+
+    def __init__(self, config_file):
+        self.config_file = Path(config_file)
+        self.history_file = self.config_file.with_name("install_history.jsonl")
+
+    def exists(self):
+        return self.config_file.exists()
+
+    def load(self):
+        """Carga la configuración completa (None si no existe)"""
+        if not self.exists():
+            return None
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_programs(self):
+        """Los programas van en el mismo archivo: solo se llega aquí si no tiene ninguno"""
+        return []
+
+    def save(self, data, sections=None, programs=None):
+        """Guarda la configuración completa (el archivo no admite guardados parciales)"""
+        write_json_atomic(self.config_file, data, indent=4)
+
+    def move_aside(self, suffix=".corrupt"):
+        """Aparta los archivos de este almacenamiento para no sobrescribirlos"""
+        paths = (self.config_file,) if suffix == ".corrupt" else (self.config_file, self.history_file)
+        for path in paths:
+            try:
+                os.replace(path, path.with_name(path.name + suffix))
+            except OSError:
+                pass
+
+    def append_history(self, record):
+        """Añade una entrada al historial de instalaciones"""
+        with open(self.history_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def load_history(self, config_name=None, limit=100):
+        """Obtiene las últimas entradas del historial (más recientes primero, sin límite si limit es None)"""
+        if not self.history_file.exists():
+            return []
+
+        records = []
+        with open(self.history_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if config_name is None or record.get("config") == config_name:
+                    records.append(record)
+        return records[::-1][:limit]
+
+    def close(self):
+        pass
+
+class SqliteConfigBackend:
+    """Almacenamiento de la configuración en SQLite (modo WAL)
+
+    Cada configuración, programa personalizado y ajuste ocupa su propia fila.
+    Los programas y el historial de instalaciones se leen bajo demanda, y al
+    guardar solo se escriben las secciones y los programas marcados como
+    modificados.
+    """
+    name = "sqlite"
+    TABLES = {
+        "meta": ("meta", "key", "value"),
+        "configs": ("configs", "name", "data"),
+        "settings": ("settings", "key", "value")
+    }
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS configs (
+            name TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS custom_programs (
+            position INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            path TEXT NOT NULL,
+            type TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_custom_programs_name ON custom_programs (name);
+        CREATE TABLE IF NOT EXISTS install_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp REAL NOT NULL,
+            config TEXT NOT NULL,
+            item TEXT NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            message TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_install_history_config ON install_history (config, timestamp);
+    """
+
+    def __init__(self, db_file):
+        self.db_file = Path(db_file)
+        self._conn = None
+        self._lock = threading.Lock()
+        self._snapshot = {}  # Última versión leída o escrita de cada sección
+        self._program_count = None  # Programas guardados (None si no se conoce)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            import sqlite3  # Solo se carga si se usa este almacenamiento
+            self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def exists(self):
+        return self.db_file.exists()
+
+    @staticmethod
+    def _dump(value):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+    def _section_rows(self, data, section):
+        """Filas serializadas ({clave: valor}) de una sección de la configuración"""
+        if section == "meta":
+            values = {key: value for key, value in data.items()
+                      if key not in ("configs", "settings", "custom_programs")}
+        else:
+            values = data.get(section, {})
+        return {key: self._dump(value) for key, value in values.items()}
+
+    def load(self):
+        """Carga la configuración sin los programas personalizados (None si la base de datos está vacía)
+
+        Los programas se leen con load_programs() cuando se piden por primera vez.
+        """
+        if not self.exists():
+            return None
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            meta = dict(cursor.execute("SELECT key, value FROM meta"))
+            configs = dict(cursor.execute("SELECT name, data FROM configs"))
+            settings = dict(cursor.execute("SELECT key, value FROM settings"))
+            has_programs = cursor.execute("SELECT EXISTS (SELECT 1 FROM custom_programs)").fetchone()[0]
+
+        if not (meta or configs or settings or has_programs):
+            return None
+
+        self._snapshot = {"meta": meta, "configs": configs, "settings": settings}
+        data = {key: json.loads(value) for key, value in meta.items()}
+        data["configs"] = {name: json.loads(value) for name, value in configs.items()}
+        data["settings"] = {key: json.loads(value) for key, value in settings.items()}
+        return data
+
+    def load_programs(self):
+        """Carga la lista de programas personalizados"""
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM custom_programs ORDER BY position").fetchall()
+        self._program_count = len(rows)
+        # Un único json.loads para toda la lista es bastante más rápido que uno por fila
+        return json.loads("[" + ",".join(row[0] for row in rows) + "]")
+
+    def save(self, data, sections=None, programs=None):
+        """Guarda los cambios marcados
+
+        De las secciones indicadas (meta, configs, settings; todas si es None)
+        solo se escriben las filas que difieren de lo último leído o escrito.
+        programs son las posiciones de los programas modificados (None: todos);
+        si los programas no se han cargado no se tocan.
+        """
+        updates = {}
+        for section in (self.TABLES if sections is None else sections):
+            rows = self._section_rows(data, section)
+            old_rows = self._snapshot.get(section, {})
+            updates[section] = (
+                rows,
+                [(key, value) for key, value in rows.items() if old_rows.get(key) != value],
+                [(key,) for key in old_rows if key not in rows]
+            )
+
+        program_list = data.get("custom_programs")
+        program_rows = []
+        if program_list is not None:
+            positions = range(len(program_list)) if programs is None else sorted(
+                position for position in programs if position < len(program_list))
+            for position in positions:
+                program = program_list[position]
+                program_rows.append((position, program.get("name", ""), program.get("path", ""),
+                                     program.get("type", "winetricks"), self._dump(program)))
+
+        with self._lock, self.conn:
+            for section, (rows, changed, removed) in updates.items():
+                table, key_column, value_column = self.TABLES[section]
+                if changed:
+                    self.conn.executemany(
+                        f"INSERT OR REPLACE INTO {table} ({key_column}, {value_column}) VALUES (?, ?)",
+                        changed
+                    )
+                if removed:
+                    self.conn.executemany(f"DELETE FROM {table} WHERE {key_column} = ?", removed)
+
+            if program_rows:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO custom_programs (position, name, path, type, data) VALUES (?, ?, ?, ?, ?)",
+                    program_rows
+                )
+            if program_list is not None and (self._program_count is None or len(program_list) < self._program_count):
+                self.conn.execute("DELETE FROM custom_programs WHERE position >= ?", (len(program_list),))
+
+        for section, (rows, changed, removed) in updates.items():
+            self._snapshot[section] = rows
+        if program_list is not None:
+            self._program_count = len(program_list)
+
+    def move_aside(self, suffix=".corrupt"):
+        """Aparta la base de datos para no sobrescribirla"""
+        self.close()
+        for extension in ("", "-wal", "-shm"):
+            try:
+                os.replace(str(self.db_file) + extension, str(self.db_file) + suffix + extension)
+            except OSError:
+                pass
+
+    def append_history(self, record):
+        """Añade una entrada al historial de instalaciones"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO install_history (timestamp, config, item, type, status, message) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (record["timestamp"], record["config"], record["item"], record["type"],
+                 record["status"], record.get("message", ""))
+            )
+
+    def load_history(self, config_name=None, limit=100):
+        """Obtiene las últimas entradas del historial (más recientes primero, sin límite si limit es None)"""
+        query = "SELECT timestamp, config, item, type, status, message FROM install_history"
+        params = []
+        if config_name is not None:
+            query += " WHERE config = ?"
+            params.append(config_name)
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(-1 if limit is None else limit)
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        columns = ("timestamp", "config", "item", "type", "status", "message")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def import_data(self, data, history=()):
+        """Reemplaza el contenido de la base de datos (historial en orden cronológico)"""
+        self._snapshot = {}
+        self._program_count = 0
+        with self._lock, self.conn:
+            for table in ("meta", "configs", "settings", "custom_programs"):
+                self.conn.execute(f"DELETE FROM {table}")
+        self.save(dict(data, custom_programs=data.get("custom_programs", [])))
+
+        for record in history:
+            self.append_history(record)
+
+    def import_json(self, json_file):
+        """Importa una configuración en formato JSON junto con su historial"""
+        source = JsonConfigBackend(json_file)
+        data = source.load() or {}
+        self.import_data(data, reversed(source.load_history(limit=None)))
+        return data
+
+    def export_json(self, json_file):
+        """Exporta la configuración (y su historial) al formato JSON clásico"""
+        target = JsonConfigBackend(json_file)
+        data = self.load() or {}
+        data["custom_programs"] = self.load_programs()
+        target.save(data)
+        with open(target.history_file, 'w', encoding='utf-8') as f:
+            for record in reversed(self.load_history(limit=None)):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return data
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+class ToolRegistry:
+    """Registro de herramientas externas (winetricks, konsole, wine...)
+
+    Resuelve los binarios dentro del proceso, sin lanzar 'which', y cachea el
+    resultado. La caché se invalida si cambia PATH o la fecha de modificación
+    de alguno de sus directorios (al instalar o desinstalar paquetes).
+    """
+    TOOLS = ("winetricks", "konsole", "xdg-open", "wine", "wineserver")
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _path_stamp(search_path):
+        stamp = []
+        for directory in search_path.split(os.pathsep):
+            try:
+                stamp.append(os.stat(directory or ".").st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def which(self, name, search_path=None):
+        """Obtiene la ruta de una herramienta del PATH (None si no está instalada)"""
+        if search_path is None:
+            search_path = os.environ.get("PATH", os.defpath)
+
+        key = (name, search_path)
+        stamp = self._path_stamp(search_path)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry and entry[0] == stamp:
+            return entry[1]
+
+        result = shutil.which(name, path=search_path)
+        with self._lock:
+            self._cache[key] = (stamp, result)
+        return result
+
+    def runner_binary(self, config, tool="wine"):
+        """Obtiene el binario wine/wineserver de una configuración"""
+        if config.get("type") == "proton":
+            return str(Path(config["proton_dir"]) / "files/bin" / tool)
+
+        wine_dir = config.get("wine_dir")
+        if wine_dir:
+            return str(Path(wine_dir) / "bin" / tool)
+        return self.which(tool) or tool
+
+    def available(self):
+        """Obtiene la ruta de todas las herramientas conocidas"""
+        return {name: self.which(name) for name in self.TOOLS}
+
+class VersionCache:
+    """Caché persistente de versiones de Wine/Proton
+
+    Cada entrada se indexa por la ruta real del binario y se invalida
+    automáticamente cuando cambian su tamaño o su fecha de modificación
+    (por ejemplo, al actualizar el runner).
+    """
+    def __init__(self, cache_file, tools=None):
+        self.cache_file = Path(cache_file)
+        self.tools = tools or ToolRegistry()
+        self.entries = self.load()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Carga la caché desde disco"""
+        if not self.cache_file.exists():
+            return {}
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading version cache: {e}")
+            return {}
+
+    def save(self):
+        """Guarda la caché en disco"""
+        try:
+            with self._lock:
+                data = dict(self.entries)
+            write_json_atomic(self.cache_file, data, indent=4)
+        except Exception as e:
+            print(f"Error saving version cache: {e}")
+
+    def resolve_binary(self, binary):
+        """Resuelve la ruta real de un binario (sin lanzar procesos)"""
+        if os.sep not in binary:
+            binary = self.tools.which(binary)
+            if not binary:
+                return None
+
+        path = Path(binary)
+        if not path.exists():
+            return None
+        return path.resolve()
+
+    def get_version(self, binary, env=None):
+        """Obtiene la versión de un binario, ejecutando '--version' solo si no está en caché"""
+        path = self.resolve_binary(binary)
+        if path is None:
+            return None
+
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        key = str(path)
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns:
+            return entry.get("version")
+
+        try:
+            result = run_process(
+                [binary, "--version"],
+                env=env,
+                capture_output=True, text=True
+            )
+        except Exception:
+            return None
+
+        if result.returncode != 0:
+            return None
+
+        version = result.stdout.strip()
+        self.store(binary, version)
+        return version
+
+    def store(self, binary, version):
+        """Registra la versión obtenida para un binario"""
+        path = self.resolve_binary(binary)
+        if path is None:
+            return
+
+        try:
+            stat = path.stat()
+        except OSError:
+            return
+
+        with self._lock:
+            self.entries[str(path)] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "version": version
+            }
+        self.save()
+
+class VerbCatalog:
+    """Catálogo de verbos de winetricks por categoría, con su descripción
+
+    Se obtiene de "winetricks list-all" una sola vez por versión del script:
+    la caché en disco se indexa por el hash SHA-256 del script, así que un
+    winetricks actualizado regenera el catálogo automáticamente.
+    """
+    CATEGORIES = ("dlls", "fonts", "settings", "apps", "benchmarks", "games")
+
+    def __init__(self, cache_file):
+        self.cache_file = Path(cache_file)
+        self._catalog = None
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def script_hash(self, script_path):
+        """Hash del script (memorizado mientras no cambien su tamaño ni su fecha)"""
+        path = Path(shutil.which(str(script_path)) or script_path).resolve()
+        info = path.stat()
+        key = (str(path), info.st_size, info.st_mtime_ns)
+        if key not in self._hashes:
+            with open(path, 'rb') as f:
+                self._hashes[key] = hashlib.sha256(f.read()).hexdigest()
+        return self._hashes[key]
+
+    def cached(self, script_path):
+        """Obtiene el catálogo sin ejecutar winetricks (None si no está en caché o está obsoleto)"""
+        try:
+            script_hash = self.script_hash(script_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            if self._catalog is None and self.cache_file.exists():
+                try:
+                    with open(self.cache_file, 'r', encoding='utf-8') as f:
+                        self._catalog = json.load(f)
+                except Exception as e:
+                    print(f"Error loading verb catalog: {e}")
+                    self._catalog = {}
+            if self._catalog and self._catalog.get("hash") == script_hash:
+                return self._catalog["categories"]
+        return None
+
+    def load(self, script_path, env=None, timeout=120):
+        """Obtiene el catálogo, ejecutando "winetricks list-all" si la caché está obsoleta"""
+        categories = self.cached(script_path)
+        if categories is not None:
+            return categories
+
+        script_hash = self.script_hash(script_path)
+        result = run_process(
+            [str(script_path), "list-all"],
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout
+        )
+        categories = self.parse(result.stdout.decode("utf-8", errors="replace"))
+        if not categories:
+            raise RuntimeError("winetricks list-all no devolvió ningún verbo")
+
+        with self._lock:
+            self._catalog = {"hash": script_hash, "categories": categories}
+        try:
+            write_json_atomic(self.cache_file, self._catalog)
+        except Exception as e:
+            print(f"Error saving verb catalog: {e}")
+        return categories
+
+    @classmethod
+    def parse(cls, output):
+        """Convierte la salida de list-all en {categoría: [[verbo, descripción], ...]}"""
+        categories = {}
+        current = None
+        for line in output.splitlines():
+            header = re.match(r"^=+\s*(\S+)\s*=+$", line.strip())
+            if header:
+                current = categories.setdefault(header.group(1), [])
+                continue
+            match = re.match(r"^([\w.+-]+)\s+(.*?)\s*(?:\[(?:downloadable|cached)\])?$", line)
+            if current is not None and match:
+                current.append([match.group(1), match.group(2)])
+
+        # Orden fijo de las categorías conocidas; las nuevas van al final
+        order = {name: i for i, name in enumerate(cls.CATEGORIES)}
+        return {name: categories[name] for name in sorted(categories, key=lambda n: order.get(n, len(order)))
+                if categories[name]}
+
+class VerbSearchIndex:
+    """Índice de búsqueda de verbos por nombre y descripción
+
+    Los nombres se guardan ordenados para resolver prefijos con búsqueda
+    binaria, y todo el texto se concatena en una sola cadena para que la
+    búsqueda de subcadenas sea un único str.find por coincidencia.
+    """
+
+    PREFIX, SUBSTRING = 0, 1
+
+    def __init__(self, entries):
+        self.names = []
+        self.offsets = []
+        self.owners = []
+        parts = []
+        position = 0
+        for verb, description in entries:
+            text = f"{verb} {description}".lower()
+            self.offsets.append(position)
+            self.owners.append(verb)
+            self.names.append((verb.lower(), verb))
+            parts.append(text)
+            position += len(text) + 1
+        self.names.sort()
+        self.text = "\n".join(parts)
+
+    def search(self, query):
+        """Devuelve {verbo: rango} (PREFIX antes que SUBSTRING) o None si la consulta está vacía"""
+        query = query.strip().lower()
+        if not query:
+            return None
+        if "\n" in query:
+            return {}
+
+        matches = {}
+        start = self.text.find(query)
+        while start >= 0:
+            entry = bisect.bisect_right(self.offsets, start) - 1
+            matches[self.owners[entry]] = self.SUBSTRING
+            # Saltamos al siguiente verbo: basta una coincidencia por entrada
+            following = entry + 1
+            if following >= len(self.offsets):
+                break
+            start = self.text.find(query, self.offsets[following])
+
+        i = bisect.bisect_left(self.names, (query,))
+        while i < len(self.names) and self.names[i][0].startswith(query):
+            matches[self.names[i][1]] = self.PREFIX
+            i += 1
+        return matches
+
+class InstalledIndex:
+    """Índice de componentes winetricks instalados en cada prefix
+
+    Cada prefix guarda el conjunto de verbos de su winetricks.log junto con el
+    inodo del log y la posición hasta la que se leyó. Como winetricks solo
+    añade líneas al final, al refrescar se leen únicamente los bytes nuevos;
+    si el log se sustituye o se trunca se vuelve a leer entero. El índice se
+    conserva en disco entre ejecuciones; get() solo lo actualiza en memoria y
+    se escribe con save(), que ConfigManager.flush() llama con el resto de
+    cambios pendientes (y al salir).
+    """
+    def __init__(self, cache_file):
+        self.cache_file = Path(cache_file)
+        self.entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Carga el índice desde disco"""
+        if not self.cache_file.exists():
+            return {}
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {
+                prefix: {"inode": entry["inode"], "offset": entry["offset"], "verbs": set(entry["verbs"])}
+                for prefix, entry in data.items()
+            }
+        except Exception as e:
+            print(f"Error loading installed index: {e}")
+            return {}
+
+    def save(self):
+        """Guarda el índice en disco si ha cambiado"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                prefix: {"inode": entry["inode"], "offset": entry["offset"], "verbs": sorted(entry["verbs"])}
+                for prefix, entry in self.entries.items()
+            }
+            self._dirty = False
+        try:
+            write_json_atomic(self.cache_file, data)
+        except Exception as e:
+            print(f"Error saving installed index: {e}")
+
+    def get(self, prefix_path):
+        """Obtiene el conjunto de verbos instalados en un prefix (no modificar)"""
+        prefix = str(Path(prefix_path).expanduser().resolve())
+        log_path = Path(prefix) / "winetricks.log"
+        with self._lock:
+            if self.entries is None:
+                self.entries = self.load()
+            try:
+                stat = log_path.stat()
+            except OSError:
+                if self.entries.pop(prefix, None) is not None:
+                    self._dirty = True
+                return set()
+
+            entry = self.entries.get(prefix)
+            if entry is None or entry["inode"] != stat.st_ino or stat.st_size < entry["offset"]:
+                entry = {"inode": stat.st_ino, "offset": 0, "verbs": set()}
+                self.entries[prefix] = entry
+                self._dirty = True
+            if stat.st_size > entry["offset"]:
+                self._read_tail(log_path, entry)
+            return entry["verbs"]
+
+    def _read_tail(self, log_path, entry):
+        """Añade al índice las líneas completas escritas desde la última lectura"""
+        try:
+            with open(log_path, 'rb') as f:
+                f.seek(entry["offset"])
+                data = f.read()
+        except OSError as e:
+            print(f"Error reading {log_path}: {e}")
+            return
+
+        # Una línea sin salto final puede estar a medio escribir: se leerá la próxima vez
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            line = line.strip()
+            if line:
+                entry["verbs"].add(line)
+        entry["offset"] += end
+        self._dirty = True
+
+class PrefixCloner:
+    """Copia un prefix completo para crear otro a partir de él
+
+    Los archivos se clonan con reflinks (ioctl FICLONE) si el sistema de
+    archivos lo permite (Btrfs, XFS, bcachefs...): la copia es instantánea y
+    los bloques se comparten hasta que se modifican. Si no, se copian. Nunca
+    se crean enlaces duros entre el origen y la copia (escribir en uno
+    modificaría el otro), pero los enlaces duros internos del prefix se
+    reproducen dentro de la copia. Después se reescriben en los archivos de
+    registro (*.reg) las rutas que apuntaban al prefix de origen.
+    """
+    FICLONE = 0x40049409
+    REFLINK_UNSUPPORTED = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.EBADF)
+
+    def __init__(self, reflink=True):
+        self.reflink = reflink
+        self.stats = {"reflinked": 0, "copied": 0, "hardlinked": 0, "symlinks": 0}
+        self._inodes = {}
+
+    def clone(self, source, target):
+        """Clona source en target (que no debe existir) y devuelve las estadísticas"""
+        source = Path(source).expanduser().resolve()
+        target = Path(target).expanduser().absolute()
+        target.mkdir(parents=True)
+        try:
+            self._clone_tree(source, target)
+        except BaseException:
+            # No dejamos prefixes a medio copiar
+            shutil.rmtree(target, ignore_errors=True)
+            raise
+        return self.stats
+
+    def _clone_tree(self, source, target):
+        directories = [(source, target)]
+        pending = [(source, target)]
+
+        while pending:
+            src_dir, dst_dir = pending.pop()
+            with os.scandir(src_dir) as entries:
+                for entry in entries:
+                    dst = dst_dir / entry.name
+                    if entry.is_symlink():
+                        link = os.readlink(entry.path)
+                        if link == str(source) or link.startswith(str(source) + os.sep):
+                            link = str(target) + link[len(str(source)):]
+                        os.symlink(link, dst)
+                        self.stats["symlinks"] += 1
+                    elif entry.is_dir(follow_symlinks=False):
+                        dst.mkdir()
+                        directories.append((Path(entry.path), dst))
+                        pending.append((Path(entry.path), dst))
+                    elif entry.is_file(follow_symlinks=False):
+                        self._clone_file(entry, dst)
+
+        # Las fechas de los directorios se restauran al final, cuando ya no se escribe en ellos
+        for src_dir, dst_dir in reversed(directories):
+            shutil.copystat(src_dir, dst_dir)
+
+        self.rewrite_registry(target, source, target)
+
+    def _clone_file(self, entry, dst):
+        info = entry.stat(follow_symlinks=False)
+        if info.st_nlink > 1:
+            key = (info.st_dev, info.st_ino)
+            if key in self._inodes:
+                os.link(self._inodes[key], dst)
+                self.stats["hardlinked"] += 1
+                return
+            self._inodes[key] = dst
+
+        if self.reflink and self.reflink_file(entry.path, dst):
+            self.stats["reflinked"] += 1
+        else:
+            # Si el sistema de archivos no admite reflinks no se vuelve a intentar
+            self.reflink = False
+            shutil.copyfile(entry.path, dst)
+            self.stats["copied"] += 1
+        shutil.copystat(entry.path, dst)
+
+    @classmethod
+    def reflink_file(cls, source, target):
+        """Clona un archivo compartiendo bloques; False si no es posible"""
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), cls.FICLONE, src.fileno())
+                return True
+            except OSError as e:
+                if e.errno in cls.REFLINK_UNSUPPORTED:
+                    return False
+                raise
+
+    @staticmethod
+    def rewrite_registry(prefix, old_path, new_path):
+        """Sustituye las rutas al prefix antiguo en los archivos de registro"""
+        old_path, new_path = str(old_path), str(new_path)
+        replacements = [
+            (old_path.encode("utf-8"), new_path.encode("utf-8")),
+            # Rutas de Windows a través de la unidad Z: (con las barras escapadas del formato .reg)
+            (("Z:" + old_path.replace("/", "\\\\")).encode("utf-8"),
+             ("Z:" + new_path.replace("/", "\\\\")).encode("utf-8")),
+        ]
+        for reg_file in Path(prefix).glob("*.reg"):
+            with open(reg_file, 'rb') as f:
+                data = f.read()
+            new_data = data
+            for old, new in replacements:
+                # Solo rutas completas: /prefix o /prefix/..., no /prefix2
+                new_data = re.sub(re.escape(old) + rb'(?=[/\\"\s]|$)', lambda m, new=new: new, new_data)
+            if new_data != data:
+                mode = reg_file.stat().st_mode & 0o7777
+                fd, tmp_path = tempfile.mkstemp(dir=str(reg_file.parent), prefix=f".{reg_file.name}.")
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(new_data)
+                os.chmod(tmp_path, mode)
+                os.replace(tmp_path, reg_file)
+
+class ConfigManager:
+    """Gestor optimizado de configuraciones persistentes
+
+    Los cambios se guardan de forma diferida: save_configs() solo marca la
+    configuración como modificada y, si hay un planificador asignado en
+    schedule_save (la GUI usa un QTimer), agrupa las escrituras en una sola.
+    flush() escribe inmediatamente si hay cambios pendientes. Con SQLite solo
+    se escriben las secciones y los programas marcados, y los programas no se
+    leen hasta que se piden.
+    """
+    SAVE_DEBOUNCE_MS = 500
+    SECTIONS = ("meta", "configs", "settings")
+
+    def __init__(self):
+        config_dir = Path.home() / ".config" / "WineProtonManager"
+        self.config_file = config_dir / "config.json"
+        config_dir.mkdir(parents=True, exist_ok=True)
+        self.backend = self.create_backend()
+        self.tools = ToolRegistry()
+        self.version_cache = VersionCache(config_dir / "version_cache.json", self.tools)
+        self.installed_index = InstalledIndex(config_dir / "installed_index.json")
+        self.verb_catalog = VerbCatalog(config_dir / "verb_catalog.json")
+        self.schedule_save = None
+        self._dirty = False
+        self._dirty_sections = set()
+        self._dirty_programs = set()
+        self._program_index = None
+        self._program_ids = None
+        self._program_index_size = 0
+        
+        self.configs = self.load_configs()
+        if "custom_programs" in self.configs:
+            self.normalize_custom_programs()
+        self.ensure_default_config()
+        atexit.register(self.flush)
+
+    def create_backend(self):
+        """Elige el almacenamiento: SQLite si existe config.db, JSON en caso contrario"""
+        db_file = self.config_file.with_name("config.db")
+        if db_file.exists():
+            return SqliteConfigBackend(db_file)
+        return JsonConfigBackend(self.config_file)
+
+    def get_storage_backend(self):
+        """Obtiene el almacenamiento actual (json/sqlite)"""
+        return self.backend.name
+
+    def set_storage_backend(self, name):
+        """Cambia el almacenamiento (json/sqlite) migrando configuración e historial"""
+        if name == self.backend.name:
+            return
+
+        # La migración parte de lo que hay en disco: se escribe todo lo pendiente
+        self._dirty_sections.update(self.SECTIONS)
+        self._dirty = True
+        self.flush()
+
+        if name == "sqlite":
+            backend = SqliteConfigBackend(self.config_file.with_name("config.db"))
+            backend.import_json(self.config_file)
+        else:
+            self._programs()  # El JSON se guarda entero: los programas tienen que estar en memoria
+            backend = JsonConfigBackend(self.config_file)
+            self.backend.export_json(self.config_file)
+
+        old_backend, self.backend = self.backend, backend
+        old_backend.move_aside(".bak")
+
+    def ensure_default_config(self):
+        """Garantiza la existencia de configuraciones básicas (solo guarda si faltaba algo)"""
+        changed = "configs" not in self.configs or "last_used" not in self.configs or "settings" not in self.configs
+        configs = self.configs.setdefault("configs", {})
+        self.configs.setdefault("last_used", "Wine-System")
+        
+        if "Wine-System" not in configs:
+            configs["Wine-System"] = {
+                "type": "wine",
+                "prefix": str(Path.home() / ".wine"),
+                "arch": "win64"
+            }
+            changed = True
+        
+        settings = self.configs.setdefault("settings", {
+            "winetricks_path": str(Path(__file__).parent / "AppDir" / "usr" / "bin" / "winetricks"),
+            "config_path": str(self.config_file),
+            "prefix_path": str(Path.home() / "WineProtonManager"),
+            "theme": "light",
+            "window_size": [900, 650]
+        })
+        
+        Path(settings["prefix_path"]).mkdir(parents=True, exist_ok=True)
+        if changed or not self.backend.exists():
+            self.save_configs()
+
+    def load_configs(self):
+        """Carga configuraciones optimizada"""
+        default = {
+            "configs": {},
+            "last_used": "Wine-System",
+            "custom_programs": [],
+            "settings": {
+                "winetricks_path": str(Path(__file__).parent / "AppDir" / "usr" / "bin" / "winetricks"),
+                "config_path": str(self.config_file),
+                "prefix_path": str(Path.home() / "WineProtonManager"),
+                "theme": "light",
+                "window_size": [900, 650]
+            }
+        }
+        
+        try:
+            loaded = self.backend.load()
+        except Exception as e:
+            print(f"Error loading config: {e}")
+            # Conservamos el archivo dañado para no perderlo al guardar los valores por defecto
+            self.backend.move_aside()
+            return default
+
+        if loaded is None:
+            return default
+
+        loaded.setdefault("settings", default["settings"])
+        return loaded
+
+    def save_configs(self, *sections):
+        """Marca secciones de la configuración como modificadas y programa su guardado
+
+        Las secciones son meta (last_used, plantillas...), configs y settings;
+        sin indicar ninguna se marcan todas.
+        """
+        self._dirty_sections.update(sections or self.SECTIONS)
+        self._schedule_save()
+
+    def _save_programs(self, positions):
+        """Marca programas personalizados (por posición) como modificados y programa su guardado"""
+        self._dirty_programs.update(positions)
+        self._schedule_save()
+
+    def _schedule_save(self):
+        self._dirty = True
+        if self.schedule_save:
+            self.schedule_save()
+        else:
+            self.flush()
+
+    def flush(self):
+        """Escribe la configuración y el índice de componentes si hay cambios pendientes"""
+        self.installed_index.save()
+        if not self._dirty:
+            return
+
+        try:
+            self.backend.save(self.configs, self._dirty_sections, self._dirty_programs)
+            self._dirty = False
+            self._dirty_sections.clear()
+            self._dirty_programs.clear()
+        except Exception as e:
+            print(f"Error saving config: {e}")
+
+    def add_install_history(self, config_name, item, item_type, status, message=""):
+        """Registra el resultado de la instalación de un item"""
+        try:
+            self.backend.append_history({
+                "timestamp": time.time(),
+                "config": config_name,
+                "item": item,
+                "type": item_type,
+                "status": status,
+                "message": message
+            })
+        except Exception as e:
+            print(f"Error saving install history: {e}")
+
+    def get_install_history(self, config_name=None, limit=100):
+        """Obtiene el historial de instalaciones (más recientes primero)"""
+        try:
+            return self.backend.load_history(config_name, limit)
+        except Exception as e:
+            print(f"Error loading install history: {e}")
+            return []
+
+    def get_config(self, config_name):
+        """Obtiene una configuración específica por nombre"""
+        return self.configs["configs"].get(config_name)
+
+    @TRACER.traced(category="config", with_args=True)
+    def get_current_env(self, config_name, resolve_versions=True):
+        """Obtiene el entorno para la configuración actual"""
+        config = self.get_config(config_name)
+        if not config:
+            return None
+
+        env = os.environ.copy()
+        env["WINEPREFIX"] = config["prefix"]
+        env["WINEARCH"] = config.get("arch", "win64")
+
+        if config.get("type") == "proton":
+            proton_dir = Path(config["proton_dir"])
+            env.update({
+                "PROTON_DIR": str(proton_dir),
+                "WINE": str(proton_dir / "files/bin/wine"),
+                "WINESERVER": str(proton_dir / "files/bin/wineserver"),
+                "PATH": f"{proton_dir / 'files/bin'}:{os.environ.get('PATH', '')}"
+            })
+            version_file = proton_dir / "version"
+            if version_file.exists():
+                with open(version_file, 'r', encoding='utf-8') as f:
+                    env["PROTON_VERSION"] = f.read().strip()
+
+            if resolve_versions:
+                version = self.version_cache.get_version(str(proton_dir / "files/bin/wine"), env)
+                if version:
+                    env["WINE_VERSION_IN_PROTON"] = version
+        else:
+            wine_dir = config.get("wine_dir")
+            if wine_dir:
+                wine_dir = Path(wine_dir)
+                env.update({
+                    "WINE": str(wine_dir / "bin/wine"),
+                    "WINESERVER": str(wine_dir / "bin/wineserver"),
+                    "PATH": f"{wine_dir / 'bin'}:{os.environ.get('PATH', '')}"
+                })
+            else:
+                env.update({
+                    "WINE": "wine",
+                    "WINESERVER": "wineserver"
+                })
+
+            if resolve_versions:
+                version = self.version_cache.get_version(self.get_wine_binary(config))
+                if version:
+                    env["WINE_VERSION"] = version
+
+        return env
+
+    def get_wine_binary(self, config):
+        """Obtiene el binario de wine que usa una configuración"""
+        return self.tools.runner_binary(config, "wine")
+
+    def probe_config(self, config_name, timeout=30):
+        """Comprueba que el runner de una configuración responde a 'wine --version'"""
+        result = {"ok": False, "version": "", "latency": 0.0, "error": ""}
+        config = self.get_config(config_name)
+        if not config:
+            result["error"] = "Configuración no encontrada"
+            return result
+
+        start = time.monotonic()
+        try:
+            env = self.get_current_env(config_name, resolve_versions=False)
+            cmd = [self.get_wine_binary(config), "--version"]
+            process = run_process(
+                cmd,
+                env=env,
+                capture_output=True, text=True,
+                timeout=timeout
+            )
+            if process.returncode == 0:
+                result["ok"] = True
+                result["version"] = process.stdout.strip()
+                self.version_cache.store(cmd[0], result["version"])
+            else:
+                result["error"] = (process.stderr or process.stdout).strip()
+        except subprocess.TimeoutExpired:
+            result["error"] = f"Sin respuesta tras {timeout} s"
+        except Exception as e:
+            result["error"] = str(e)
+
+        result["latency"] = time.monotonic() - start
+        return result
+
+    def normalize_custom_programs(self):
+        """Completa los programas guardados con tipo por defecto e identificador estable"""
+        changed = []
+        for position, program in enumerate(self._programs()):
+            if "type" not in program or "id" not in program:
+                program.setdefault("type", "winetricks")
+                program.setdefault("id", uuid.uuid4().hex)
+                changed.append(position)
+
+        if changed:
+            self._program_index = None
+            self._save_programs(changed)
+
+    def _programs(self):
+        """Lista de programas personalizados (con SQLite se lee la primera vez que se pide)"""
+        programs = self.configs.get("custom_programs")
+        if programs is None:
+            programs = self.configs["custom_programs"] = self.backend.load_programs()
+            self.normalize_custom_programs()
+        return programs
+
+    def get_custom_program_index(self):
+        """Obtiene el índice nombre -> posición de los programas personalizados"""
+        programs = self._programs()
+        if self._program_index is None or self._program_index_size != len(programs):
+            index = {}
+            ids = {}
+            for i, program in enumerate(programs):
+                index.setdefault(program["name"], i)
+                ids[program.get("id")] = i
+            self._program_index = index
+            self._program_ids = ids
+            self._program_index_size = len(programs)
+        return self._program_index
+
+    def get_custom_program(self, program_id):
+        """Obtiene un programa personalizado por su identificador (None si ya no existe)"""
+        self.get_custom_program_index()
+        position = self._program_ids.get(program_id)
+        if position is None:
+            return None
+        return self._programs()[position]
+
+    def add_custom_program(self, name, path, program_type="winetricks"):
+        """Añade un programa personalizado y devuelve su identificador"""
+        return self.add_custom_programs([{"name": name, "path": path, "type": program_type}])[0]
+
+    def add_custom_programs(self, records):
+        """Añade varios programas personalizados con un único guardado
+
+        Si ya existe un programa con el mismo nombre se actualiza en lugar de
+        duplicarlo, conservando su identificador. Devuelve los identificadores.
+        """
+        programs = self._programs()
+        index = self.get_custom_program_index()
+
+        program_ids = []
+        positions = []
+        for record in records:
+            record = dict(record)
+            record.setdefault("type", "winetricks")
+            position = index.get(record["name"])
+            if position is None:
+                record.setdefault("id", uuid.uuid4().hex)
+                position = len(programs)
+                index[record["name"]] = position
+                self._program_ids[record["id"]] = position
+                programs.append(record)
+            else:
+                record["id"] = programs[position].get("id") or uuid.uuid4().hex
+                self._program_ids[record["id"]] = position
+                programs[position] = record
+            program_ids.append(record["id"])
+            positions.append(position)
+
+        self._program_index_size = len(programs)
+        self._save_programs(positions)
+        return program_ids
+
+    def update_custom_programs(self, updates):
+        """Actualiza varios programas personalizados ({nombre: campos}) con un único guardado"""
+        programs = self._programs()
+        index = self.get_custom_program_index()
+
+        positions = []
+        for name, fields in updates.items():
+            position = index.get(name)
+            if position is None:
+                continue
+            programs[position].update(fields)
+            positions.append(position)
+            if fields.get("name", name) != name or "id" in fields:
+                self._program_index = None
+
+        if positions:
+            self._save_programs(positions)
+        return len(positions)
+
+    def remove_custom_program(self, program_name):
+        """Elimina un programa personalizado por nombre"""
+        return self.remove_custom_programs([program_name]) > 0
+
+    def remove_custom_programs(self, program_names):
+        """Elimina varios programas personalizados por nombre con un único guardado"""
+        names = set(program_names)
+        programs = self._programs()
+        kept = [program for program in programs if program["name"] not in names]
+        removed = len(programs) - len(kept)
+
+        if removed:
+            # Las posiciones se desplazan desde el primer programa eliminado
+            first = next(i for i, program in enumerate(programs) if program["name"] in names)
+            programs[:] = kept
+            self._program_index = None
+            self._save_programs(range(first, len(kept)))
+
+        return removed
+
+    def get_custom_programs(self):
+        """Obtiene la lista de programas personalizados (sin copiarla ni modificarla)"""
+        return self._programs()
+        
+    def set_theme(self, theme):
+        """Establece el tema (light/dark)"""
+        if "settings" not in self.configs:
+            self.configs["settings"] = {}
+        self.configs["settings"]["theme"] = theme
+        self.save_configs("settings")
+
+    def get_theme(self):
+        """Obtiene el tema actual"""
+        return self.configs["settings"].get("theme", "light")
+        
+    def get_log_dir(self):
+        """Obtiene el directorio donde se guardan los logs de instalación"""
+        return Path.home() / ".cache" / "WineProtonManager" / "logs"
+
+    def set_use_terminal(self, enabled):
+        """Establece si cada item se instala en su propia ventana de Konsole"""
+        self.configs["settings"]["use_terminal"] = bool(enabled)
+        self.save_configs("settings")
+
+    def get_use_terminal(self):
+        """Indica si cada item se instala en su propia ventana de Konsole"""
+        return self.configs["settings"].get("use_terminal", False)
+
+    def set_prefetch_jobs(self, jobs):
+        """Establece cuántas descargas de winetricks se adelantan a la vez (0 las desactiva)"""
+        self.configs["settings"]["prefetch_jobs"] = max(0, int(jobs))
+        self.save_configs("settings")
+
+    def get_prefetch_jobs(self):
+        """Obtiene cuántas descargas de winetricks se adelantan a la vez"""
+        return self.configs["settings"].get("prefetch_jobs", DownloadPrefetcher.DEFAULT_WORKERS)
+
+    def get_winetricks_path(self):
+        """Obtiene la ruta de winetricks (sistema -> configurada -> interna)"""
+        # Primero intentamos con el winetricks del sistema
+        system_path = self.tools.which("winetricks")
+        if system_path:
+            return system_path
+        
+        # Luego probamos con la ruta configurada
+        configured_path = self.configs["settings"].get("winetricks_path", "")
+        if configured_path:
+            path_obj = Path(configured_path)
+            if path_obj.exists() and path_obj.is_file():
+                return configured_path
+        
+        # Finalmente probamos con la ruta interna
+        internal_path = Path(__file__).parent / "AppDir" / "usr" / "bin" / "winetricks"
+        if internal_path.exists():
+            return str(internal_path)
+        
+        # Si todo falla, devolvemos solo el comando
+        return "winetricks"
+
+    def set_winetricks_path(self, path):
+        """Establece y valida la ruta de winetricks (False si la ruta no es válida)"""
+        if not path:
+            return True
+        
+        path = path.strip()
+        
+        if path == "winetricks":
+            valid = True
+        else:
+            path_obj = Path(path)
+            valid = path_obj.exists() and path_obj.is_file()
+        
+        if not valid:
+            return False
+        
+        self.configs["settings"]["winetricks_path"] = path
+        self.save_configs("settings")
+        return True
+    
+    def set_config_path(self, path):
+        """Establece la ruta del archivo de configuración"""
+        self.configs["settings"]["config_path"] = path
+        self.save_configs("settings")
+    
+    def get_config_path(self):
+        """Obtiene la ruta del archivo de configuración"""
+        return self.configs["settings"].get("config_path", str(Path.home() / ".config/wineprotonmanager_config.json"))
+    
+    def set_prefix_path(self, path):
+        """Establece la ruta para los prefixes"""
+        self.configs["settings"]["prefix_path"] = path
+        self.save_configs("settings")
+    
+    def get_prefix_path(self):
+        """Obtiene la ruta para los prefixes"""
+        return self.configs["settings"].get("prefix_path", str(Path.home() / "WineProtonManager"))
+
+    def remove_config(self, config_name):
+        """Elimina una configuración guardada"""
+        if config_name in self.configs["configs"]:
+            del self.configs["configs"][config_name]
+            if self.configs["last_used"] == config_name:
+                self.configs["last_used"] = "Wine-System" if "Wine-System" in self.configs["configs"] else ""
+            self.save_configs("configs", "meta")
+            return True
+        return False
+
+    def get_templates_dir(self):
+        """Directorio donde se guardan los prefixes plantilla (junto a los prefixes para poder usar reflinks)"""
+        return Path(self.get_prefix_path()).expanduser() / ".templates"
+
+    def get_templates(self):
+        """Obtiene las plantillas registradas ({nombre: datos})"""
+        return self.configs.get("templates", {})
+
+    def template_key(self, config, components):
+        """Clave de una plantilla: runner + arquitectura + componentes instalados"""
+        if config.get("type") == "proton":
+            runner = f"proton:{Path(config['proton_dir']).expanduser().resolve()}"
+        else:
+            binary = self.get_wine_binary(config)
+            runner = f"wine:{self.version_cache.resolve_binary(binary) or binary}"
+        return f"{runner}|{config.get('arch', 'win64')}|{'+'.join(sorted(components))}"
+
+    def find_template(self, config, components, exact=False):
+        """Busca una plantilla con el mismo runner y arquitectura
+
+        Con exact=True también deben coincidir los componentes. Si no, sirve
+        cualquier plantilla cuyos componentes estén todos en components (se
+        elige la que tiene más), para clonarla e instalar encima lo que falte.
+        """
+        key = self.template_key(config, components)
+        runner = key.rsplit("|", 1)[0]
+        components = set(components)
+        best, best_size = None, -1
+        for name, template in self.get_templates().items():
+            if not Path(template["path"]).exists():
+                continue
+            if exact:
+                if template.get("key") == key:
+                    return name
+                continue
+            included = set(template.get("components", []))
+            if template.get("key", "").rsplit("|", 1)[0] == runner and included <= components \
+                    and len(included) > best_size:
+                best, best_size = name, len(included)
+        return best
+
+    def prepare_template(self, config_name, template_name, timeout=60):
+        """Copia el prefix de una configuración como plantilla (sin registrarla)
+
+        Espera a que termine el wineserver del prefix para copiar un registro
+        consistente. Devuelve los datos de la plantilla para add_template().
+        """
+        config = self.get_config(config_name)
+        if not config:
+            raise ValueError(f"No existe la configuración '{config_name}'")
+        if template_name in self.get_templates():
+            raise ValueError(f"Ya existe la plantilla '{template_name}'")
+
+        source = Path(config["prefix"]).expanduser()
+        if not (source / "system.reg").exists():
+            raise ValueError(f"El prefix {source} no está inicializado")
+
+        env = self.get_current_env(config_name, resolve_versions=False)
+        try:
+            run_process([env.get("WINESERVER", "wineserver"), "-w"], env=env, timeout=timeout,
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"El prefix {source} sigue en uso; cierre los programas que lo usan")
+        except OSError:
+            pass
+
+        components = sorted(self.get_installed_winetricks(source))
+        existing = self.find_template(config, components, exact=True)
+        if existing:
+            raise ValueError(f"La plantilla '{existing}' ya tiene el mismo runner, arquitectura y componentes")
+        target = self.get_templates_dir() / re.sub(r"[^\w.-]+", "_", template_name)
+        PrefixCloner().clone(source, target)
+        runner = {key: value for key, value in config.items() if key != "prefix"}
+        return {
+            "path": str(target),
+            "source": config_name,
+            "config": runner,
+            "components": components,
+            "key": self.template_key(config, components),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def add_template(self, template_name, template):
+        """Registra una plantilla preparada con prepare_template()"""
+        self.configs.setdefault("templates", {})[template_name] = template
+        self.save_configs("meta")
+
+    def register_template(self, config_name, template_name):
+        """Copia el prefix de una configuración y lo registra como plantilla"""
+        template = self.prepare_template(config_name, template_name)
+        self.add_template(template_name, template)
+        return template
+
+    def remove_template(self, template_name):
+        """Elimina una plantilla y su copia del prefix"""
+        template = self.get_templates().pop(template_name, None)
+        if template is None:
+            return False
+        shutil.rmtree(template["path"], ignore_errors=True)
+        self.save_configs("meta")
+        return True
+
+    def clone_template(self, template_name, prefix):
+        """Crea un prefix nuevo clonando una plantilla; devuelve las estadísticas de la copia"""
+        template = self.get_templates().get(template_name)
+        if not template:
+            raise ValueError(f"No existe la plantilla '{template_name}'")
+        if Path(prefix).expanduser().exists():
+            raise FileExistsError(f"El prefix {prefix} ya existe")
+        return PrefixCloner().clone(template["path"], prefix)
+
+    def add_config_from_template(self, template_name, config_name, prefix):
+        """Registra una configuración que usa un prefix clonado de una plantilla"""
+        config = dict(self.get_templates()[template_name]["config"])
+        config["prefix"] = str(Path(prefix).expanduser().absolute())
+        self.configs["configs"][config_name] = config
+        self.save_configs("configs")
+        return config
+
+    def create_config_from_template(self, template_name, config_name, prefix=None):
+        """Crea una configuración nueva con un prefix clonado de una plantilla"""
+        if config_name in self.configs["configs"]:
+            raise ValueError(f"Ya existe la configuración '{config_name}'")
+        prefix = prefix or str(Path(self.get_prefix_path()).expanduser() / config_name)
+        stats = self.clone_template(template_name, prefix)
+        self.add_config_from_template(template_name, config_name, prefix)
+        return stats
+
+    def get_installed_winetricks(self, prefix_path):
+        """Obtiene el conjunto de componentes winetricks instalados en un prefix"""
+        return self.installed_index.get(prefix_path)
+
+    def get_verb_catalog(self, refresh=True):
+        """Obtiene el catálogo de verbos de winetricks ({categoría: [[verbo, descripción]]})
+
+        Con refresh=False solo se usa la caché (None si no es válida); si no,
+        se ejecuta winetricks list-all cuando haga falta.
+        """
+        winetricks_path = self.get_winetricks_path()
+        if not refresh:
+            return self.verb_catalog.cached(winetricks_path)
+        return self.verb_catalog.load(winetricks_path)
+
+    def plan_install(self, config_name, items, item_types, reinstall=(), use_template=False):
+        """Ordena los items según las dependencias de winetricks y omite los ya instalados
+
+        Con use_template, si el prefix aún no existe (o está vacío) y hay una
+        plantilla compatible (find_template) con los verbos del plan, plan.template
+        indica su nombre: el prefix se crea clonándola y se omiten sus componentes.
+        """
+        config = self.get_config(config_name)
+        planner = InstallPlanner(WinetricksScript.load(self.get_winetricks_path()))
+        plan = planner.plan(items, item_types, self.get_installed_winetricks(config["prefix"]), reinstall)
+
+        prefix = Path(config["prefix"]).expanduser()
+        if use_template and not (prefix.exists() and any(prefix.iterdir())):
+            verbs = [item for item, item_type in zip(plan.items, plan.item_types) if item_type == "winetricks"]
+            template = self.find_template(config, verbs)
+            if template:
+                plan = planner.plan(items, item_types, self.get_templates()[template]["components"], reinstall)
+                plan.template = template
+                for idx, reason in plan.skipped.items():
+                    if reason == "Ya instalado":
+                        plan.skipped[idx] = f"Incluido en la plantilla '{template}'"
+        return plan
+
+    def save_window_size(self, size):
+        """Guarda el tamaño de la ventana ([ancho, alto])"""
+        settings = self.configs.setdefault("settings", {})
+        if settings.get("window_size") == [size[0], size[1]]:
+            return
+        settings["window_size"] = [size[0], size[1]]
+        self.save_configs("settings")
+    
+    def get_window_size(self):
+        """Obtiene el tamaño guardado de la ventana ([ancho, alto])"""
+        size = self.configs["settings"].get("window_size", [900, 650])
+        return [size[0], size[1]]
+
+class WinetricksDownload:
+    """Archivo que descarga un verbo de winetricks (w_download / w_download_to)"""
+    __slots__ = ("package", "url", "checksum", "filename")
+
+    def __init__(self, package, url, checksum="", filename=""):
+        self.package = package
+        self.url = url
+        self.checksum = checksum.lower()
+        self.filename = filename or url.rstrip("/").rsplit("/", 1)[-1]
+
+    @property
+    def key(self):
+        return (self.package, self.filename)
+
+class WinetricksScript:
+    """Metadatos de los verbos extraídos del script de winetricks
+
+    downloads: {verbo: [WinetricksDownload]} con las descargas de URL literal;
+    las que dependen de variables del script las sigue descargando winetricks.
+    dependencies: {verbo: [verbos]} con los w_call incondicionales (los del
+    cuerpo de load_<verbo>, no los que están dentro de un if/case).
+    El análisis se guarda en memoria mientras el script no cambie.
+    """
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, downloads=None, dependencies=None):
+        self.downloads = downloads or {}
+        self.dependencies = dependencies or {}
+
+    @classmethod
+    def load(cls, script_path):
+        """Analiza el script de winetricks (vacío si no se puede leer)"""
+        if os.sep not in str(script_path):
+            script_path = shutil.which(script_path) or script_path
+        try:
+            script_path = Path(script_path).resolve()
+            stat = script_path.stat()
+        except OSError:
+            return cls()
+
+        key = (str(script_path), stat.st_size, stat.st_mtime_ns)
+        with cls._cache_lock:
+            if key not in cls._cache:
+                try:
+                    with open(script_path, 'r', encoding='utf-8', errors='replace') as f:
+                        cls._cache[key] = cls.parse(f)
+                except OSError as e:
+                    print(f"Error reading winetricks script: {e}")
+                    return cls()
+            return cls._cache[key]
+
+    @classmethod
+    def parse(cls, lines):
+        script = cls()
+        verb = None
+        for line in lines:
+            if verb is None:
+                match = re.match(r"load_([\w.+-]+)\(\)", line)
+                if match:
+                    verb = match.group(1)
+                continue
+            if line.startswith("}"):
+                verb = None
+                continue
+
+            stripped = line.strip()
+            if not stripped.startswith(("w_download", "w_call")):
+                continue
+            try:
+                args = shlex.split(stripped, comments=True)
+            except ValueError:
+                continue
+
+            if args[0] == "w_call" and len(args) == 2:
+                # Solo las dependencias del primer nivel de la función son incondicionales
+                top_level = len(line) - len(line.lstrip()) <= 4 and not line.startswith("\t\t")
+                if top_level and "$" not in args[1] and args[1] != verb:
+                    dependencies = script.dependencies.setdefault(verb, [])
+                    if args[1] not in dependencies:
+                        dependencies.append(args[1])
+                continue
+
+            if args[0] == "w_download" and len(args) >= 2:
+                package, args = verb, args[1:4]
+            elif args[0] == "w_download_to" and len(args) >= 3:
+                package, args = args[1], args[2:5]
+            else:
+                continue
+            url = args[0]
+            if "$" in package or "$" in "".join(args) or not url.startswith(("http://", "https://")):
+                continue
+
+            checksum = args[1] if len(args) > 1 else ""
+            filename = args[2] if len(args) > 2 else ""
+            script.downloads.setdefault(verb, []).append(WinetricksDownload(package, url, checksum, filename))
+        return script
+
+class InstallPlan:
+    """Plan de instalación ordenado
+
+    sources indica la posición en la lista original de cada item del plan
+    (None para las dependencias añadidas), required_by el verbo que añadió
+    cada dependencia y skipped {posición original: motivo} los que se omiten.
+    template es la plantilla de la que se clona el prefix, si la hay.
+    """
+    def __init__(self):
+        self.items = []
+        self.item_types = []
+        self.sources = []
+        self.required_by = []
+        self.skipped = {}
+        self.template = None
+
+    def add(self, item, item_type, source=None, required_by=None):
+        self.items.append(item)
+        self.item_types.append(item_type)
+        self.sources.append(source)
+        self.required_by.append(required_by)
+
+class InstallPlanner:
+    """Ordena los verbos de winetricks según sus dependencias
+
+    Cada verbo se instala después de sus dependencias (orden topológico del
+    grafo de w_call), una sola vez y solo si no está ya en el prefix (salvo
+    los indicados en reinstall). Los instaladores .exe/.msi conservan su
+    posición relativa en la cola.
+    """
+    def __init__(self, script):
+        self.dependencies = script.dependencies
+
+    def plan(self, items, item_types, installed=(), reinstall=()):
+        """Devuelve un InstallPlan con los items en orden de instalación"""
+        installed = set(installed) - set(reinstall)
+        requested = {}
+        for idx, (item, item_type) in enumerate(zip(items, item_types)):
+            if item_type == "winetricks":
+                requested.setdefault(item, idx)
+
+        plan = InstallPlan()
+        visited = set()
+
+        def visit(verb, required_by, path):
+            if verb in visited:
+                return
+            if verb in path:
+                print(f"Error planning {verb}: dependency cycle {' -> '.join(path)}")
+                return
+            if verb in installed:
+                visited.add(verb)
+                if verb in requested:
+                    plan.skipped[requested[verb]] = "Ya instalado"
+                return
+
+            path.append(verb)
+            for dependency in self.dependencies.get(verb, ()):
+                visit(dependency, verb, path)
+            path.pop()
+
+            visited.add(verb)
+            source = requested.get(verb)
+            plan.add(verb, "winetricks", source, None if source is not None else required_by)
+
+        for idx, (item, item_type) in enumerate(zip(items, item_types)):
+            if item_type != "winetricks":
+                plan.add(item, item_type, idx)
+            elif requested[item] != idx:
+                plan.skipped[idx] = "Duplicado"
+            else:
+                visit(item, None, [])
+        return plan
+
+def winetricks_cache_dir(env=None):
+    """Directorio de caché de descargas de winetricks (W_CACHE)"""
+    env = env if env is not None else os.environ
+    if env.get("W_CACHE"):
+        return Path(env["W_CACHE"])
+    return Path(env.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "winetricks"
+
+class DownloadPrefetcher:
+    """Descarga por adelantado los archivos de los verbos de winetricks
+
+    Mientras se instala un item se descargan los de los siguientes en la caché
+    de winetricks, que después encuentra el archivo y no lo vuelve a bajar. Las
+    descargas se comparten entre prefixes y se limitan a max_workers a la vez.
+    opener recibe un urllib.request.Request y devuelve un objeto de lectura
+    (por defecto urllib.request.urlopen); catalog permite indicar las descargas
+    de cada verbo sin leer el script de winetricks.
+    """
+    DEFAULT_WORKERS = 2
+    CHUNK_SIZE = 1 << 16
+    TIMEOUT = 60
+
+    def __init__(self, winetricks_path="winetricks", cache_dir=None, max_workers=None, opener=None, catalog=None):
+        self.winetricks_path = winetricks_path
+        self.cache_dir = Path(cache_dir) if cache_dir else winetricks_cache_dir()
+        # Los módulos de red se cargan al crear el prefetcher, no al arrancar
+        from concurrent.futures import ThreadPoolExecutor
+        import urllib.request
+
+        self.max_workers = max(1, max_workers or self.DEFAULT_WORKERS)
+        self.opener = opener or urllib.request.urlopen
+        self._catalog = catalog
+        self._executor = ThreadPoolExecutor(self.max_workers)
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._is_running = True
+
+    def downloads(self, verb):
+        """Obtiene las descargas conocidas de un verbo"""
+        with self._lock:
+            if self._catalog is None:
+                self._catalog = WinetricksScript.load(self.winetricks_path).downloads
+        return self._catalog.get(verb, [])
+
+    def prefetch(self, verbs):
+        """Encola la descarga de los archivos de los verbos indicados"""
+        for verb in verbs:
+            for download in self.downloads(verb):
+                with self._lock:
+                    if not self._is_running or download.key in self._futures:
+                        continue
+                    self._futures[download.key] = self._executor.submit(self._fetch, download)
+
+    def wait(self, verb, timeout=None):
+        """Espera a que terminen las descargas de un verbo
+
+        Los fallos no son fatales: winetricks volverá a intentar la descarga.
+        """
+        from concurrent.futures import wait as wait_futures
+
+        downloads = self.downloads(verb)
+        with self._lock:
+            futures = [self._futures[d.key] for d in downloads if d.key in self._futures]
+        wait_futures(futures, timeout)
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception():
+                print(f"Error prefetching {verb}: {future.exception()}")
+
+    def path_for(self, download):
+        return self.cache_dir / download.package / download.filename
+
+    def _fetch(self, download):
+        target = self.path_for(download)
+        if target.exists() and (not download.checksum or self._checksum(target, download.checksum) == download.checksum):
+            return target
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        import urllib.request
+
+        hasher = hashlib.new("sha1" if len(download.checksum) == 40 else "sha256")
+        request = urllib.request.Request(download.url, headers={"User-Agent": "WineProtonManager"})
+        fd, tmp_path = tempfile.mkstemp(dir=str(target.parent), prefix=f".{download.filename}.", suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f, self.opener(request, timeout=self.TIMEOUT) as response:
+                for chunk in iter(lambda: response.read(self.CHUNK_SIZE), b""):
+                    if not self._is_running:
+                        raise InstallCancelled("Descarga cancelada")
+                    f.write(chunk)
+                    hasher.update(chunk)
+            if download.checksum and hasher.hexdigest() != download.checksum:
+                raise ValueError(f"Checksum incorrecto para {download.url}")
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return target
+
+    def _checksum(self, path, reference):
+        hasher = hashlib.new("sha1" if len(reference) == 40 else "sha256")
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def stop(self):
+        """Cancela las descargas pendientes y corta las que están en curso"""
+        with self._lock:
+            self._is_running = False
+            for future in self._futures.values():
+                future.cancel()
+        self._executor.shutdown(wait=False)
+
+class InstallError(subprocess.CalledProcessError):
+    """Fallo de instalación con las últimas líneas de salida y la ruta del log completo"""
+    def __init__(self, returncode, cmd, output=None, log_path=None):
+        super().__init__(returncode, cmd, output)
+        self.log_path = log_path
+
+    def __str__(self):
+        message = super().__str__()
+        if self.output:
+            message += f"\n\n{self.output}"
+        if self.log_path:
+            message += f"\n\nRegistro completo: {self.log_path}"
+        return message
+
+class InstallCancelled(Exception):
+    """La instalación se canceló mientras se ejecutaba un item"""
+
+class InstallEngine:
+    """Motor de instalación de componentes winetricks y programas (.exe/.msi)
+
+    Sin terminal, la salida de cada proceso se lee línea a línea y se entrega a
+    on_output. Con terminal (ruta de konsole) cada item se abre en su propia
+    ventana. Si se indica log_dir, la salida completa de cada item se guarda
+    en un archivo de log.
+
+    Cada proceso se lanza en su propio grupo de procesos para que stop() pueda
+    terminar el árbol completo (SIGTERM y, pasado TERMINATE_TIMEOUT, SIGKILL)
+    y después el wineserver del prefix.
+
+    Con un DownloadPrefetcher, mientras se instala un item se descargan los
+    archivos de los prefetch_ahead verbos siguientes. Con force=False winetricks
+    omite las dependencias que ya están instaladas (útil con un InstallPlan);
+    los verbos de force_items se reinstalan igualmente.
+    """
+    OUTPUT_TAIL_LINES = 40
+    OUTPUT_LINE_LIMIT = 8192
+    TERMINATE_TIMEOUT = 2
+    WINESERVER_TIMEOUT = 10
+
+    def __init__(self, env, winetricks_path="winetricks", silent_mode=False, terminal=None, log_dir=None,
+                 prefetcher=None, prefetch_ahead=None, force=True, force_items=()):
+        self.env = env
+        self.winetricks_path = winetricks_path
+        self.silent_mode = silent_mode
+        self.force = force
+        self.force_items = set(force_items)
+        self.terminal = terminal
+        self.log_dir = Path(log_dir) if log_dir else None
+        self.prefetcher = prefetcher
+        self.prefetch_ahead = prefetch_ahead or (prefetcher.max_workers if prefetcher else 0)
+        self._is_running = True
+        self._process = None
+        self._terminator = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def display_name(item_path, item_type):
+        """Obtiene el nombre que se muestra para un item"""
+        return Path(item_path).name if item_type == "exe" else item_path
+
+    def wine_binary(self):
+        """Obtiene el binario de wine del entorno"""
+        if "PROTON_DIR" in self.env:
+            return str(Path(self.env["PROTON_DIR"]) / "files" / "bin" / "wine")
+        return self.env.get("WINE", "wine")
+
+    def build_command(self, item_path, item_type):
+        """Construye el comando que instala un item"""
+        if item_type == "exe":
+            exe_path = Path(item_path)
+            if not exe_path.exists():
+                raise FileNotFoundError(f"El archivo no existe:\n{exe_path}")
+            return self.wrap_command([self.wine_binary(), str(exe_path.absolute())], "--noclose")
+
+        cmd = [self.winetricks_path, item_path]
+        if self.force or item_path in self.force_items:
+            cmd.insert(-1, "--force")
+        if self.silent_mode:
+            cmd.insert(-1, "-q")
+        return self.wrap_command(cmd, "--hold")
+
+    def wrap_command(self, cmd, hold_option="--noclose"):
+        """Abre el comando en la terminal configurada, si la hay"""
+        if self.terminal:
+            return [self.terminal, hold_option, "-e"] + cmd
+        return cmd
+
+    def log_path(self, name):
+        """Obtiene la ruta del log de un item (None si no se guardan logs)"""
+        if not self.log_dir:
+            return None
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        safe_name = re.sub(r"[^\w.-]+", "_", name)[:80]
+        return self.log_dir / f"{stamp}-{safe_name}.log"
+
+    def run_command(self, cmd, on_output=None, log_name=None):
+        """Ejecuta un comando y lanza InstallError si falla
+
+        La salida se lee por bloques acotados: las últimas líneas quedan en un
+        buffer circular para el mensaje de error y la salida completa se vuelca
+        al log del item, así que la memoria no crece con la salida del proceso.
+        """
+        tail = collections.deque(maxlen=self.OUTPUT_TAIL_LINES)
+        log_path = self.log_path(log_name or Path(cmd[-1]).name)
+
+        with TRACER.process_span(cmd, self.env) as span:
+            with self._lock:
+                if not self._is_running:
+                    raise InstallCancelled("Instalación cancelada")
+                process = subprocess.Popen(
+                    cmd,
+                    env=self.env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    start_new_session=True
+                )
+                self._process = process
+            span["pid"] = process.pid
+
+            log_file = None
+            try:
+                if log_path:
+                    log_file = open(log_path, 'wb')
+                for chunk in iter(lambda: process.stdout.readline(self.OUTPUT_LINE_LIMIT), b""):
+                    if log_file:
+                        log_file.write(chunk)
+                    line = chunk.decode("utf-8", errors="replace").rstrip("\r\n")
+                    tail.append(line)
+                    if on_output:
+                        on_output(line)
+                returncode = process.wait()
+                span["exit_code"] = returncode
+            except BaseException:
+                # Si falla on_output o el log (p. ej. BrokenPipeError al redirigir a head),
+                # el proceso va en su propia sesión y nadie más lo terminaría
+                self._kill_group(process)
+                process.wait()
+                raise
+            finally:
+                with self._lock:
+                    self._process = None
+                process.stdout.close()
+                if log_file:
+                    log_file.close()
+
+        if not self._is_running:
+            raise InstallCancelled("Instalación cancelada")
+        if returncode != 0:
+            raise InstallError(returncode, cmd, "\n".join(tail), log_path)
+
+    def install_item(self, item_path, item_type, on_output=None):
+        """Instala un item (componente winetricks o instalador)"""
+        self.run_command(self.build_command(item_path, item_type), on_output,
+                         self.display_name(item_path, item_type))
+
+    def wineserver_binary(self):
+        """Obtiene el binario de wineserver del entorno"""
+        return self.env.get("WINESERVER", "wineserver")
+
+    @staticmethod
+    def prefix_initialized(prefix):
+        """Indica si un prefix ya se inicializó con wineboot"""
+        return (Path(prefix).expanduser() / "system.reg").exists()
+
+    def create_prefix(self, on_output=None):
+        """Crea e inicializa el prefix del entorno sin interfaz
+
+        wineboot -i termina antes de que el prefix quede listo, así que después
+        se espera con wineserver -w a que el wineserver del prefix termine.
+        Nunca se abre en la terminal: no requiere intervención del usuario.
+        """
+        Path(self.env["WINEPREFIX"]).mkdir(parents=True, exist_ok=True, mode=0o755)
+        self.run_command([self.wine_binary(), "wineboot", "-i"], on_output, "wineboot")
+        self.run_command([self.wineserver_binary(), "-w"], on_output, "wineserver")
+
+    def run(self, items, item_types, on_progress=None, on_item_finished=None, on_error=None, on_output=None):
+        """Instala los items en orden y se detiene en el primer error
+
+        Devuelve True si todos los items se instalaron.
+        """
+        for idx, (item_path, item_type) in enumerate(zip(items, item_types)):
+            if not self._is_running:
+                return False
+
+            display_name = self.display_name(item_path, item_type)
+            if self.prefetcher:
+                upcoming = zip(items[idx:idx + 1 + self.prefetch_ahead], item_types[idx:idx + 1 + self.prefetch_ahead])
+                self.prefetcher.prefetch([path for path, kind in upcoming if kind == "winetricks"])
+                if item_type == "winetricks" and self.prefetcher.downloads(item_path):
+                    if on_progress:
+                        on_progress(idx, f"{display_name}: Descargando...")
+                    with TRACER.span(f"descarga {display_name}", "download"):
+                        self.prefetcher.wait(item_path)
+
+            if on_progress:
+                on_progress(idx, f"{display_name}: Instalando...")
+
+            item_output = None
+            if on_output:
+                item_output = lambda line, idx=idx: on_output(idx, line)
+
+            try:
+                with TRACER.span(display_name, "install", item_type=item_type):
+                    self.install_item(item_path, item_type, item_output)
+            except InstallCancelled as e:
+                if on_item_finished:
+                    on_item_finished(idx, False, str(e))
+                return False
+            except Exception as e:
+                if on_item_finished:
+                    on_item_finished(idx, False, str(e))
+                if on_error:
+                    on_error(f"Error instalando {display_name}:\n{str(e)}")
+                return False
+
+            if on_progress:
+                on_progress(idx, f"{display_name}: Finalizado ✅")
+            if on_item_finished:
+                on_item_finished(idx, True, "")
+
+        return True
+
+    def stop(self):
+        """Cancela la instalación sin bloquear
+
+        El proceso en curso se termina desde un hilo aparte; wait_stopped()
+        espera a que termine la limpieza.
+        """
+        with self._lock:
+            if not self._is_running:
+                return
+            self._is_running = False
+            process = self._process
+            self._terminator = threading.Thread(target=self._terminate, args=(process,), daemon=True)
+            self._terminator.start()
+
+    def wait_stopped(self, timeout=None):
+        """Espera a que termine la limpieza lanzada por stop()"""
+        if self._terminator:
+            self._terminator.join(timeout)
+
+    def _terminate(self, process):
+        """Termina el grupo de procesos del item en curso y el wineserver del prefix"""
+        if process is not None:
+            self._kill_group(process)
+        self.kill_wineserver()
+
+    def _kill_group(self, process):
+        """Termina el grupo de procesos de un item (SIGTERM y, si no basta, SIGKILL)"""
+        self._signal_group(process, signal.SIGTERM)
+        try:
+            process.wait(timeout=self.TERMINATE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            pass
+        # Los hijos que ignoren SIGTERM siguen en el grupo aunque el líder haya salido
+        self._signal_group(process, signal.SIGKILL)
+
+    @staticmethod
+    def _signal_group(process, sig):
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def kill_wineserver(self):
+        """Mata el wineserver (y todos los procesos wine) del prefix"""
+        if "WINEPREFIX" not in self.env or not Path(self.env["WINEPREFIX"]).exists():
+            return
+        try:
+            run_process(
+                [self.wineserver_binary(), "-k"],
+                env=self.env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=self.WINESERVER_TIMEOUT
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error killing wineserver: {e}")
+
+class QueueItem:
+    """Item de la cola de instalación
+
+    name es lo que se muestra y target lo que se instala (verbo o ruta del
+    instalador); id no cambia aunque el item se mueva en la cola.
+    """
+    __slots__ = ("id", "name", "item_type", "target", "config_name", "status", "checked", "reinstall", "program_id")
+
+    def __init__(self, item_id, name, item_type, target, config_name, status="Pendiente", reinstall=False,
+                 program_id=None):
+        self.id = item_id
+        self.name = name
+        self.item_type = item_type
+        self.target = target
+        self.config_name = config_name
+        self.status = status
+        self.checked = True
+        self.reinstall = reinstall  # Confirmado para reinstalar aunque ya esté instalado
+        self.program_id = program_id  # Programa guardado del que procede (se resuelve al instalar)
+
+class InstallQueue:
+    """Cola de instalación ordenada con identificadores estables
+
+    Guarda la fila de cada item por id: buscar un item, actualizar su estado
+    o intercambiar dos filas es O(1). Al borrar filas las posiciones de los
+    items siguientes se recalculan una sola vez, en la siguiente búsqueda.
+    """
+    def __init__(self):
+        self.items = []
+        self._rows = {}
+        self._stale_from = None
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, row):
+        return self.items[row]
+
+    def add(self, name, item_type, target=None, config_name=None, status="Pendiente", reinstall=False,
+            program_id=None):
+        item = QueueItem(self._next_id, name, item_type, target if target is not None else name,
+                         config_name, status, reinstall, program_id)
+        self._next_id += 1
+        self._rows[item.id] = len(self.items)
+        self.items.append(item)
+        return item
+
+    def get(self, item_id):
+        row = self.row(item_id)
+        return None if row is None else self.items[row]
+
+    def row(self, item_id):
+        if self._stale_from is not None:
+            for row in range(self._stale_from, len(self.items)):
+                self._rows[self.items[row].id] = row
+            self._stale_from = None
+        return self._rows.get(item_id)
+
+    def swap(self, row1, row2):
+        items = self.items
+        items[row1], items[row2] = items[row2], items[row1]
+        self._rows[items[row1].id] = row1
+        self._rows[items[row2].id] = row2
+
+    def remove_rows(self, rows):
+        """Elimina las filas indicadas y devuelve los items eliminados"""
+        rows = sorted(set(rows))
+        if not rows:
+            return []
+
+        removed = [self.items[row] for row in rows]
+        for item in removed:
+            del self._rows[item.id]
+        # De abajo arriba para que las filas pendientes no se desplacen
+        for row in reversed(rows):
+            del self.items[row]
+        if self._stale_from is None or rows[0] < self._stale_from:
+            self._stale_from = rows[0]
+        return removed
+
+    def clear(self):
+        self.items = []
+        self._rows = {}
+        self._stale_from = None
+
+    def by_config(self):
+        """Agrupa los items por configuración, respetando el orden de la cola"""
+        groups = {}
+        for item in self.items:
+            groups.setdefault(item.config_name, []).append(item)
+        return groups
+
+class InstallJob:
+    """Trabajo de instalación: items a instalar en el prefix de una configuración"""
+    def __init__(self, config_name, env, items, item_types, item_ids=None, force_items=(), create_prefix=False,
+                 template=None):
+        self.config_name = config_name
+        self.env = env
+        self.items = items
+        self.item_types = item_types
+        self.force_items = set(force_items)  # Verbos que se reinstalan aunque ya estén instalados
+        self.create_prefix = create_prefix  # Inicializar el prefix antes de instalar si no lo está
+        self.template = template  # Prefix plantilla que se clona en lugar de ejecutar wineboot
+        # Identificador de cada item en la cola de quien lanza el trabajo
+        self.item_ids = item_ids if item_ids is not None else list(range(len(items)))
+        self.prefix = str(Path(env["WINEPREFIX"]).expanduser().resolve())
+        self.success = None
+        self.engine = None
+
+class InstallScheduler:
+    """Planificador de instalaciones en varios prefixes a la vez
+
+    Cada prefix tiene su propio wineserver, así que los trabajos de prefixes
+    distintos se ejecutan en paralelo (como máximo max_workers a la vez, por
+    defecto uno por CPU). Los trabajos de un mismo prefix se ejecutan de uno
+    en uno y en el orden en que se añadieron. Si se indica un prefetcher, los
+    trabajos lo comparten y se detiene al terminar.
+    """
+    def __init__(self, winetricks_path="winetricks", silent_mode=False, terminal=None, max_workers=None,
+                 log_dir=None, prefetcher=None, force=True):
+        self.winetricks_path = winetricks_path
+        self.silent_mode = silent_mode
+        self.force = force
+        self.terminal = terminal
+        self.log_dir = Path(log_dir) if log_dir else None
+        self.prefetcher = prefetcher
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self._pending = []
+        self._busy = set()
+        self._running_jobs = []
+        self._workers = []
+        self._cond = threading.Condition()
+        self._is_running = True
+
+    def run(self, jobs, on_progress=None, on_item_finished=None, on_error=None, on_output=None,
+            on_job_finished=None):
+        """Ejecuta los trabajos y espera a que terminen
+
+        Los callbacks se llaman desde los hilos de trabajo y reciben el trabajo
+        como primer argumento. Devuelve True si todos los trabajos se completaron.
+        """
+        jobs = list(jobs)
+        callbacks = (on_progress, on_item_finished, on_error, on_output, on_job_finished)
+        with self._cond:
+            self._pending = list(jobs)
+
+        self._workers = [
+            threading.Thread(target=self._worker, args=(callbacks,), daemon=True)
+            for _ in range(min(self.max_workers, len(jobs)))
+        ]
+        for worker in self._workers:
+            worker.start()
+        for worker in self._workers:
+            worker.join()
+        if self.prefetcher:
+            self.prefetcher.stop()
+
+        return all(job.success for job in jobs)
+
+    def _next_job(self):
+        """Obtiene el siguiente trabajo cuyo prefix esté libre (None si no quedan)"""
+        with self._cond:
+            while self._is_running and self._pending:
+                for i, job in enumerate(self._pending):
+                    if job.prefix not in self._busy:
+                        del self._pending[i]
+                        self._busy.add(job.prefix)
+                        self._running_jobs.append(job)
+                        return job
+                self._cond.wait()
+            return None
+
+    def _worker(self, callbacks):
+        on_progress, on_item_finished, on_error, on_output, on_job_finished = callbacks
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            job.engine = InstallEngine(
+                job.env,
+                winetricks_path=self.winetricks_path,
+                silent_mode=self.silent_mode,
+                terminal=self.terminal,
+                log_dir=self.log_dir and self.log_dir / re.sub(r"[^\w.-]+", "_", job.config_name),
+                prefetcher=self.prefetcher,
+                force=self.force,
+                force_items=job.force_items
+            )
+            with self._cond:
+                if not self._is_running:
+                    job.engine.stop()
+            stage = "prefix"
+            try:
+                if job.create_prefix and not InstallEngine.prefix_initialized(job.prefix):
+                    # Los eventos del prefix llegan con idx None: no corresponden a ningún item
+                    if on_progress:
+                        on_progress(job, None, "Clonando plantilla..." if job.template else "Creando prefix...")
+                    with TRACER.span(f"crear prefix {job.config_name}", "install", prefix=job.prefix,
+                                     template=job.template):
+                        if job.template:
+                            self._clone_template(job)
+                        else:
+                            job.engine.create_prefix(on_output and (lambda line, job=job: on_output(job, None, line)))
+                    if on_progress:
+                        on_progress(job, None, "Prefix creado ✅")
+                stage = "items"
+                with TRACER.span(f"trabajo {job.config_name}", "install", items=len(job.items)) as span:
+                    job.success = job.engine.run(
+                        job.items,
+                        job.item_types,
+                        on_progress=on_progress and (lambda idx, message, job=job: on_progress(job, idx, message)),
+                        on_item_finished=on_item_finished and (
+                            lambda idx, ok, message, job=job: on_item_finished(job, idx, ok, message)),
+                        on_error=on_error and (lambda message, job=job: on_error(job, message)),
+                        on_output=on_output and (lambda idx, line, job=job: on_output(job, idx, line))
+                    )
+                    span["success"] = job.success
+            except InstallCancelled as e:
+                job.success = False
+                if stage == "prefix":
+                    self._fail_items(job, "Cancelado", str(e), on_progress, on_item_finished)
+            except Exception as e:
+                job.success = False
+                if stage == "prefix":
+                    if on_progress:
+                        on_progress(job, None, "Error al crear el prefix ❌")
+                    self._fail_items(job, "Error al crear el prefix ❌", str(e), on_progress, on_item_finished)
+                if on_error:
+                    on_error(job, f"No se pudo crear el prefix:\n{str(e)}" if stage == "prefix" else str(e))
+            finally:
+                with self._cond:
+                    self._busy.discard(job.prefix)
+                    self._running_jobs.remove(job)
+                    self._cond.notify_all()
+
+            if on_job_finished:
+                on_job_finished(job)
+
+    @staticmethod
+    def _clone_template(job):
+        """Crea el prefix del trabajo clonando su plantilla"""
+        prefix = Path(job.prefix)
+        if prefix.exists():
+            prefix.rmdir()  # Solo se usan plantillas para prefixes vacíos
+        PrefixCloner().clone(job.template, prefix)
+
+    @staticmethod
+    def _fail_items(job, status, message, on_progress, on_item_finished):
+        """Da por fallidos todos los items de un trabajo cuyo prefix no llegó a crearse"""
+        for idx, (item_path, item_type) in enumerate(zip(job.items, job.item_types)):
+            if on_progress:
+                on_progress(job, idx, f"{InstallEngine.display_name(item_path, item_type)}: {status}")
+            if on_item_finished:
+                on_item_finished(job, idx, False, message)
+
+    def stop(self, wait=False):
+        """Cancela los trabajos pendientes y detiene los que están en curso
+
+        No bloquea salvo que wait sea True, en cuyo caso espera a que los
+        procesos y los wineserver afectados hayan terminado.
+        """
+        with self._cond:
+            self._is_running = False
+            self._pending.clear()
+            engines = [job.engine for job in self._running_jobs if job.engine]
+            self._cond.notify_all()
+
+        for engine in engines:
+            engine.stop()
+        if self.prefetcher:
+            self.prefetcher.stop()
+        if wait:
+            for engine in engines:
+                engine.wait_stopped()
+            for worker in self._workers:
+                worker.join()
+
+class StartupProfile:
+    """Tiempos de cada fase del arranque de la interfaz (--startup-profile)
+
+    Cada mark() cierra la fase en curso; report() muestra la duración de cada
+    una y compara el total con el presupuesto de tiempo hasta que la ventana
+    responde.
+    """
+    BUDGET_MS = 1000
+
+    def __init__(self, started=None, budget_ms=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.last = self.started
+        self.budget_ms = budget_ms or self.BUDGET_MS
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    @property
+    def total_ms(self):
+        return (self.last - self.started) * 1000
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        width = max([len(phase) for phase, _ in self.phases] + [len("total")])
+        print("Tiempos de arranque:", file=stream)
+        for phase, elapsed in self.phases:
+            print(f"  {phase:<{width}} {elapsed:8.1f} ms", file=stream)
+        verdict = "dentro del presupuesto" if self.total_ms <= self.budget_ms else "fuera del presupuesto"
+        print(f"  {'total':<{width}} {self.total_ms:8.1f} ms ({verdict} de {self.budget_ms} ms)", file=stream, flush=True)
@@ -0,0 +1,86 @@
+"""Pruebas de DownloadPrefetcher contra un servidor HTTP local (sin red)"""
+import hashlib
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wineproton_core import DownloadPrefetcher, WinetricksDownload
+
+PAYLOAD = b"contenido del instalador\n" * 4096
+
+class PayloadHandler(http.server.BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, format, *args):
+        pass
+
+class DownloadPrefetcherTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.HTTPServer(("127.0.0.1", 0), PayloadHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        PayloadHandler.requests.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name) / "winetricks"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def prefetch(self, checksum):
+        download = WinetricksDownload("vcrun2022", f"{self.base_url}/VC_redist.x64.exe", checksum)
+        prefetcher = DownloadPrefetcher(cache_dir=self.cache_dir, catalog={"vcrun2022": [download]})
+        try:
+            prefetcher.prefetch(["vcrun2022"])
+            prefetcher.wait("vcrun2022", timeout=10)
+        finally:
+            prefetcher.stop()
+        return prefetcher.path_for(download)
+
+    def test_download_with_valid_checksum(self):
+        target = self.prefetch(hashlib.sha256(PAYLOAD).hexdigest())
+
+        self.assertEqual(target, self.cache_dir / "vcrun2022" / "VC_redist.x64.exe")
+        self.assertEqual(target.read_bytes(), PAYLOAD)
+        self.assertEqual(PayloadHandler.requests, ["/VC_redist.x64.exe"])
+
+    def test_bad_checksum_leaves_no_file(self):
+        target = self.prefetch("0" * 64)
+
+        self.assertFalse(target.exists())
+        # Tampoco queda el archivo temporal a medio descargar
+        self.assertEqual(os.listdir(target.parent), [])
+
+    def test_cached_file_is_not_downloaded_again(self):
+        checksum = hashlib.sha1(PAYLOAD).hexdigest()
+        self.prefetch(checksum)
+        self.assertEqual(len(PayloadHandler.requests), 1)
+
+        target = self.prefetch(checksum)
+
+        self.assertEqual(target.read_bytes(), PAYLOAD)
+        self.assertEqual(len(PayloadHandler.requests), 1)
+
+if __name__ == "__main__":
+    unittest.main()
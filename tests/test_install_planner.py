@@ -0,0 +1,73 @@
+"""Pruebas del orden de instalación de InstallPlanner"""
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wineproton_core import InstallPlanner, WinetricksScript
+
+SCRIPT = """\
+load_dotnet48()
+{
+    w_call dotnet40
+    w_call remove_mono
+    if [ "$W_ARCH" = "win64" ]; then
+        w_call vcrun2015
+    fi
+}
+
+load_dotnet40()
+{
+    w_call remove_mono
+}
+
+load_dxvk()
+{
+    w_call vcrun2022
+}
+"""
+
+class InstallPlannerTest(unittest.TestCase):
+    def setUp(self):
+        self.planner = InstallPlanner(WinetricksScript.parse(io.StringIO(SCRIPT)))
+
+    def test_parse_only_unconditional_dependencies(self):
+        self.assertEqual(self.planner.dependencies["dotnet48"], ["dotnet40", "remove_mono"])
+        self.assertEqual(self.planner.dependencies["dotnet40"], ["remove_mono"])
+
+    def test_dependencies_come_first(self):
+        plan = self.planner.plan(["dotnet48"], ["winetricks"])
+
+        self.assertEqual(plan.items, ["remove_mono", "dotnet40", "dotnet48"])
+        self.assertEqual(plan.sources, [None, None, 0])
+        self.assertEqual(plan.required_by, ["dotnet40", "dotnet48", None])
+
+    def test_shared_dependencies_and_duplicates_are_planned_once(self):
+        plan = self.planner.plan(["dotnet40", "dotnet48", "dotnet40"], ["winetricks"] * 3)
+
+        self.assertEqual(plan.items, ["remove_mono", "dotnet40", "dotnet48"])
+        self.assertEqual(plan.skipped, {2: "Duplicado"})
+
+    def test_installed_verbs_are_skipped(self):
+        plan = self.planner.plan(["dotnet48", "dxvk"], ["winetricks"] * 2, installed={"dotnet40", "dxvk"})
+
+        # dotnet40 ya está, pero remove_mono también es dependencia directa de dotnet48
+        self.assertEqual(plan.items, ["remove_mono", "dotnet48"])
+        self.assertEqual(plan.skipped, {1: "Ya instalado"})
+
+    def test_reinstall_overrides_installed(self):
+        plan = self.planner.plan(["dxvk"], ["winetricks"], installed={"dxvk", "vcrun2022"}, reinstall={"dxvk"})
+
+        self.assertEqual(plan.items, ["dxvk"])
+        self.assertEqual(plan.skipped, {})
+
+    def test_installers_keep_their_position(self):
+        plan = self.planner.plan(["/tmp/setup.exe", "dxvk"], ["exe", "winetricks"])
+
+        self.assertEqual(plan.items, ["/tmp/setup.exe", "vcrun2022", "dxvk"])
+        self.assertEqual(plan.item_types, ["exe", "winetricks", "winetricks"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Pruebas de la lectura incremental de winetricks.log en InstalledIndex"""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wineproton_core import InstalledIndex
+
+class InstalledIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.prefix = self.root / "prefix"
+        self.prefix.mkdir()
+        self.log = self.prefix / "winetricks.log"
+        self.cache_file = self.root / "installed_index.json"
+        self.index = InstalledIndex(self.cache_file)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, mode="a"):
+        with open(self.log, mode, encoding="utf-8") as f:
+            f.write(text)
+
+    def test_appended_lines_are_read_incrementally(self):
+        self.write("vcrun2022\n")
+        self.assertEqual(self.index.get(self.prefix), {"vcrun2022"})
+        offset = self.index.entries[str(self.prefix.resolve())]["offset"]
+
+        self.write("corefonts\n")
+
+        self.assertEqual(self.index.get(self.prefix), {"vcrun2022", "corefonts"})
+        self.assertGreater(self.index.entries[str(self.prefix.resolve())]["offset"], offset)
+
+    def test_incomplete_last_line_waits_for_newline(self):
+        self.write("vcrun2022\ncorefo")
+        self.assertEqual(self.index.get(self.prefix), {"vcrun2022"})
+
+        self.write("nts\n")
+
+        self.assertEqual(self.index.get(self.prefix), {"vcrun2022", "corefonts"})
+
+    def test_truncated_log_is_read_again(self):
+        self.write("vcrun2022\ncorefonts\n")
+        self.index.get(self.prefix)
+
+        self.write("dxvk\n", mode="w")
+
+        self.assertEqual(self.index.get(self.prefix), {"dxvk"})
+
+    def test_replaced_log_is_read_again(self):
+        self.write("vcrun2022\n")
+        self.index.get(self.prefix)
+
+        # Un archivo nuevo (otro inodo) del mismo tamaño o mayor también invalida el índice
+        replacement = self.prefix / "winetricks.log.new"
+        replacement.write_text("d3dx9\ndxvk\n", encoding="utf-8")
+        os.replace(replacement, self.log)
+
+        self.assertEqual(self.index.get(self.prefix), {"d3dx9", "dxvk"})
+
+    def test_missing_log_means_nothing_installed(self):
+        self.write("vcrun2022\n")
+        self.index.get(self.prefix)
+
+        self.log.unlink()
+
+        self.assertEqual(self.index.get(self.prefix), set())
+
+    def test_saved_index_resumes_from_offset(self):
+        self.write("vcrun2022\n")
+        self.index.get(self.prefix)
+        self.index.save()
+        self.write("corefonts\n")
+
+        reloaded = InstalledIndex(self.cache_file)
+
+        self.assertEqual(reloaded.get(self.prefix), {"vcrun2022", "corefonts"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Pruebas de PrefixCloner: copia del prefix y reescritura de rutas en el registro"""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wineproton_core import PrefixCloner
+
+class PrefixClonerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.source = self.root / "base"
+        self.target = self.root / "juego"
+
+    def write_reg(self, name, text):
+        path = self.source / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(text.encode("utf-8"))
+        return path
+
+    def test_registry_paths_are_rewritten(self):
+        source, target = str(self.source), str(self.target)
+        windows_source = "Z:" + source.replace("/", "\\\\")
+        self.write_reg("user.reg", (
+            f'"Personal"="{source}/drive_c/users/steam"\n'
+            f'"Path"="{windows_source}\\\\drive_c\\\\windows"\n'
+            f'"Other"="{source}2/drive_c"\n'
+        ))
+        PrefixCloner(reflink=False).clone(self.source, self.target)
+
+        text = (self.target / "user.reg").read_text(encoding="utf-8")
+        windows_target = "Z:" + target.replace("/", "\\\\")
+        self.assertIn(f'"Personal"="{target}/drive_c/users/steam"', text)
+        self.assertIn(f'"Path"="{windows_target}\\\\drive_c\\\\windows"', text)
+        # Solo rutas completas: un prefix con el mismo comienzo no se toca
+        self.assertIn(f'"Other"="{source}2/drive_c"', text)
+        # El origen no cambia
+        self.assertIn(source + "/drive_c", (self.source / "user.reg").read_text(encoding="utf-8"))
+
+    def test_clone_keeps_links_inside_the_copy(self):
+        self.write_reg("system.reg", "WINE REGISTRY Version 2\n")
+        data = self.source / "drive_c" / "data.bin"
+        data.parent.mkdir()
+        data.write_bytes(b"x" * 1024)
+        os.link(data, self.source / "drive_c" / "data-link.bin")
+        os.symlink(self.source / "drive_c", self.source / "dosdevices-c")
+
+        stats = PrefixCloner(reflink=False).clone(self.source, self.target)
+
+        cloned = self.target / "drive_c" / "data.bin"
+        self.assertEqual(cloned.read_bytes(), data.read_bytes())
+        self.assertNotEqual(cloned.stat().st_ino, data.stat().st_ino)
+        self.assertEqual(cloned.stat().st_ino, (self.target / "drive_c" / "data-link.bin").stat().st_ino)
+        self.assertEqual(os.readlink(self.target / "dosdevices-c"), str(self.target / "drive_c"))
+        self.assertEqual(stats["hardlinked"], 1)
+        self.assertEqual(stats["symlinks"], 1)
+
+    def test_existing_target_is_refused(self):
+        self.write_reg("system.reg", "WINE REGISTRY Version 2\n")
+        self.target.mkdir()
+
+        with self.assertRaises(FileExistsError):
+            PrefixCloner().clone(self.source, self.target)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Pruebas del almacenamiento SQLite: guardado de filas marcadas e identificadores estables"""
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wineproton_core import ConfigManager
+
+class SqliteBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        home = mock.patch.dict(os.environ, {"HOME": self.tmp.name})
+        home.start()
+        self.addCleanup(home.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+        manager = ConfigManager()
+        self.ids = manager.add_custom_programs(
+            [{"name": f"Programa {i}", "path": f"/opt/setup/{i}.exe", "type": "exe"} for i in range(5)])
+        manager.set_storage_backend("sqlite")
+        manager.backend.close()
+        self.db_file = manager.backend.db_file
+
+    def reload(self):
+        manager = ConfigManager()
+        self.addCleanup(manager.backend.close)
+        self.assertEqual(manager.get_storage_backend(), "sqlite")
+        return manager
+
+    def rows(self):
+        with sqlite3.connect(str(self.db_file)) as conn:
+            return conn.execute("SELECT position, name FROM custom_programs ORDER BY position").fetchall()
+
+    def test_programs_are_loaded_on_demand(self):
+        manager = self.reload()
+
+        self.assertNotIn("custom_programs", manager.configs)
+        self.assertEqual(len(manager.get_custom_programs()), 5)
+
+    def test_ids_survive_migration_and_reload(self):
+        manager = self.reload()
+
+        self.assertEqual([program["id"] for program in manager.get_custom_programs()], self.ids)
+        self.assertEqual(manager.get_custom_program(self.ids[3])["name"], "Programa 3")
+
+    def test_update_writes_only_marked_rows(self):
+        manager = self.reload()
+        manager.get_custom_programs()
+        with mock.patch.object(manager.backend, "_dump", wraps=manager.backend._dump) as dump:
+            manager.update_custom_programs({"Programa 2": {"path": "/opt/nuevo.exe"}})
+
+        # Una fila de programa y las secciones pequeñas marcadas (ninguna aquí)
+        self.assertEqual(dump.call_count, 1)
+        self.assertEqual(self.reload().get_custom_program(self.ids[2])["path"], "/opt/nuevo.exe")
+
+    def test_remove_and_add_round_trip(self):
+        manager = self.reload()
+        manager.remove_custom_programs(["Programa 1", "Programa 3"])
+        new_id = manager.add_custom_program("Nuevo", "/opt/nuevo.exe", "exe")
+
+        self.assertEqual(self.rows(), [(0, "Programa 0"), (1, "Programa 2"), (2, "Programa 4"), (3, "Nuevo")])
+        reloaded = self.reload()
+        self.assertEqual([program["name"] for program in reloaded.get_custom_programs()],
+                         ["Programa 0", "Programa 2", "Programa 4", "Nuevo"])
+        self.assertEqual(reloaded.get_custom_program(self.ids[4])["name"], "Programa 4")
+        self.assertEqual(reloaded.get_custom_program(new_id)["name"], "Nuevo")
+        self.assertIsNone(reloaded.get_custom_program(self.ids[1]))
+
+    def test_settings_change_keeps_programs_untouched(self):
+        manager = self.reload()
+        manager.set_theme("dark")
+
+        reloaded = self.reload()
+        self.assertEqual(reloaded.get_theme(), "dark")
+        self.assertEqual(len(reloaded.get_custom_programs()), 5)
+
+    def test_export_back_to_json(self):
+        manager = self.reload()
+        manager.add_install_history("Wine-System", "vcrun2022", "winetricks", "ok")
+        manager.set_storage_backend("json")
+
+        reloaded = ConfigManager()
+        self.assertEqual(reloaded.get_storage_backend(), "json")
+        self.assertEqual([program["id"] for program in reloaded.get_custom_programs()], self.ids)
+        self.assertEqual([record["item"] for record in reloaded.get_install_history()], ["vcrun2022"])
+
+if __name__ == "__main__":
+    unittest.main()